@@ -5,20 +5,74 @@ Flask API that receives a flowsheet JSON payload, runs the
 hydraulic solver, and sends the calculation report back to
 the React front-end (or any other client).
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+import itertools
+import time
+from flask.logging import default_handler
 from flask_cors import CORS
+import logging
 import os
 
 # Local helper functions
-from helpers import execute_flowsheet_extended
+from helpers import LAYOUTS, execute_flowsheet_extended
+from batch import execute_batch
+from sweep import execute_sweep, sweep_to_binary, sweep_to_json
+from uncertainty import execute_uncertainty
+from sizing import execute_sizing
+from timeseries import execute_timeseries
+from validation import FlowsheetError, check_flowsheet, check_payload
+from cache import ResultCache
+import codec
+from executor import (SolveExecutor, SolverBusy, SolveTimeout, batch_cost, flowsheet_cost,
+                      sizing_cost, sweep_cost, timeseries_cost, uncertainty_cost)
+from jobs import JobStore, SUCCEEDED, FINISHED, sse_stream
+from sessions import SessionStore
+import streaming
+from timing import end_request, stage, start_request
+import metrics
 from dotenv import load_dotenv
 
 load_dotenv()  # Load .env variables into os.environ
 
 app = Flask(__name__)
 
+# Solved reports keyed by a hash of the solver-relevant payload
+result_cache = ResultCache.from_env()
+
+# Large solves run in a process pool; small ones stay on the request thread
+solve_executor = SolveExecutor.from_env()
+
+# Background jobs (per worker process); streamed batches use the same chunks
+job_chunk_size = int(os.getenv("SOLVER_JOB_CHUNK", "256"))
+solve_jobs = JobStore(
+    solve_executor,
+    max_running=int(os.getenv("SOLVER_JOB_THREADS", "2")),
+    ttl=float(os.getenv("SOLVER_JOB_TTL", "3600")),
+    chunk_size=job_chunk_size,
+)
+
+# Incremental solve sessions (per worker process)
+solve_sessions = SessionStore(
+    max_sessions=int(os.getenv("SOLVER_SESSIONS", "256")),
+    ttl=float(os.getenv("SOLVER_SESSION_TTL", "1800")),
+)
+
 frontend_origin = os.getenv("FRONTEND_ORIGIN")
 
+# Solver logging: SOLVER_LOG_LEVEL=INFO logs one timing line per request,
+# DEBUG adds per-solve details.  SOLVER_SERVER_TIMING=1 also sends the
+# stage timings to the browser as a Server-Timing header.
+solver_logger = logging.getLogger("solver")
+solver_logger.setLevel(os.getenv("SOLVER_LOG_LEVEL", "WARNING").upper())
+if not logging.getLogger().handlers:
+    solver_logger.addHandler(default_handler)
+timing_logger = logging.getLogger("solver.timing")
+server_timing = os.getenv("SOLVER_SERVER_TIMING", "").lower() in ("1", "true", "yes")
+
+# Responses of at least this many bytes are gzip/brotli encoded when the
+# client accepts it (negative disables compression)
+compress_min_bytes = int(os.getenv("SOLVER_COMPRESS_MIN_BYTES", "1024"))
+
 # CORS: restrict to the front-end origin during development
 CORS(
     app,
@@ -38,6 +92,130 @@ def add_cors_headers(response):           # noqa: D401
     return response
 
 
+# ──────────────────────────────────────────────────────────
+# Per-request timing (see timing.py)
+# ──────────────────────────────────────────────────────────
+@app.before_request
+def start_timing():                       # noqa: D401
+    g.timing_token = start_request()
+
+
+@app.after_request
+def report_timing(response):              # noqa: D401
+    token = g.pop("timing_token", None)
+    timer = end_request(token) if token is not None else None
+    if timer is None or request.method == "OPTIONS":
+        return response
+
+    if timing_logger.isEnabledFor(logging.INFO):
+        timing_logger.info("%s %s %s %s", request.method, request.path,
+                           response.status_code, timer.summary())
+    if server_timing:
+        response.headers["Server-Timing"] = timer.server_timing()
+        response.headers["Timing-Allow-Origin"] = frontend_origin or "*"
+    return response
+
+
+# ──────────────────────────────────────────────────────────
+# Prometheus metrics (see metrics.py)
+# ──────────────────────────────────────────────────────────
+def _metrics_endpoint():
+    """Route pattern of the request – bounded label values, no session ids."""
+    if request.method == "OPTIONS" or request.url_rule is None:
+        return None
+    rule = request.url_rule.rule
+    return None if rule == "/api/metrics" else rule
+
+
+@app.before_request
+def start_metrics():                      # noqa: D401
+    endpoint = _metrics_endpoint()
+    if endpoint is not None:
+        g.metrics_started = time.perf_counter()
+        metrics.REQUESTS_IN_FLIGHT.labels(endpoint).inc()
+
+
+@app.after_request
+def record_metrics(response):             # noqa: D401
+    started = g.pop("metrics_started", None)
+    if started is not None:
+        endpoint = _metrics_endpoint()
+        mode = g.get("calculation_mode", "none")
+        metrics.REQUEST_LATENCY.labels(endpoint, mode).observe(time.perf_counter() - started)
+        if response.status_code >= 400:
+            metrics.REQUEST_ERRORS.labels(endpoint, str(response.status_code)).inc()
+    return response
+
+
+@app.teardown_request
+def finish_metrics(exc):                  # noqa: D401
+    # teardown runs even when a view raises, so the gauge never leaks
+    endpoint = _metrics_endpoint()
+    if endpoint is not None:
+        metrics.REQUESTS_IN_FLIGHT.labels(endpoint).dec()
+
+
+# ──────────────────────────────────────────────────────────
+# Response compression (see codec.py); registered last so it runs
+# first and the timing / metrics hooks include it
+# ──────────────────────────────────────────────────────────
+@app.after_request
+def compress_response(response):          # noqa: D401
+    if (compress_min_bytes < 0 or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.content_length is None or response.content_length < compress_min_bytes):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = codec.negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+    with stage("compress"):
+        response.set_data(codec.compress(response.get_data(), encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def _solver_busy(exc):
+    response = jsonify(error=str(exc))
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
+def _solve_flowsheet(flowsheet, layout="records"):
+    return solve_executor.run(execute_flowsheet_extended, flowsheet, layout,
+                              cost=flowsheet_cost(flowsheet))
+
+
+def _invalid_flowsheet(exc):
+    """400 with every validation problem, each with its node / edge id."""
+    return jsonify(error=str(exc), errors=exc.errors), 400
+
+
+def _parse_body():
+    """Request body as JSON (``codec.loads``); raises ``ValueError`` when malformed."""
+    with stage("parse"):
+        return codec.loads(request.get_data(cache=False))
+
+
+def _ndjson_response(blocks):
+    """
+    Streams ``blocks`` (see streaming.py) as NDJSON.  The first block is
+    produced here, so errors before any output still get a status code.
+    """
+    first = next(blocks, [])
+    response = Response(stream_with_context(streaming.ndjson(itertools.chain([first], blocks))),
+                        mimetype=streaming.NDJSON_MIMETYPE)
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _json_response(report, status=200):
+    """Serialises ``report`` inside the "serialize" stage."""
+    with stage("serialize"):
+        return Response(codec.dumps(report), status=status, mimetype="application/json")
+
+
 # ──────────────────────────────────────────────────────────
 # Main API endpoint
 # ──────────────────────────────────────────────────────────
@@ -49,29 +227,386 @@ def run_flowsheet():                      # noqa: D401
 
     # 1 ─ Parse JSON body
     try:
-        flowsheet = request.get_json(force=True)
+        flowsheet = _parse_body()
     except Exception:
         return jsonify(error="Malformed JSON body"), 400
 
-    if not isinstance(flowsheet, dict) or \
-       "nodes" not in flowsheet or "edges" not in flowsheet:
-        return jsonify(
-            error="Payload must contain top-level 'nodes' and 'edges'"
-        ), 400
+    # Structure, types, units, ranges and topology, before any solver work
+    try:
+        check_flowsheet(flowsheet)
+    except FlowsheetError as exc:
+        return _invalid_flowsheet(exc)
+
+    # "format": "columnar" opts into one array per result field, "ndjson"
+    # into one line per element (the records report, streamed)
+    layout = flowsheet.get("format") or "records"
+    if layout not in (*LAYOUTS, "ndjson"):
+        return jsonify(error=f"'format' must be one of {[*LAYOUTS, 'ndjson']}"), 400
+    with stage("parse"):
+        flowsheet = codec.solver_view(flowsheet)
 
     # 2 ─ Execute hydraulic calculations
     try:
-        # print(flowsheet)
-        report = execute_flowsheet_extended(flowsheet)
-        # print_hydraulic_report(report)
+        report = result_cache.get_or_compute(
+            flowsheet, lambda fs: _solve_flowsheet(fs, "records" if layout == "ndjson" else layout),
+            variant="" if layout in ("records", "ndjson") else layout)
+        g.calculation_mode = report.get("calculation_mode", "none")
+        if layout == "ndjson":
+            return _ndjson_response(streaming.stream_report(report, flowsheet))
     except ValueError as exc:
         return jsonify(error=str(exc)), 400
+    except SolverBusy as exc:
+        return _solver_busy(exc)
+    except SolveTimeout as exc:
+        return jsonify(error=str(exc)), 504
     except Exception:
         app.logger.exception("Flow-sheet solve failed")
         return jsonify(error="Internal server error"), 500
 
     # 3 ─ Success
-    return (report, 200)
+    return _json_response(report)
+
+
+# ──────────────────────────────────────────────────────────
+# Batch endpoint: many scenarios / flowsheets per request
+# ──────────────────────────────────────────────────────────
+@app.route("/api/run/batch", methods=["POST", "OPTIONS"])
+def run_batch():                          # noqa: D401
+    if request.method == "OPTIONS":
+        return "", 204
+
+    try:
+        payload = _parse_body()
+    except Exception:
+        return jsonify(error="Malformed JSON body"), 400
+
+    if not isinstance(payload, dict):
+        return jsonify(error="Payload must be a JSON object"), 400
+
+    try:
+        check_payload(payload)
+    except FlowsheetError as exc:
+        return _invalid_flowsheet(exc)
+
+    try:
+        if payload.get("format") == "ndjson":
+            return _ndjson_response(streaming.stream_batch(
+                payload, lambda func, chunk: solve_executor.run(func, chunk, cost=batch_cost(chunk)),
+                chunk_size=job_chunk_size))
+        report = solve_executor.run(execute_batch, payload, cost=batch_cost(payload))
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    except SolverBusy as exc:
+        return _solver_busy(exc)
+    except SolveTimeout as exc:
+        return jsonify(error=str(exc)), 504
+    except Exception:
+        app.logger.exception("Batch solve failed")
+        return jsonify(error="Internal server error"), 500
+
+    return _json_response(report)
+
+
+# ──────────────────────────────────────────────────────────
+# Sweep endpoint: ΔP-vs-flow (or diameter / length) curve of one pipe
+# ──────────────────────────────────────────────────────────
+@app.route("/api/run/sweep", methods=["POST", "OPTIONS"])
+def run_sweep():                          # noqa: D401
+    if request.method == "OPTIONS":
+        return "", 204
+
+    try:
+        payload = _parse_body()
+    except Exception:
+        return jsonify(error="Malformed JSON body"), 400
+
+    if not isinstance(payload, dict):
+        return jsonify(error="Payload must be a JSON object"), 400
+
+    try:
+        check_payload(payload)
+    except FlowsheetError as exc:
+        return _invalid_flowsheet(exc)
+
+    try:
+        sweep = solve_executor.run(execute_sweep, payload, cost=sweep_cost(payload))
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    except SolverBusy as exc:
+        return _solver_busy(exc)
+    except SolveTimeout as exc:
+        return jsonify(error=str(exc)), 504
+    except Exception:
+        app.logger.exception("Sweep failed")
+        return jsonify(error="Internal server error"), 500
+
+    if payload.get("format") == "ndjson":
+        return _ndjson_response(streaming.stream_sweep(sweep))
+
+    if payload.get("format") == "binary":
+        with stage("serialize"):
+            body, columns = sweep_to_binary(sweep)
+        response = Response(body, mimetype="application/octet-stream")
+        response.headers["X-Sweep-Columns"] = ",".join(columns)
+        response.headers["X-Sweep-Points"] = str(sweep["points"])
+        response.headers["Access-Control-Expose-Headers"] = "X-Sweep-Columns,X-Sweep-Points"
+        return response
+
+    with stage("serialize"):
+        body = sweep_to_json(sweep)
+    return _json_response(body)
+
+
+@app.route("/api/run/uncertainty", methods=["POST", "OPTIONS"])
+def run_uncertainty():                    # noqa: D401
+    if request.method == "OPTIONS":
+        return "", 204
+
+    try:
+        payload = _parse_body()
+    except Exception:
+        return jsonify(error="Malformed JSON body"), 400
+
+    if not isinstance(payload, dict):
+        return jsonify(error="Payload must be a JSON object"), 400
+
+    try:
+        check_payload(payload)
+    except FlowsheetError as exc:
+        return _invalid_flowsheet(exc)
+
+    try:
+        report = solve_executor.run(execute_uncertainty, payload, cost=uncertainty_cost(payload))
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    except SolverBusy as exc:
+        return _solver_busy(exc)
+    except SolveTimeout as exc:
+        return jsonify(error=str(exc)), 504
+    except Exception:
+        app.logger.exception("Uncertainty analysis failed")
+        return jsonify(error="Internal server error"), 500
+
+    return _json_response(report)
+
+
+@app.route("/api/run/sizing", methods=["POST", "OPTIONS"])
+def run_sizing():                         # noqa: D401
+    if request.method == "OPTIONS":
+        return "", 204
+
+    try:
+        payload = _parse_body()
+    except Exception:
+        return jsonify(error="Malformed JSON body"), 400
+
+    if not isinstance(payload, dict):
+        return jsonify(error="Payload must be a JSON object"), 400
+
+    try:
+        check_payload(payload)
+    except FlowsheetError as exc:
+        return _invalid_flowsheet(exc)
+
+    try:
+        report = solve_executor.run(execute_sizing, payload, cost=sizing_cost(payload))
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    except SolverBusy as exc:
+        return _solver_busy(exc)
+    except SolveTimeout as exc:
+        return jsonify(error=str(exc)), 504
+    except Exception:
+        app.logger.exception("Sizing failed")
+        return jsonify(error="Internal server error"), 500
+
+    return _json_response(report)
+
+
+@app.route("/api/run/timeseries", methods=["POST", "OPTIONS"])
+def run_timeseries():                     # noqa: D401
+    if request.method == "OPTIONS":
+        return "", 204
+
+    try:
+        payload = _parse_body()
+    except Exception:
+        return jsonify(error="Malformed JSON body"), 400
+
+    if not isinstance(payload, dict):
+        return jsonify(error="Payload must be a JSON object"), 400
+
+    try:
+        check_payload(payload)
+    except FlowsheetError as exc:
+        return _invalid_flowsheet(exc)
+
+    try:
+        # "format": "ndjson" streams one block of steps per line
+        cost = timeseries_cost(payload)
+        if payload.get("format") == "ndjson":
+            return _ndjson_response(streaming.stream_timeseries(
+                payload, lambda func, payload: solve_executor.run(func, payload, cost=cost)))
+        report = solve_executor.run(execute_timeseries, payload, cost=cost)
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    except SolverBusy as exc:
+        return _solver_busy(exc)
+    except SolveTimeout as exc:
+        return jsonify(error=str(exc)), 504
+    except Exception:
+        app.logger.exception("Time series failed")
+        return jsonify(error="Internal server error"), 500
+
+    return _json_response(report)
+
+
+# ──────────────────────────────────────────────────────────
+# Background jobs: submit, poll / stream, fetch the result
+# ──────────────────────────────────────────────────────────
+@app.route("/api/jobs", methods=["POST", "OPTIONS"])
+def submit_job():                         # noqa: D401
+    if request.method == "OPTIONS":
+        return "", 204
+
+    try:
+        payload = _parse_body()
+    except Exception:
+        return jsonify(error="Malformed JSON body"), 400
+
+    if not isinstance(payload, dict):
+        return jsonify(error="Payload must be a JSON object"), 400
+
+    try:
+        job = solve_jobs.submit(payload)
+    except FlowsheetError as exc:
+        return _invalid_flowsheet(exc)
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    except SolverBusy as exc:
+        return _solver_busy(exc)
+
+    return _json_response(job.status_dict(), 202)
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET", "DELETE", "OPTIONS"])
+def job_status(job_id):                   # noqa: D401
+    if request.method == "OPTIONS":
+        return "", 204
+
+    job = solve_jobs.cancel(job_id) if request.method == "DELETE" else solve_jobs.get(job_id)
+    if job is None:
+        return jsonify(error="Unknown or expired job"), 404
+    return _json_response(job.status_dict())
+
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET", "OPTIONS"])
+def job_result(job_id):                   # noqa: D401
+    if request.method == "OPTIONS":
+        return "", 204
+
+    job = solve_jobs.get(job_id)
+    if job is None:
+        return jsonify(error="Unknown or expired job"), 404
+    if job.status not in FINISHED:
+        return _json_response(job.status_dict(), 202)
+    if job.status != SUCCEEDED:
+        return _json_response({**job.status_dict(), **job.result()}, 409)
+    return _json_response(job.result())
+
+
+@app.route("/api/jobs/<job_id>/events", methods=["GET", "OPTIONS"])
+def job_events(job_id):                   # noqa: D401
+    if request.method == "OPTIONS":
+        return "", 204
+
+    job = solve_jobs.get(job_id)
+    if job is None:
+        return jsonify(error="Unknown or expired job"), 404
+
+    # EventSource reconnects with the last id it saw
+    last_id = request.headers.get("Last-Event-ID", request.args.get("after", "-1"))
+    try:
+        after = int(last_id)
+    except ValueError:
+        after = -1
+
+    response = Response(stream_with_context(sse_stream(job, after)), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+# ──────────────────────────────────────────────────────────
+# Incremental sessions: solve once, then send only the edits
+# ──────────────────────────────────────────────────────────
+@app.route("/api/session", methods=["POST", "OPTIONS"])
+def create_session():                     # noqa: D401
+    if request.method == "OPTIONS":
+        return "", 204
+
+    try:
+        flowsheet = _parse_body()
+    except Exception:
+        return jsonify(error="Malformed JSON body"), 400
+
+    try:
+        check_flowsheet(flowsheet)
+    except FlowsheetError as exc:
+        return _invalid_flowsheet(exc)
+
+    with stage("parse"):
+        flowsheet = codec.solver_view(flowsheet)
+
+    try:
+        session_id, report = solve_sessions.create(flowsheet)
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    except Exception:
+        app.logger.exception("Session solve failed")
+        return jsonify(error="Internal server error"), 500
+
+    return _json_response({"session": session_id, **report})
+
+
+@app.route("/api/session/<session_id>/delta", methods=["POST", "OPTIONS"])
+def update_session(session_id):           # noqa: D401
+    if request.method == "OPTIONS":
+        return "", 204
+
+    session = solve_sessions.get(session_id)
+    if session is None:
+        return jsonify(error="Unknown or expired session"), 404
+
+    try:
+        delta = _parse_body()
+    except Exception:
+        return jsonify(error="Malformed JSON body"), 400
+
+    if not isinstance(delta, dict):
+        return jsonify(error="Delta must be a JSON object"), 400
+
+    try:
+        with session.lock:
+            report = session.apply_delta(delta)
+    except FlowsheetError as exc:
+        return _invalid_flowsheet(exc)
+    except (ValueError, KeyError, TypeError) as exc:
+        return jsonify(error=f"Invalid delta: {exc}"), 400
+    except Exception:
+        app.logger.exception("Incremental solve failed")
+        return jsonify(error="Internal server error"), 500
+
+    return _json_response({"session": session_id, **report})
+
+
+@app.route("/api/session/<session_id>", methods=["DELETE", "OPTIONS"])
+def delete_session(session_id):           # noqa: D401
+    if request.method == "OPTIONS":
+        return "", 204
+    if not solve_sessions.delete(session_id):
+        return jsonify(error="Unknown or expired session"), 404
+    return "", 204
 
 
 # ──────────────────────────────────────────────────────────
@@ -82,6 +617,12 @@ def health():                             # noqa: D401
     return jsonify(status="ok"), 200
 
 
+@app.route("/api/metrics", methods=["GET"])
+def metrics_scrape():                     # noqa: D401
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+
 # ──────────────────────────────────────────────────────────
 # Run the development server
 # ──────────────────────────────────────────────────────────
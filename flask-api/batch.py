@@ -0,0 +1,285 @@
+"""
+batch.py
+-------------------
+Solves many flowsheet variants in one request.
+
+Two payload shapes are accepted:
+  • {"flowsheet": {...}, "scenarios": [{element_id: {param: value}}, ...]}
+    one topology plus per-scenario parameter overrides; the structure is
+    parsed and ordered once, single-pipe variants are solved column-wise
+    with ``PipeBatch`` and network variants warm-start from each other.
+  • {"flowsheets": [{...}, {...}]}
+    independent flowsheets, each solved with ``execute_flowsheet_extended``.
+
+Every scenario comes back in the same shape as ``execute_flowsheet_extended``.
+"""
+
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from components.PipeBatch import PipeBatch
+from fluids import properties, state_of
+from helpers import (
+    CalculationMode,
+    execute_flowsheet_extended,
+    is_single_pipe,
+    solve_flow_rate_batch,
+    to_float,
+    validate_order,
+)
+from graph import FlowsheetGraph
+from network import Network, solve_network
+from timing import timed
+
+MAX_SCENARIOS = 10_000
+
+_PIPE_KEYS = ("diameter", "length", "roughness", "massFlowRate", "density", "viscosity")
+_OPTIONAL_KEYS = ("massFlowRate", "density", "viscosity")      # missing → NaN, not 0
+
+
+def execute_batch(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Entry point for ``/api/run/batch``; malformed payloads raise ``ValueError``."""
+    if "flowsheets" in payload:
+        flowsheets = payload["flowsheets"]
+        if not isinstance(flowsheets, list):
+            raise ValueError("'flowsheets' must be a list")
+        _check_count(len(flowsheets))
+        return {"scenarios": [_execute_one(fs) for fs in flowsheets]}
+
+    flowsheet, scenarios = payload.get("flowsheet"), payload.get("scenarios")
+    if not isinstance(flowsheet, dict) or "nodes" not in flowsheet or "edges" not in flowsheet:
+        raise ValueError("Batch payload needs 'flowsheets', or a 'flowsheet' with 'nodes' and 'edges'")
+    if not isinstance(scenarios, list):
+        raise ValueError("'scenarios' must be a list of parameter overrides")
+    _check_count(len(scenarios))
+
+    graph = FlowsheetGraph.from_flowsheet(flowsheet)
+    _check_overrides(scenarios, graph)
+
+    if is_single_pipe(graph):
+        validate_order(graph)
+        return {"scenarios": _solve_single_pipe(graph, scenarios)}
+    return {"scenarios": _solve_networks(graph, scenarios)}
+
+
+def split_batch(payload: Dict[str, Any], chunk_size: int) -> List[Dict[str, Any]]:
+    """
+    Checks the shape of a batch payload (as ``execute_batch`` does) and
+    cuts it into payloads of at most ``chunk_size`` scenarios, each of
+    which ``execute_batch`` accepts on its own.
+    """
+    if "flowsheets" in payload:
+        items, key, base = payload["flowsheets"], "flowsheets", {}
+        if not isinstance(items, list):
+            raise ValueError("'flowsheets' must be a list")
+    else:
+        flowsheet, items, key = payload.get("flowsheet"), payload.get("scenarios"), "scenarios"
+        if not isinstance(flowsheet, dict) or "nodes" not in flowsheet or "edges" not in flowsheet:
+            raise ValueError("Batch payload needs 'flowsheets', or a 'flowsheet' with 'nodes' and 'edges'")
+        if not isinstance(items, list):
+            raise ValueError("'scenarios' must be a list of parameter overrides")
+        base = {"flowsheet": flowsheet}
+    _check_count(len(items))
+    return [{**base, key: items[i:i + chunk_size]} for i in range(0, len(items), chunk_size)]
+
+
+def _check_count(n: int) -> None:
+    if n > MAX_SCENARIOS:
+        raise ValueError(f"At most {MAX_SCENARIOS} scenarios per batch, got {n}")
+
+
+def _execute_one(flowsheet: Any) -> Dict[str, Any]:
+    if not isinstance(flowsheet, dict) or "nodes" not in flowsheet or "edges" not in flowsheet:
+        return _error_report("Flowsheet must contain 'nodes' and 'edges'", [])
+    try:
+        return execute_flowsheet_extended(flowsheet)
+    except ValueError as exc:
+        return _error_report(str(exc), [])
+
+
+def _error_report(message: str, order: List[str]) -> Dict[str, Any]:
+    return {"error": message, "order": order, "results": {}, "calculation_mode": "error"}
+
+
+# ──────────────────────────────────────────────────────────
+# Parameter overrides
+# ──────────────────────────────────────────────────────────
+def _check_overrides(scenarios: List[Any], graph: FlowsheetGraph) -> None:
+    for i, overrides in enumerate(scenarios):
+        if not isinstance(overrides, dict):
+            raise ValueError(f"Scenario {i} must map element ids to parameter objects")
+        for element_id, params in overrides.items():
+            if (element_id not in graph.node_index and element_id not in graph.edge_index
+                    and element_id not in graph.unconnected):
+                raise ValueError(f"Scenario {i} overrides unknown element '{element_id}'")
+            if not isinstance(params, dict):
+                raise ValueError(f"Scenario {i}: overrides for '{element_id}' must be an object")
+
+
+# ──────────────────────────────────────────────────────────
+# Feed → pipe → product: one column per parameter
+# ──────────────────────────────────────────────────────────
+@timed("solve")
+def _solve_single_pipe(graph: FlowsheetGraph,
+                       scenarios: List[Dict[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    order = graph.order
+    feed_id, product_id, pipe_id = order[0], order[1], graph.edge_ids[0]
+    feed_base, product_base = graph.node_params[0], graph.node_params[1]
+    pipe_base = graph.edge_data[0]
+    n = len(scenarios)
+
+    def column(base, element_id, key, default=None):
+        values = [to_float(s.get(element_id, {}).get(key, base.get(key, default))) for s in scenarios]
+        return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+    inlet = column(feed_base, feed_id, "pressure") * 1000
+    outlet = column(product_base, product_id, "pressure") * 1000
+    cols = {key: column(pipe_base, pipe_id, key, None if key in _OPTIONAL_KEYS else 0)
+            for key in _PIPE_KEYS}
+    fluid_types = [s.get(feed_id, {}).get("fluidType", feed_base.get("fluidType", "unknown"))
+                   for s in scenarios]
+    fluid_errors = _fill_fluid_columns(cols, scenarios, (feed_id, feed_base), (pipe_id, pipe_base))
+
+    has_in, has_out, has_flow = ~np.isnan(inlet), ~np.isnan(outlet), ~np.isnan(cols["massFlowRate"])
+    mode = np.full(n, 0)
+    mode[has_in & has_flow & ~has_out] = CalculationMode.OUTLET_PRESSURE.value
+    mode[has_out & has_flow & ~has_in] = CalculationMode.INLET_PRESSURE.value
+    mode[has_in & has_out & ~has_flow] = CalculationMode.FLOW_RATE.value
+
+    geometry_ok = np.ones(n, dtype=bool)
+    for key in ("diameter", "length", "density", "viscosity"):
+        geometry_ok &= cols[key] > 0
+    geometry_ok &= cols["roughness"] >= 0
+
+    reports: List[Optional[Dict[str, Any]]] = [None] * n
+    for i in np.flatnonzero(mode == 0):
+        reports[i] = _error_report(
+            "Invalid parameter combination. Must provide exactly two of inlet pressure, "
+            "outlet pressure and flow rate", order)
+    for i in np.flatnonzero((mode != 0) & ~geometry_ok):
+        reports[i] = _error_report(fluid_errors.get(i, f"Pipe {pipe_id} has invalid geometry or fluid properties"),
+                                   order)
+
+    ok = (mode != 0) & geometry_ok
+    flow = cols["massFlowRate"].copy()
+    solver: Dict[str, np.ndarray] = {}
+
+    rate = ok & (mode == CalculationMode.FLOW_RATE.value)
+    if rate.any():
+        idx = np.flatnonzero(rate)
+        pipes = _pipe_batch(cols, idx, 0.0)
+        solved = solve_flow_rate_batch(pipes, inlet[idx], outlet[idx])
+        flow[idx] = solved["mass_flowrate"]
+        solver = {**solved, "index": idx}
+        failed = idx[np.isnan(solved["mass_flowrate"])]
+        for i in failed:
+            reports[i] = _error_report(
+                "Inlet pressure must exceed outlet pressure to calculate flow rate", order)
+        ok[failed] = False
+
+    idx = np.flatnonzero(ok)
+    records = _pipe_batch(cols, idx, flow[idx]).to_records()
+    solver_pos = {int(i): k for k, i in enumerate(solver.get("index", []))}
+
+    for record, i in zip(records, idx):
+        dp = record["pressure_drop_Pa"]
+        if mode[i] == CalculationMode.OUTLET_PRESSURE.value:
+            p_in, p_out, label = inlet[i], inlet[i] - dp, "outlet_pressure"
+        elif mode[i] == CalculationMode.INLET_PRESSURE.value:
+            p_in, p_out, label = outlet[i] + dp, outlet[i], "inlet_pressure"
+        else:
+            p_in, p_out, label = inlet[i], outlet[i], "flow_rate"
+
+        pipe_result = {**record, "inlet_pressure_Pa": float(p_in),
+                       "outlet_pressure_Pa": float(p_out), "calculation_mode": label}
+        if i in solver_pos:
+            k = solver_pos[i]
+            pipe_result.update({
+                "solver_method": "illinois",
+                "solver_iterations": int(solver["iterations"][k]),
+                "solver_converged": bool(solver["converged"][k]),
+                "solver_residual_Pa": float(solver["residual_Pa"][k]),
+            })
+
+        reports[i] = {
+            "order": order,
+            "results": {
+                feed_id: {"node_type": "feed", "pressure": float(p_in), "fluid_type": fluid_types[i]},
+                pipe_id: {"node_type": "pipe", **pipe_result},
+                product_id: {
+                    "node_type": "product",
+                    "inlet_pressure_Pa": float(p_in),
+                    "outlet_pressure_Pa": float(p_out),
+                    "pressure_drop_Pa": dp,
+                },
+            },
+            "calculation_mode": CalculationMode(mode[i]).name,
+        }
+    return reports
+
+
+def _fill_fluid_columns(cols: Dict[str, np.ndarray],
+                        scenarios: List[Dict[str, Dict[str, Any]]],
+                        feed: Tuple[str, Dict[str, Any]],
+                        pipe: Tuple[str, Dict[str, Any]]) -> Dict[int, str]:
+    """
+    Fills missing density / viscosity from each scenario's fluid state
+    (see fluids.py); states repeat across scenarios and are memoised.
+    Returns the error message of every scenario whose state is invalid.
+    """
+    errors: Dict[int, str] = {}
+    (feed_id, feed_base), (pipe_id, pipe_base) = feed, pipe
+    for i in np.flatnonzero(np.isnan(cols["density"]) | np.isnan(cols["viscosity"])).tolist():
+        feed_params = {**feed_base, **scenarios[i].get(feed_id, {})}
+        pipe_params = {**pipe_base, **scenarios[i].get(pipe_id, {})}
+        try:
+            state = state_of(pipe_params, state_of(feed_params))
+            if state is None:
+                continue
+            props = properties(*state)
+        except ValueError as exc:
+            errors[i] = str(exc)
+            continue
+        if np.isnan(cols["density"][i]):
+            cols["density"][i] = props.density
+        if np.isnan(cols["viscosity"][i]):
+            cols["viscosity"][i] = props.viscosity_cp
+    return errors
+
+
+def _pipe_batch(cols: Dict[str, np.ndarray], idx: np.ndarray, flow) -> PipeBatch:
+    return PipeBatch(
+        inner_diameter=cols["diameter"][idx],
+        length=cols["length"][idx],
+        roughness=cols["roughness"][idx],
+        mass_flowrate=flow,
+        density=cols["density"][idx],
+        viscosity_cp=cols["viscosity"][idx],
+    )
+
+
+# ──────────────────────────────────────────────────────────
+# General networks: shared order, warm-started Newton
+# ──────────────────────────────────────────────────────────
+@timed("solve")
+def _solve_networks(graph: FlowsheetGraph,
+                    scenarios: List[Dict[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    order = graph.order
+    reports = []
+    x0 = None
+    for overrides in scenarios:
+        try:
+            network = Network(graph.with_overrides(overrides))
+        except ValueError as exc:
+            reports.append(_error_report(str(exc), order))
+            continue
+        report, solution = solve_network(network, x0=x0)
+        if solution is None and x0 is not None:
+            # a poor warm start can fail where the default guess succeeds
+            report, solution = solve_network(network)
+        if solution is not None:
+            x0 = solution.state
+        reports.append(report)
+    return reports
@@ -0,0 +1,101 @@
+"""
+benchmarks/flowsheets.py
+-------------------
+Deterministic flowsheet generators for the benchmarks, in the same JSON
+shape the front-end posts to ``/api/run``.
+"""
+
+from typing import Any, Dict, List, Optional
+
+# Water at ~20 °C in a commercial-steel pipe
+WATER = {"density": 998, "viscosity": 1.0}
+ROUGHNESS_MM = 0.045
+
+
+def node(node_id: str, node_type: str, **params: Any) -> Dict[str, Any]:
+    """A canvas node of ``node_type`` with ``params``."""
+    return {
+        "id": node_id,
+        "type": "custom",
+        "position": {"x": 0, "y": 0},
+        "data": {"nodeType": node_type, "label": node_id, "params": params},
+    }
+
+
+def pipe(edge_id: str, source: str, target: str, diameter: float,
+         length: float = 100.0, flow: Optional[float] = None) -> Dict[str, Any]:
+    """A water-filled commercial-steel pipe; ``flow`` (kg/h) None leaves it unspecified."""
+    return {
+        "id": edge_id,
+        "source": source,
+        "target": target,
+        "data": {"diameter": diameter, "length": length, "roughness": ROUGHNESS_MM,
+                 "massFlowRate": flow, **WATER},
+    }
+
+
+def single_pipe(mode: str = "outlet_pressure", flow: float = 20000.0,
+                inlet_kpa: float = 400.0, outlet_kpa: float = 100.0) -> Dict[str, Any]:
+    """Feed → pipe → product in one of the three classic calculation modes."""
+    inlet = inlet_kpa if mode in ("outlet_pressure", "flow_rate") else None
+    outlet = outlet_kpa if mode in ("inlet_pressure", "flow_rate") else None
+    rate = flow if mode != "flow_rate" else None
+    return {
+        "nodes": [node("feed", "feed", pressure=inlet, fluidType="water"),
+                  node("product", "product", pressure=outlet)],
+        "edges": [pipe("pipe", "feed", "product", 0.1, flow=rate)],
+    }
+
+
+def tree_network(n_products: int, fan_out: int = 4,
+                 inlet_kpa: float = 600.0, outlet_kpa: float = 100.0) -> Dict[str, Any]:
+    """
+    One pressurised feed distributing through a tree of splitters to
+    ``n_products`` products held at ``outlet_kpa``.  Pipes shrink with
+    depth, so flows span laminar to turbulent.
+    """
+    nodes: List[Dict[str, Any]] = [node("feed", "feed", pressure=inlet_kpa, fluidType="water")]
+    edges: List[Dict[str, Any]] = []
+    level = ["feed"]
+    depth = 0
+    while len(level) * fan_out < n_products:
+        depth += 1
+        nxt = []
+        for parent in level:
+            for k in range(fan_out):
+                sid = f"s{depth}_{len(nxt)}"
+                nodes.append(node(sid, "splitter"))
+                edges.append(pipe(f"e_{sid}", parent, sid, 0.3 / depth))
+                nxt.append(sid)
+        level = nxt
+
+    for i in range(n_products):
+        pid = f"p{i}"
+        nodes.append(node(pid, "product", pressure=outlet_kpa))
+        edges.append(pipe(f"e_{pid}", level[i % len(level)], pid, 0.02 + 0.03 * (i % 3)))
+
+    # every splitter has children: the last level is never wider than n_products
+    return {"nodes": nodes, "edges": edges}
+
+
+def parallel_branches(n_branches: int,
+                      inlet_kpa: float = 500.0, outlet_kpa: float = 100.0) -> Dict[str, Any]:
+    """
+    A feed header splitting into ``n_branches`` parallel branches of
+    different diameter and length that merge again before one product.
+    Each branch has a splitter half-way.  Branch flows span laminar to
+    turbulent, so some branches need a pressure drop inside a
+    friction-factor regime jump.
+    """
+    nodes = [node("feed", "feed", pressure=inlet_kpa, fluidType="water"),
+             node("header", "splitter"), node("merge", "splitter"),
+             node("product", "product", pressure=outlet_kpa)]
+    edges = [pipe("e_in", "feed", "header", 0.5), pipe("e_out", "merge", "product", 0.5)]
+    for b in range(n_branches):
+        diameter = 0.01 * 1.5 ** (b % 7)                 # 10 … 114 mm
+        length = 20.0 + 1980.0 * ((b * 37) % 101) / 100  # 20 … 2000 m
+        mid = f"b{b}"
+        nodes.append(node(mid, "splitter"))
+        edges += [pipe(f"e_{mid}a", "header", mid, diameter, length / 2),
+                  pipe(f"e_{mid}b", mid, "merge", diameter, length / 2)]
+    return {"nodes": nodes, "edges": edges}
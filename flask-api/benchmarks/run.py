@@ -0,0 +1,293 @@
+"""
+benchmarks/run.py
+-------------------
+Benchmark suite for the hydraulic solver, from kernels to the HTTP API.
+
+    python -m benchmarks.run                      # full run, compare to baseline
+    python -m benchmarks.run --quick              # fewer repeats / sizes
+    python -m benchmarks.run --only micro         # micro | flowsheet | api
+    python -m benchmarks.run --url http://127.0.0.1:8000   # load-test a live server
+    python -m benchmarks.run --update-baseline    # store this run as the baseline
+
+Run from ``flask-api/``.  Results are written as JSON (``--output``) and
+every benchmark is compared with ``benchmarks/baseline.json``: a median
+slower than baseline by more than ``--tolerance`` is a regression and
+the process exits with status 1.  Baselines are machine-specific –
+refresh it on the machine that runs the comparison.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.flowsheets import parallel_branches, single_pipe, tree_network
+from components.Pipe import Pipe
+from helpers import execute_flowsheet_extended, solve_flow_rate
+from timeseries import execute_timeseries
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+# ──────────────────────────────────────────────────────────
+# Timing primitives
+# ──────────────────────────────────────────────────────────
+def time_call(func: Callable[[], Any], repeat: int, min_time: float = 0.05) -> Dict[str, float]:
+    """
+    timeit-style: ``func`` is looped enough times for one sample to take
+    ``min_time`` seconds, ``repeat`` samples are taken and the per-call
+    times summarised.
+    """
+    func()                                          # warm-up (imports, caches)
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - t0 >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - t0) / loops)
+    return _summary(samples, loops=loops)
+
+
+def _summary(samples: List[float], **extra: Any) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "median_s": statistics.median(ordered),
+        "min_s": ordered[0],
+        "p95_s": _percentile(ordered, 95),
+        "samples": len(ordered),
+        **extra,
+    }
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return float(np.percentile(ordered, q)) if ordered else float("nan")
+
+
+# ──────────────────────────────────────────────────────────
+# Micro: pipe kernel and flow-rate root finding
+# ──────────────────────────────────────────────────────────
+# Mass flows (kg/h) that put a 0.1 m water pipe in each regime
+REGIME_FLOWS = {"laminar": 400.0, "transitional": 800.0, "turbulent": 20000.0}
+
+
+def bench_micro(repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for method in ("auto", "table"):
+        for regime, flow in REGIME_FLOWS.items():
+            pipe = Pipe("p", 0.1, 100, 0.045, flow, 998, 1.0, friction_method=method)
+            assert pipe.solve()["flow_regime"] == regime, regime
+            results[f"micro.pipe_solve.{regime}.{method}"] = time_call(pipe.solve, repeat)
+
+    for label, (p_in, p_out) in {"low_dp": (100_100.0, 100_000.0),
+                                  "high_dp": (900_000.0, 100_000.0)}.items():
+        pipe = Pipe("p", 0.1, 100, 0.045, None, 998, 1.0)
+        iterations = solve_flow_rate(pipe, p_in, p_out, warm_start=False)["solver_iterations"]
+        stats = time_call(lambda: solve_flow_rate(pipe, p_in, p_out, warm_start=False), repeat)
+        results[f"micro.solve_flow_rate.{label}"] = {**stats, "iterations": iterations}
+
+        # Warm start: the same pipe re-solved with the outlet nudged each call
+        nudges = iter(np.tile(np.linspace(0.0, 0.02, 64), 1 << 16).tolist())
+        solve_flow_rate(pipe, p_in, p_out)
+        stats = time_call(
+            lambda: solve_flow_rate(pipe, p_in, p_out + (p_in - p_out) * next(nudges)), repeat)
+        results[f"micro.solve_flow_rate.{label}.warm"] = stats
+    return results
+
+
+# ──────────────────────────────────────────────────────────
+# Middle: whole flowsheets of increasing size
+# ──────────────────────────────────────────────────────────
+def bench_flowsheets(repeat: int, sizes: List[int]) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for mode in ("outlet_pressure", "inlet_pressure", "flow_rate"):
+        flowsheet = single_pipe(mode)
+        results[f"flowsheet.single_pipe.{mode}"] = time_call(
+            lambda: execute_flowsheet_extended(flowsheet), repeat)
+
+    for name, generator in (("tree", tree_network), ("parallel", parallel_branches)):
+        for n in sizes:
+            flowsheet = generator(n)
+            report = execute_flowsheet_extended(flowsheet)
+            if "error" in report:
+                raise RuntimeError(f"{generator.__name__}({n}) failed: {report['error']}")
+            stats = time_call(lambda: execute_flowsheet_extended(flowsheet), repeat, min_time=0.2)
+            results[f"flowsheet.{name}.{n}"] = {**stats, "pipes": len(flowsheet["edges"]),
+                                                "iterations": report["solver"]["iterations"]}
+
+    # One day at 1-minute steps, feed pressure following a daily cycle
+    steps = np.arange(1440)
+    payload = {"flowsheet": tree_network(16), "profiles": {"feed": {
+        "pressure": (600.0 * (1 + 0.1 * np.sin(2 * np.pi * steps / steps.size))).tolist()}}}
+    stats = time_call(lambda: execute_timeseries(payload), repeat, min_time=0.2)
+    results["flowsheet.timeseries.tree.16.1440"] = {**stats, "steps": int(steps.size)}
+    return results
+
+
+# ──────────────────────────────────────────────────────────
+# Top: /api/run load test
+# ──────────────────────────────────────────────────────────
+def _payloads(n: int, distinct: bool) -> List[bytes]:
+    """Request bodies; ``distinct`` varies the pressure so the result cache misses."""
+    bodies = []
+    for i in range(n):
+        flowsheet = single_pipe("flow_rate", inlet_kpa=400.0 + (i if distinct else 0) * 1e-3)
+        bodies.append(json.dumps(flowsheet).encode())
+    return bodies
+
+
+def _load_summary(latencies: List[float], wall: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "median_s": statistics.median(ordered),
+        "p95_s": _percentile(ordered, 95),
+        "p99_s": _percentile(ordered, 99),
+        "throughput_rps": len(ordered) / wall,
+        "samples": len(ordered),
+    }
+
+
+def bench_api(requests_per_case: int, url: str = "", concurrency: int = 8) -> Dict[str, Dict[str, float]]:
+    results = {}
+    if url:
+        post = _http_poster(url.rstrip("/") + "/api/run")
+        prefix = "api.http"
+    else:
+        from app import app
+        client = app.test_client()
+
+        def post(body: bytes) -> None:
+            response = client.post("/api/run", data=body, content_type="application/json")
+            if response.status_code != 200:
+                raise RuntimeError(f"/api/run returned {response.status_code}")
+
+        prefix, concurrency = "api.test_client", 1
+
+    for case, distinct in (("cold", True), ("cached", False)):
+        bodies = _payloads(requests_per_case, distinct)
+        post(bodies[0])                             # warm-up
+
+        def timed_post(body: bytes) -> float:
+            t0 = time.perf_counter()
+            post(body)
+            return time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        if concurrency > 1:
+            with ThreadPoolExecutor(concurrency) as pool:
+                latencies = list(pool.map(timed_post, bodies))
+        else:
+            latencies = [timed_post(body) for body in bodies]
+        results[f"{prefix}.run.{case}"] = _load_summary(latencies, time.perf_counter() - t0)
+    return results
+
+
+def _http_poster(endpoint: str) -> Callable[[bytes], None]:
+    def post(body: bytes) -> None:
+        request = urllib.request.Request(endpoint, data=body,
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+    return post
+
+
+# ──────────────────────────────────────────────────────────
+# Baseline comparison
+# ──────────────────────────────────────────────────────────
+def compare(results: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[str]:
+    """Names of benchmarks whose median regressed beyond ``tolerance``."""
+    regressions = []
+    for name, stats in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            print(f"  {name:45s} {stats['median_s'] * 1e6:12.2f} µs   (no baseline)")
+            continue
+        ratio = stats["median_s"] / base["median_s"]
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"  {name:45s} {stats['median_s'] * 1e6:12.2f} µs   x{ratio:5.2f} {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="fewer repeats and sizes")
+    parser.add_argument("--only", choices=("micro", "flowsheet", "api"), action="append",
+                        help="run only these layers (repeatable)")
+    parser.add_argument("--url", default="", help="load-test a running server instead of the test client")
+    parser.add_argument("--concurrency", type=int, default=8, help="parallel clients with --url")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed median slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    layers = set(args.only or ("micro", "flowsheet", "api"))
+    repeat = 5 if args.quick else 15
+    sizes = [16, 256] if args.quick else [16, 64, 256, 1024]
+    requests_per_case = 200 if args.quick else 2000
+
+    results: Dict[str, Dict[str, float]] = {}
+    if "micro" in layers:
+        results.update(bench_micro(repeat))
+    if "flowsheet" in layers:
+        results.update(bench_flowsheets(repeat, sizes))
+    if "api" in layers:
+        results.update(bench_api(requests_per_case, args.url, args.concurrency))
+
+    document = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as fh:
+        json.dump(document, fh, indent=2, sort_keys=True)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as fh:
+            json.dump(document, fh, indent=2, sort_keys=True)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --update-baseline first")
+        return 0
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
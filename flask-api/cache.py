@@ -0,0 +1,202 @@
+"""
+cache.py
+-------------------
+Content-addressed cache for solved flowsheets.
+
+The key is a SHA-256 of the solver-relevant part of the payload only –
+node ids, types and params, edge ids, endpoints and pipe data – so moving
+a node on the canvas or renaming it does not miss the cache.
+
+Two tiers:
+  • an in-process LRU with a TTL and an entry cap;
+  • an optional SQLite file shared by every gunicorn worker on the host
+    (set ``SOLVER_CACHE_DB``).  It is evicted oldest-first by insert time.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from metrics import observe_cache
+from timing import count
+
+# UI-only edge fields that never influence a solve (node data is reduced
+# to nodeType + params, so labels and positions drop out there anyway)
+EDGE_DATA_IGNORED = {"label", "color"}
+
+
+def flowsheet_key(flowsheet: Dict[str, Any]) -> str:
+    """Canonical hash of the fields the solver reads."""
+    nodes = [
+        (
+            n.get("id"),
+            (n.get("data") or {}).get("nodeType"),
+            (n.get("data") or {}).get("params") or {},
+        )
+        for n in flowsheet.get("nodes", [])
+    ]
+    edges = [
+        (
+            e.get("id"),
+            e.get("source"),
+            e.get("target"),
+            {k: v for k, v in (e.get("data") or {}).items() if k not in EDGE_DATA_IGNORED},
+        )
+        for e in flowsheet.get("edges", [])
+    ]
+    nodes.sort(key=lambda item: str(item[0]))
+    edges.sort(key=lambda item: str(item[0]))
+    canonical = json.dumps([nodes, edges], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU + TTL cache of flowsheet reports.  Cached reports are shared
+    between callers and must be treated as read-only.
+    """
+
+    def __init__(self,
+                 max_entries: int = 1024,
+                 ttl: float = 3600.0,
+                 db_path: Optional[str] = None) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, report TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """Configured by SOLVER_CACHE_SIZE, SOLVER_CACHE_TTL and SOLVER_CACHE_DB."""
+        return cls(
+            max_entries=int(os.getenv("SOLVER_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("SOLVER_CACHE_TTL", "3600")),
+            db_path=os.getenv("SOLVER_CACHE_DB") or None,
+        )
+
+    # ──────────────────────────────
+    # ─── Public API ───────────────
+    # ──────────────────────────────
+    def get_or_compute(self,
+                       flowsheet: Dict[str, Any],
+                       compute: Callable[[Dict[str, Any]], Dict[str, Any]],
+                       variant: str = "") -> Dict[str, Any]:
+        """
+        Returns the cached report for ``flowsheet`` or computes and stores it.
+        ``variant`` keeps differently shaped reports of one flowsheet apart.
+        """
+        if self.max_entries <= 0:
+            return compute(flowsheet)
+
+        key = flowsheet_key(flowsheet) + (f":{variant}" if variant else "")
+        report = self.get(key)
+        observe_cache(report is not None)
+        if report is None:
+            report = compute(flowsheet)
+            if "error" not in report:           # failures may be transient; solve them again
+                self.put(key, report)
+        else:
+            count("cache_hits")
+        return report
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+
+        report = self._db_get(key)
+        with self._lock:
+            if report is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, report, now)
+        return report
+
+    def put(self, key: str, report: Dict[str, Any]) -> None:
+        with self._lock:
+            self._store(key, report, time.monotonic())
+        self._db_put(key, report)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "shared": self._db is not None,
+            }
+
+    # ──────────────────────────────
+    # ─── Tiers ────────────────────
+    # ──────────────────────────────
+    def _store(self, key: str, report: Dict[str, Any], now: float) -> None:
+        """Caller holds the lock."""
+        self._entries[key] = (now, report)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _db_get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT report FROM results WHERE key = ? AND created >= ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _db_put(self, key: str, report: Dict[str, Any]) -> None:
+        if self._db is None:
+            return
+        payload = json.dumps(report, separators=(",", ":"))
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, report, created) VALUES (?, ?, ?)",
+                    (key, payload, time.time()),
+                )
+                self._db.execute(
+                    "DELETE FROM results WHERE key IN ("
+                    "SELECT key FROM results ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self._db.commit()
+            except sqlite3.OperationalError:
+                # another worker holds the write lock; the in-memory tier still has it
+                self._db.rollback()
@@ -0,0 +1,136 @@
+"""
+codec.py
+-------------------
+Request / response encoding for large flowsheets.
+
+  • JSON is parsed and written with orjson when it is installed (several
+    times faster in both directions) and with the standard library
+    otherwise.  orjson writes NaN / inf as null.
+  • ``solver_view`` drops canvas-only fields (positions, styles, labels,
+    selection state) right after parsing, so the cache key, the process
+    pool and the graph compiler only ever see what the solver reads.
+  • ``compress`` encodes response bodies with brotli (when the ``brotli``
+    package is installed) or gzip, whichever the client prefers.
+"""
+
+from __future__ import annotations
+import gzip
+import json
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from cache import EDGE_DATA_IGNORED
+
+try:                                    # optional fast JSON backend
+    import orjson
+except ImportError:                     # pragma: no cover – stdlib fallback
+    orjson = None
+
+try:                                    # optional brotli encoder
+    import brotli
+except ImportError:                     # pragma: no cover – gzip only
+    brotli = None
+
+# Node ``data`` keys and edge keys the solver reads; everything else on
+# the canvas objects is presentation
+NODE_DATA_KEYS = ("nodeType", "params")
+EDGE_KEYS = ("id", "source", "target", "data")
+
+GZIP_LEVEL = 3                          # best size per CPU second for report JSON
+BROTLI_QUALITY = 4
+
+
+# ──────────────────────────────────────────────────────────
+# JSON
+# ──────────────────────────────────────────────────────────
+def loads(body: bytes) -> Any:
+    """Parses a request body; malformed JSON raises ``ValueError``."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON bytes; NumPy scalars and arrays are written as numbers / lists."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), default=_default).encode()
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+# ──────────────────────────────────────────────────────────
+# Solver view of a canvas payload
+# ──────────────────────────────────────────────────────────
+def solver_view(flowsheet: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    ``{"nodes", "edges"}`` reduced to the fields the solver reads, in the
+    same shape.  Malformed entries are passed through unchanged so the
+    solver reports them as before.
+    """
+    if not isinstance(flowsheet["nodes"], list) or not isinstance(flowsheet["edges"], list):
+        return flowsheet
+    return {
+        "nodes": [_slim_node(n) for n in flowsheet["nodes"]],
+        "edges": [_slim_edge(e) for e in flowsheet["edges"]],
+    }
+
+
+def _slim_node(node: Any) -> Any:
+    if not isinstance(node, dict):
+        return node
+    slim = {"id": node["id"]} if "id" in node else {}
+    data = node.get("data")
+    if isinstance(data, dict):
+        slim["data"] = {k: data[k] for k in NODE_DATA_KEYS if k in data}
+    elif "data" in node:
+        slim["data"] = data
+    return slim
+
+
+def _slim_edge(edge: Any) -> Any:
+    if not isinstance(edge, dict):
+        return edge
+    slim = {k: edge[k] for k in EDGE_KEYS if k in edge}
+    data = slim.get("data")
+    if isinstance(data, dict) and not EDGE_DATA_IGNORED.isdisjoint(data):
+        slim["data"] = {k: v for k, v in data.items() if k not in EDGE_DATA_IGNORED}
+    return slim
+
+
+# ──────────────────────────────────────────────────────────
+# Compression
+# ──────────────────────────────────────────────────────────
+def encodings() -> Tuple[str, ...]:
+    """Content-Encodings this server can produce, preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accepted: Iterable[Tuple[str, float]]) -> Optional[str]:
+    """
+    Best encoding for an ``Accept-Encoding`` header given as (value,
+    quality) pairs, e.g. werkzeug's ``request.accept_encodings``.  On
+    equal quality the server's preference (brotli) wins.
+    """
+    quality = {value.lower(): q for value, q in accepted}
+    wildcard = quality.get("*", 0)
+    best, best_q = None, 0.0
+    for encoding in encodings():
+        q = quality.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported content encoding '{encoding}'")
@@ -1,6 +1,9 @@
+import logging
 from typing import Any, Iterable
 from .base import Component
 
+logger = logging.getLogger("solver.components")
+
 class Feed(Component):
     """
     A component that acts as a pressurized data source for a pipeline system.
@@ -26,7 +29,7 @@ class Feed(Component):
         self.pressure = (pressure * 1000) if pressure is not None else None
 
     def process(self, data=None):
-        print(f"Feed '{self.id}' is providing data at {self.pressure} Pa.")
+        logger.debug("Feed '%s' is providing data at %s Pa.", self.id, self.pressure)
         return data
 
     def __repr__(self) -> str:
@@ -0,0 +1,244 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .Pipe import Pipe
+from .PipeBatch import PipeBatch, cross_sectional_area, flow_velocity
+
+# Equivalent lengths L/D of common fittings (Crane TP-410, fully turbulent)
+FITTING_LD = {
+    "elbow_90": 30.0,
+    "elbow_90_long_radius": 20.0,
+    "elbow_45": 16.0,
+    "bend_180": 50.0,
+    "tee_run": 20.0,
+    "tee_branch": 60.0,
+    "gate_valve": 8.0,
+    "ball_valve": 3.0,
+    "butterfly_valve": 45.0,
+    "globe_valve": 340.0,
+    "check_valve": 100.0,
+}
+
+# Loss coefficients of fittings that are not friction-like
+FITTING_K = {
+    "entrance": 0.5,            # sharp-edged, from a vessel
+    "exit": 1.0,                # into a vessel
+}
+
+# Diameter change between two pipe segments; K follows from the diameters
+REDUCERS = ("reducer", "expander")
+
+
+class Line:
+    """
+    A pipeline: straight segments and fittings in series, each segment with
+    its own diameter, length, roughness and elevation change.
+
+    The line is reduced once, at construction, to one element per distinct
+    (diameter, roughness) – its total straight length plus the equivalent
+    lengths of its fittings, and the sum of its fittings' K values – and
+    the total elevation change:
+
+      ΔP(ṁ) = Σ_g (f_g · L_g / D_g + K_g) · ρ v_g² / 2  +  ρ · g · Δz
+
+    so a solver evaluates one friction factor per distinct size instead of
+    walking every segment.  Friction acts against the flow; the static
+    head ρ·g·Δz does not depend on it.
+    """
+
+    g = Pipe.g                      # m s-2, gravitational constant
+
+    # ──────────────────────────────
+    # ─── Constructors & helpers ───
+    # ──────────────────────────────
+    def __init__(
+        self,
+        id: str,
+        diameters: np.ndarray,                  # m, one per element
+        lengths: np.ndarray,                    # m, straight + equivalent length
+        roughness: np.ndarray,                  # mm
+        k: np.ndarray,                          # summed loss coefficients
+        elevation_change: float,                # m, outlet above inlet
+        *,
+        pipe_length: float,                     # m, straight length only
+        reference: Tuple[float, float],         # (m, mm) of the first pipe segment
+        segments: int,
+    ) -> None:
+        if not diameters.size or not np.all(diameters > 0):
+            raise ValueError(f"Line {id} needs positive segment diameters")
+        if not np.all(lengths >= 0) or not np.all(roughness >= 0) or not np.all(k >= 0):
+            raise ValueError(f"Line {id} has a negative length, roughness or K")
+        if not math.isfinite(elevation_change):
+            raise ValueError(f"Line {id} has an invalid 'elevationChange'")
+        self.id = id
+        self.diameters = diameters
+        self.lengths = lengths
+        self.roughness = roughness
+        self.k = k
+        self.elevation_change = elevation_change
+        self.pipe_length = pipe_length
+        self.reference_diameter, self.reference_roughness = reference
+        self.segments = segments
+
+    @classmethod
+    def from_params(cls, id: str, params: Dict[str, Any]) -> "Line":
+        """
+        Canvas params: ``segments``, an ordered list from inlet to outlet of
+
+          • pipe segments  {"type": "pipe", "length", "diameter",
+                            "roughness", "elevationChange"}
+          • fittings       {"type": "fitting", "K" | "equivalentLength" |
+                            "LD" | "fitting": name, "count", "diameter"}
+
+        Lengths, diameters and elevations are in m, roughness in mm.  A
+        segment without ``diameter`` / ``roughness`` takes the edge's own.
+        A fitting sits on the diameter of the pipe segment before it (the
+        one after it if it comes first); a ``reducer`` / ``expander``
+        between two sizes gets the sudden contraction / expansion K on
+        the smaller one.
+        """
+        segments = params.get("segments")
+        if not isinstance(segments, list) or not segments:
+            raise ValueError(f"Line {id} needs a non-empty list of 'segments'")
+        default_d = _number(params.get("diameter"))
+        default_eps = _number(params.get("roughness"))
+
+        pipes: List[Tuple[float, float]] = []          # (D, roughness) per pipe segment so far
+        pipe_at: List[int] = []                         # entry → index of the last pipe segment before it
+        parsed: List[Dict[str, Any]] = []
+        for n, entry in enumerate(segments):
+            if not isinstance(entry, dict):
+                raise ValueError(f"Line {id} segment {n} must be an object")
+            kind = entry.get("type", "pipe")
+            if kind == "pipe":
+                D = _number(entry.get("diameter"), default_d)
+                eps = _number(entry.get("roughness"), default_eps)
+                L = _number(entry.get("length"))
+                dz = _number(entry.get("elevationChange"), 0.0)
+                if D is None or not D > 0 or L is None or not L >= 0 or eps is None or not eps >= 0:
+                    raise ValueError(f"Line {id} segment {n} needs a positive 'diameter', "
+                                     "a non-negative 'length' and 'roughness'")
+                if dz is None or not math.isfinite(dz):
+                    raise ValueError(f"Line {id} segment {n} has an invalid 'elevationChange'")
+                pipes.append((D, eps))
+                parsed.append({"kind": "pipe", "D": D, "eps": eps, "L": L, "dz": dz})
+            elif kind == "fitting":
+                parsed.append({"kind": "fitting", "entry": entry, "n": n})
+            else:
+                raise ValueError(f"Line {id} segment {n} has unknown type '{kind}'")
+            pipe_at.append(len(pipes) - 1)
+        if not pipes:
+            raise ValueError(f"Line {id} needs at least one pipe segment")
+
+        groups: Dict[Tuple[float, float], List[float]] = {}     # (D, roughness) → [L, K]
+        elevation = length = 0.0
+        for j, item in enumerate(parsed):
+            if item["kind"] == "pipe":
+                groups.setdefault((item["D"], item["eps"]), [0.0, 0.0])[0] += item["L"]
+                elevation += item["dz"]
+                length += item["L"]
+                continue
+            before = pipes[pipe_at[j]] if pipe_at[j] >= 0 else None
+            after = pipes[pipe_at[j] + 1] if pipe_at[j] + 1 < len(pipes) else None
+            size, L, K = _fitting(id, item["entry"], item["n"], before, after)
+            groups.setdefault(size, [0.0, 0.0])
+            groups[size][0] += L
+            groups[size][1] += K
+
+        keys = list(groups)
+        return cls(
+            id,
+            np.array([D for D, _ in keys]),
+            np.array([groups[key][0] for key in keys]),
+            np.array([eps for _, eps in keys]),
+            np.array([groups[key][1] for key in keys]),
+            elevation,
+            pipe_length=length,
+            reference=pipes[0],
+            segments=len(segments),
+        )
+
+    # ──────────────────────────────
+    # ─── Calculations ─────────────
+    # ──────────────────────────────
+    def static_pressure(self, density: float) -> float:
+        """ρ·g·Δz (Pa), positive when the outlet lies above the inlet."""
+        return density * self.g * self.elevation_change
+
+    def __repr__(self) -> str:
+        return (f"<Line id={self.id}, segments={self.segments}, elements={self.diameters.size}, "
+                f"length={self.pipe_length}, elevation_change={self.elevation_change}>")
+
+
+def element_pressure_drop(elements: PipeBatch, k: np.ndarray, mass_flowrate: np.ndarray,
+                          index: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Friction plus fitting ΔP (Pa), (f·L/D + K)·ρv²/2, of line elements
+    ``index`` (all by default) at mass flows ``mass_flowrate`` (kg h-1, ≥ 0).
+    ``elements`` holds one row per element, ``k`` its summed K values.
+    """
+    D, rho = elements.D, elements.rho
+    if index is not None:
+        k, D, rho = k[index], D[index], rho[index]
+    return elements.pressure_drop(mass_flowrate, index) + minor_loss(k, mass_flowrate, rho, D)
+
+
+def minor_loss(k: np.ndarray, mass_flowrate: np.ndarray, density: np.ndarray,
+               D: np.ndarray) -> np.ndarray:
+    """K·ρv²/2 (Pa), with the velocity of ``PipeBatch`` at the same mass flow."""
+    velocity = flow_velocity(np.asarray(mass_flowrate, dtype=float) / 1000, cross_sectional_area(D))
+    return k * density * velocity ** 2 / 2
+
+
+def _fitting(id: str, entry: Dict[str, Any], n: int,
+             before: Optional[Tuple[float, float]], after: Optional[Tuple[float, float]]
+             ) -> Tuple[Tuple[float, float], float, float]:
+    """(diameter, roughness) the fitting sits on, its equivalent length (m) and K."""
+    count = _number(entry.get("count"), 1.0)
+    if count is None or not count >= 0:
+        raise ValueError(f"Line {id} segment {n} has an invalid 'count'")
+    name = entry.get("fitting")
+
+    if name in REDUCERS:
+        if before is None or after is None:
+            raise ValueError(f"Line {id} segment {n}: a {name} needs pipe segments on both sides")
+        (d1, eps1), (d2, eps2) = before, after
+        beta2 = (min(d1, d2) / max(d1, d2)) ** 2
+        K = 0.5 * (1 - beta2) if d2 < d1 else (1 - beta2) ** 2
+        return (d2, eps2) if d2 < d1 else (d1, eps1), 0.0, count * K
+
+    size = before or after
+    D = _number(entry.get("diameter"))
+    if D is not None:
+        if not D > 0:
+            raise ValueError(f"Line {id} segment {n} has an invalid 'diameter'")
+        size = (D, size[1])
+
+    K = _number(entry.get("K"))
+    L = _number(entry.get("equivalentLength"))
+    LD = _number(entry.get("LD"))
+    if name is not None:
+        if name in FITTING_K:
+            K = FITTING_K[name]
+        elif name in FITTING_LD:
+            LD = FITTING_LD[name]
+        else:
+            raise ValueError(f"Line {id} segment {n} has unknown fitting '{name}'; expected one of "
+                             f"{sorted([*FITTING_LD, *FITTING_K, *REDUCERS])}")
+    if LD is not None:
+        L = LD * size[0]
+    if (K is None) == (L is None):
+        raise ValueError(f"Line {id} segment {n} needs exactly one of 'K', 'equivalentLength', "
+                         "'LD' or a named 'fitting'")
+    if not (K if K is not None else L) >= 0:
+        raise ValueError(f"Line {id} segment {n} has a negative loss")
+    return size, count * (L or 0.0), count * (K or 0.0)
+
+
+def _number(value: Any, default: Optional[float] = None) -> Optional[float]:
+    try:
+        return float(value) if value is not None and value != "" else default
+    except (TypeError, ValueError):
+        return None
@@ -1,8 +1,12 @@
 import math
 from typing import Literal, Optional, Dict
 
+from .FrictionTable import friction_table
+
 FlowType        = Literal["laminar", "transitional", "turbulent"]
-FrictionMethod  = Literal["auto", "swamee_jain", "churchill"]
+# "table" interpolates a precomputed grid of the "auto" correlations
+# (≤ 0.1 % error, see FrictionTable) – the fast path for solver loops
+FrictionMethod  = Literal["auto", "swamee_jain", "churchill", "table"]
 
 
 class Pipe:
@@ -38,6 +42,7 @@ class Pipe:
         self.mu_cp      = viscosity_cp
         self.mu_pa_s    = viscosity_cp * 1e-3
         self._method    = friction_method
+        self._friction_curve = None         # FrictionCurve, for method "table"
 
         # Place-holders that will be filled by .solve()
         self.area               = None
@@ -113,12 +118,24 @@ class Pipe:
         if Re < 2000:
             return self._laminar_friction(Re)
 
-        elif 2000 <= Re < 4000:
+        if self._method == "table":
+            f = self._table_friction(Re)
+            if f is not None:
+                return f
+
+        if 2000 <= Re < 4000:
             return self._swamee_jain_friction(Re)
 
         else:
             return self._churchill_friction(Re)
 
+    def _table_friction(self, Re: float) -> Optional[float]:
+        curve = self._friction_curve
+        rr = self.epsilon / self.D
+        if curve is None or curve.relative_roughness != rr:
+            curve = self._friction_curve = friction_table().curve(rr)
+        return curve.friction_factor(Re)
+
     def _laminar_friction(self, Re: float) -> float:
         return 64 / Re
 
@@ -0,0 +1,214 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .FrictionTable import friction_table
+from .Pipe import Pipe, FrictionMethod
+
+ArrayLike = Sequence[float] | np.ndarray
+
+# Integer regime codes used by the array kernel (see REGIME_NAMES)
+LAMINAR      = 0
+TRANSITIONAL = 1
+TURBULENT    = 2
+REGIME_NAMES = np.array(["laminar", "transitional", "turbulent"])
+
+
+class PipeBatch:
+    """
+    Column-oriented counterpart of :class:`Pipe`.
+
+    Solves many straight pipe segments in one call.  Every input is a
+    1-D array (scalars are broadcast), every output is an array of the
+    same length, and each element reproduces ``Pipe.solve()`` for the
+    corresponding segment – same units, same formulas, same order of
+    floating-point operations.  NumPy's ``log``/``pow`` may round the last
+    bit differently from ``math``, so values agree to ~1e-15 relative.
+    """
+
+    g = Pipe.g                      # m s-2, gravitational constant
+
+    # ──────────────────────────────
+    # ─── Constructors & helpers ───
+    # ──────────────────────────────
+    def __init__(
+        self,
+        inner_diameter: ArrayLike,  # m
+        length: ArrayLike,          # m
+        roughness: ArrayLike,       # mm
+        mass_flowrate: ArrayLike,   # kg h-1
+        density: ArrayLike,         # kg m-3
+        viscosity_cp: ArrayLike,    # cP
+        *,
+        ids: Optional[Sequence[str]] = None,
+        friction_method: FrictionMethod = "auto"
+    ) -> None:
+        D, L, eps_mm, m, rho, mu = np.broadcast_arrays(
+            *(np.asarray(a, dtype=float) for a in
+              (inner_diameter, length, roughness, mass_flowrate, density, viscosity_cp))
+        )
+        self.ids        = list(ids) if ids is not None else None
+        self.D          = np.atleast_1d(D)
+        self.L          = np.atleast_1d(L)
+        self.epsilon    = np.atleast_1d(eps_mm) / 1000   # m
+        self.mass_flowrate = np.atleast_1d(m)
+        self.Q          = self.mass_flowrate / 1000
+        self.rho        = np.atleast_1d(rho)
+        self.mu_cp      = np.atleast_1d(mu)
+        self.mu_pa_s    = self.mu_cp * 1e-3
+        self._method    = friction_method
+
+        if self.ids is not None and len(self.ids) != self.D.size:
+            raise ValueError("ids must have one entry per pipe segment")
+
+    @classmethod
+    def from_pipes(cls, pipes: Iterable[Pipe]) -> "PipeBatch":
+        """Collects a list of ``Pipe`` objects into one batch."""
+        pipes = list(pipes)
+        if any(p.mass_flowrate is None for p in pipes):
+            raise ValueError("Every pipe in a batch needs a mass flow rate")
+        return cls(
+            inner_diameter=[p.D for p in pipes],
+            length=[p.L for p in pipes],
+            roughness=[p.epsilon * 1000 for p in pipes],
+            mass_flowrate=[p.mass_flowrate for p in pipes],
+            density=[p.rho for p in pipes],
+            viscosity_cp=[p.mu_cp for p in pipes],
+            ids=[p.id for p in pipes],
+            friction_method=pipes[0]._method if pipes else "auto",
+        )
+
+    def __len__(self) -> int:
+        return self.D.size
+
+    # ──────────────────────────────
+    # ───── Public entry point ─────
+    # ──────────────────────────────
+    def solve(self) -> Dict[str, np.ndarray]:
+        """Runs every calculation and returns results as a dict of arrays."""
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            area = cross_sectional_area(self.D)
+            velocity = flow_velocity(self.Q, area)
+            reynolds = reynolds_number(self.rho, velocity, self.D, self.mu_pa_s)
+            regime = classify_regime(reynolds)
+            friction = darcy_friction_factor(reynolds, self.epsilon, self.D, self._method)
+            head_loss = darcy_head_loss(friction, self.L, self.D, velocity)
+            pressure_drop = darcy_pressure_drop(head_loss, self.rho)
+
+        return {
+            "cross_sectional_area_m2": area,
+            "flow_velocity_m_s": velocity,
+            "mass_flowrate": self.mass_flowrate,
+            "reynolds_number": reynolds,
+            "flow_regime": REGIME_NAMES[regime],
+            "friction_factor": friction,
+            "relative_roughness": self.epsilon / self.D,
+            "head_loss_m": head_loss,
+            "pressure_drop_Pa": pressure_drop,
+        }
+
+    def pressure_drop(self, mass_flowrate: ArrayLike,
+                      index: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Pressure drop (Pa) of the same segments at new mass flows (kg h-1).
+        Skips the full report, which makes it the cheap call for solver loops.
+        ``index`` restricts the evaluation to a subset of segments.
+        """
+        D, L, eps, rho, mu = self.D, self.L, self.epsilon, self.rho, self.mu_pa_s
+        if index is not None:
+            D, L, eps, rho, mu = D[index], L[index], eps[index], rho[index], mu[index]
+
+        Q = np.asarray(mass_flowrate, dtype=float) / 1000
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            area = cross_sectional_area(D)
+            velocity = flow_velocity(Q, area)
+            reynolds = reynolds_number(rho, velocity, D, mu)
+            friction = darcy_friction_factor(reynolds, eps, D, self._method)
+            head_loss = darcy_head_loss(friction, L, D, velocity)
+            return darcy_pressure_drop(head_loss, rho)
+
+    def to_records(self, results: Optional[Dict[str, np.ndarray]] = None) -> List[Dict[str, object]]:
+        """Unpacks batch results into per-segment dicts shaped like ``Pipe.solve()``."""
+        results = results if results is not None else self.solve()
+        columns = {k: v.tolist() for k, v in results.items()}
+        return [
+            {key: column[i] for key, column in columns.items()}
+            for i in range(len(self))
+        ]
+
+    def __repr__(self) -> str:
+        return f"<PipeBatch n={len(self)}, method={self._method}>"
+
+
+# ──────────────────────────────
+# ─── Vectorised calculations ──
+# ──────────────────────────────
+# Each function mirrors the private method of the same name on ``Pipe``
+# and keeps its operation order so results agree to rounding error.
+def cross_sectional_area(D: np.ndarray) -> np.ndarray:
+    r = D / 2
+    return np.pi * (r**2)
+
+
+def flow_velocity(Q: np.ndarray, area: np.ndarray) -> np.ndarray:
+    q_m3_s = Q / 3600               # convert h-1 → s-1
+    return q_m3_s / area
+
+
+def reynolds_number(rho: np.ndarray, velocity: np.ndarray,
+                    D: np.ndarray, mu_pa_s: np.ndarray) -> np.ndarray:
+    return rho * velocity * D / mu_pa_s
+
+
+def classify_regime(Re: np.ndarray) -> np.ndarray:
+    """Returns integer regime codes (LAMINAR / TRANSITIONAL / TURBULENT)."""
+    return np.where(Re < 2000, LAMINAR, np.where(Re <= 4000, TRANSITIONAL, TURBULENT))
+
+
+def darcy_friction_factor(Re: np.ndarray, epsilon: np.ndarray, D: np.ndarray,
+                          method: FrictionMethod = "auto") -> np.ndarray:
+    """Darcy friction factor with the same regime switch as ``Pipe``."""
+    Re = np.asarray(Re, dtype=float)
+    epsilon, D = np.broadcast_to(epsilon, Re.shape), np.broadcast_to(D, Re.shape)
+    f = np.empty_like(Re)
+
+    lam = Re < 2000
+    exact = ~lam
+    if method == "table":
+        f[exact] = friction_table().lookup_array(Re[exact], epsilon[exact] / D[exact])
+        exact &= np.isnan(f)        # outside the table: exact correlations
+    trans = exact & (Re < 4000)
+    turb = exact & ~trans
+
+    f[lam] = laminar_friction(Re[lam])
+    f[trans] = swamee_jain_friction(Re[trans], epsilon[trans], D[trans])
+    f[turb] = churchill_friction(Re[turb], epsilon[turb], D[turb])
+    return f
+
+
+def laminar_friction(Re: np.ndarray) -> np.ndarray:
+    return 64 / Re
+
+
+def swamee_jain_friction(Re: np.ndarray, epsilon: np.ndarray, D: np.ndarray) -> np.ndarray:
+    rr = epsilon / (3.7 * D)
+    term = 5.74 / (Re ** 0.9)
+    return 0.25 / ((np.log10(rr + term)) ** 2)
+
+
+def churchill_friction(Re: np.ndarray, epsilon: np.ndarray, D: np.ndarray) -> np.ndarray:
+    A = (2.457 * np.log((7 / Re) ** 0.9 + 0.27 * epsilon / D)) ** 16
+    B = (37530 / Re) ** 16
+    term1 = (8 / Re) ** 12
+    term2 = (A + B) ** -1.5
+    sum_terms = term1 + term2
+    outer_root = sum_terms ** (1 / 12)
+    return 8 * outer_root
+
+
+def darcy_head_loss(friction_factor: np.ndarray, L: np.ndarray,
+                    D: np.ndarray, velocity: np.ndarray) -> np.ndarray:
+    return ((friction_factor) * (L / D) * ((velocity)**2) / (2 * PipeBatch.g))
+
+
+def darcy_pressure_drop(head_loss: np.ndarray, rho: np.ndarray) -> np.ndarray:
+    return head_loss * rho * PipeBatch.g
@@ -1,6 +1,9 @@
+import logging
 from typing import Any, Iterable
 from .base import Component
 
+logger = logging.getLogger("solver.components")
+
 class Product(Component):
     """
     A component that acts as the final destination in a pipeline system.
@@ -30,7 +33,7 @@ class Product(Component):
         Args:
             data (Iterable[Any]): The incoming data stream.
         """
-        print(f"Product '{self.id}' received data at outlet pressure {self.outlet_pressure} Pa.")
+        logger.debug("Product '%s' received data at outlet pressure %s Pa.", self.id, self.outlet_pressure)
         # Typically would store or process the final data here
 
     def get_outlet_pressure(self) -> float:
@@ -0,0 +1,147 @@
+import math
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .Pipe import Pipe
+from .PipeBatch import ArrayLike
+from .base import Component
+
+# Head coefficients (a0, a1, a2) of H[m] = a0 + a1·Q + a2·Q², Q in m3 h-1
+Coefficients = Tuple[float, float, float]
+
+
+@lru_cache(maxsize=1024)
+def fit_head_curve(points: Tuple[Tuple[float, float], ...]) -> Coefficients:
+    """
+    Least-squares polynomial through (flow m3 h-1, head m) points: a
+    constant for one point, a line for two, a quadratic for three or
+    more.  Memoised on the points, so a curve shared by many pumps, or
+    sent again in the next request, is fitted only once.
+    """
+    flows = np.array([q for q, _ in points], dtype=float)
+    heads = np.array([h for _, h in points], dtype=float)
+    degree = min(len(points) - 1, 2)
+    fitted = np.polyfit(flows, heads, degree)[::-1] if degree else heads[:1]
+    return tuple(float(c) for c in np.pad(fitted, (0, 3 - fitted.size)))
+
+
+def parse_curve(curve: Any) -> Tuple[Tuple[float, float], ...]:
+    """
+    ``curve`` as sorted (flow, head) tuples.  Accepts ``[{"flow": ...,
+    "head": ...}, ...]`` or ``[[flow, head], ...]``; raises ``ValueError``
+    for anything else.
+    """
+    if not isinstance(curve, (list, tuple)) or not curve:
+        raise ValueError("Pump 'curve' must be a non-empty list of {flow, head} points")
+    points = []
+    for point in curve:
+        try:
+            q, h = (point["flow"], point["head"]) if isinstance(point, dict) else point
+            q, h = float(q), float(h)
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Invalid pump curve point {point!r}; expected {{flow (m3/h), head (m)}}")
+        if not (math.isfinite(q) and math.isfinite(h)) or q < 0:
+            raise ValueError(f"Invalid pump curve point {point!r}")
+        points.append((q, h))
+    points.sort()
+    if len({q for q, _ in points}) != len(points):
+        raise ValueError("Pump curve has repeated flow values")
+    return tuple(points)
+
+
+class Pump(Component):
+    """
+    Centrifugal pump (or any two-port that adds pressure), given either
+    a constant pressure rise or a head–flow curve.
+
+      • ``pressure_rise`` – fixed rise in Pa, independent of flow
+      • ``curve``         – (flow m3 h-1, head m) points, fitted once by
+                            ``fit_head_curve``; ``speed`` is the speed
+                            relative to the curve's (affinity laws:
+                            H(Q) = s² · H₁(Q / s))
+
+    Below zero flow the curve is continued along its tangent at shut-off,
+    so the rise stays smooth for Newton iterations that pass through
+    reverse flow.
+    """
+
+    g = Pipe.g                      # m s-2, gravitational constant
+
+    # ──────────────────────────────
+    # ─── Constructors & helpers ───
+    # ──────────────────────────────
+    def __init__(
+        self,
+        id: str,
+        density: float,                         # kg m-3
+        *,
+        pressure_rise: float = 0.0,             # Pa
+        curve: Optional[Sequence[Tuple[float, float]]] = None,
+        speed: float = 1.0,                     # relative to the curve
+    ) -> None:
+        if speed <= 0:
+            raise ValueError(f"Pump {id} needs a positive 'speed'")
+        super().__init__(id)
+        self.id = id
+        self.rho = density
+        self.pressure_rise = pressure_rise
+        self.speed = speed
+        self.coefficients: Coefficients = fit_head_curve(tuple(curve)) if curve else (0.0, 0.0, 0.0)
+
+    @classmethod
+    def from_params(cls, id: str, params: Dict[str, Any], density: float) -> "Pump":
+        """
+        Canvas params: ``pressureRise`` (kPa) and/or ``curve`` (list of
+        ``{flow: m3/h, head: m}``), optional ``speed`` (fraction of the
+        curve's speed, default 1).
+        """
+        rise = _number(params.get("pressureRise"), "pressureRise", id)
+        curve = params.get("curve")
+        if rise is None and not curve:
+            raise ValueError("Pump needs a 'pressureRise' (kPa) or a 'curve' of {flow, head} points")
+        speed = _number(params.get("speed"), "speed", id)
+        return cls(
+            id, density,
+            pressure_rise=(rise or 0.0) * 1000,
+            curve=parse_curve(curve) if curve else None,
+            speed=1.0 if speed is None else speed,
+        )
+
+    # ──────────────────────────────
+    # ─── Calculations ─────────────
+    # ──────────────────────────────
+    def process(self, m: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+        """Pressure rise (Pa) and its derivative w.r.t. mass flow ``m`` (kg h-1)."""
+        return pump_pressure_change(np.asarray(m, dtype=float), self.pressure_rise,
+                                    self.coefficients, self.rho, self.speed)
+
+    def __repr__(self) -> str:
+        return (f"<Pump id={self.id}, rise={self.pressure_rise} Pa, "
+                f"curve={self.coefficients}, speed={self.speed}>")
+
+
+def pump_pressure_change(m: np.ndarray, pressure_rise: ArrayLike, coefficients: ArrayLike,
+                         density: ArrayLike, speed: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    rise + ρ·g·s²·H(ṁ / ρs) (Pa) and its derivative w.r.t. ``m`` (kg h-1),
+    for one pump or – with array parameters – many at once.
+    ``coefficients`` is (a0, a1, a2), one row each for several pumps.
+    """
+    a0, a1, a2 = coefficients
+    q = m / (density * speed)
+    forward = np.maximum(q, 0.0)              # below zero flow: tangent at shut-off
+    head = a0 + q * (a1 + forward * a2)
+    d_head = a1 + 2 * a2 * forward
+    return (pressure_rise + density * Pump.g * speed ** 2 * head,
+            Pump.g * speed * d_head)
+
+
+def _number(value: Any, name: str, id: str) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Pump {id} has an invalid '{name}'")
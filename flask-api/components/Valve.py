@@ -0,0 +1,109 @@
+import math
+from typing import Any, Dict, Literal, Optional, Tuple
+
+import numpy as np
+
+from .PipeBatch import ArrayLike
+from .base import Component
+
+Characteristic = Literal["linear", "equal_percentage", "quick_opening"]
+
+CV_TO_KV = 0.865                # Kv [m3 h-1 at 1 bar] per Cv [US gpm at 1 psi]
+
+
+class Valve(Component):
+    """
+    Control valve with flow coefficient ``kv`` (m3 h-1 at 1 bar, fully
+    open), an ``opening`` between 0 and 1 and an inherent characteristic:
+
+      • linear            Kv(x) = Kv · x
+      • equal_percentage  Kv(x) = Kv · R^(x − 1)     (R = rangeability)
+      • quick_opening     Kv(x) = Kv · √x
+
+    The pressure drop is ΔP[bar] = SG · (Q / Kv(x))² and acts against the
+    flow direction.
+    """
+
+    # ──────────────────────────────
+    # ─── Constructors & helpers ───
+    # ──────────────────────────────
+    def __init__(
+        self,
+        id: str,
+        kv: float,                              # m3 h-1 at 1 bar
+        density: float,                         # kg m-3
+        *,
+        opening: float = 1.0,
+        characteristic: Characteristic = "linear",
+        rangeability: float = 50.0,
+    ) -> None:
+        if not kv > 0:
+            raise ValueError("Valve needs a positive 'kv' (m3/h at 1 bar)")
+        if not 0 < opening <= 1:
+            raise ValueError(f"Valve {id} 'opening' must be in (0, 1]")
+        if characteristic not in CHARACTERISTICS:
+            raise ValueError(f"Valve {id} has unknown characteristic '{characteristic}'; "
+                             f"expected one of {sorted(CHARACTERISTICS)}")
+        if not rangeability > 1:
+            raise ValueError(f"Valve {id} 'rangeability' must exceed 1")
+        super().__init__(id)
+        self.id = id
+        self.kv = kv
+        self.rho = density
+        self.opening = opening
+        self.characteristic = characteristic
+        self.rangeability = rangeability
+        self.kv_effective = kv * CHARACTERISTICS[characteristic](opening, rangeability)
+        # ΔP[Pa] = c · ṁ|ṁ| with ṁ in kg/h and Q = ṁ / ρ
+        self.c = 1e5 * (density / 1000) / (self.kv_effective * density) ** 2
+
+    @classmethod
+    def from_params(cls, id: str, params: Dict[str, Any], density: float) -> "Valve":
+        """
+        Canvas params: ``kv`` or ``cv``, optional ``opening`` (0–1, default
+        1), ``characteristic`` and ``rangeability``.
+        """
+        kv = _number(params.get("kv"))
+        if kv is None:
+            cv = _number(params.get("cv"))
+            kv = cv * CV_TO_KV if cv is not None else None
+        if kv is None or kv <= 0:
+            raise ValueError("Valve needs a positive 'kv' (m3/h at 1 bar) or 'cv'")
+        opening = _number(params.get("opening"))
+        rangeability = _number(params.get("rangeability"))
+        return cls(
+            id, kv, density,
+            opening=1.0 if opening is None else opening,
+            characteristic=params.get("characteristic") or "linear",
+            rangeability=50.0 if rangeability is None else rangeability,
+        )
+
+    # ──────────────────────────────
+    # ─── Calculations ─────────────
+    # ──────────────────────────────
+    def process(self, m: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+        """Pressure change (Pa, negative for forward flow) and its derivative w.r.t. ``m`` (kg h-1)."""
+        return valve_pressure_change(np.asarray(m, dtype=float), self.c)
+
+    def __repr__(self) -> str:
+        return (f"<Valve id={self.id}, kv={self.kv}, opening={self.opening}, "
+                f"characteristic={self.characteristic}>")
+
+
+CHARACTERISTICS = {
+    "linear": lambda x, r: x,
+    "equal_percentage": lambda x, r: r ** (x - 1),
+    "quick_opening": lambda x, r: math.sqrt(x),
+}
+
+
+def valve_pressure_change(m: np.ndarray, c: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    """−c·ṁ|ṁ| (Pa) and its derivative w.r.t. ``m`` (kg h-1), for one valve or many."""
+    return -c * m * np.abs(m), -2 * c * np.abs(m)
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None and value != "" else None
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,232 @@
+"""
+executor.py
+-------------------
+Runs expensive solves in a bounded process pool so they cannot pin a
+gunicorn worker (the solver is CPU-bound; threads would share the GIL).
+
+  • Cheap solves – a cost (e.g. pipes × scenarios) up to ``inline_max_cost`` – run inline
+    on the request thread, which is faster than any inter-process hop.
+  • Larger ones go to a pool of ``max_workers`` processes.  At most
+    ``max_pending`` may be queued or running; beyond that ``SolverBusy`` is
+    raised at once (the API answers 503 with Retry-After).
+  • A solve that exceeds ``timeout`` seconds raises ``SolveTimeout``.  A
+    queued solve is simply cancelled; a running one cannot be interrupted
+    inside a worker, so the pool is recycled – its processes are killed
+    and a fresh pool is started on the next submit.  Other solves that
+    were running in the recycled pool fail with ``SolverBusy``.
+  • Metrics recorded in a pool process (solver counters, request stage
+    times and counters) come back with the result and are added in the
+    worker, unless ``PROMETHEUS_MULTIPROC_DIR`` makes each child report
+    its own Prometheus counters (see metrics.py).
+
+The pool is created lazily, i.e. inside each gunicorn worker after the
+fork, and uses the "forkserver" start method where available so child
+processes never inherit the parent's threads or locks.
+"""
+
+from __future__ import annotations
+import multiprocessing
+import os
+import threading
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from metrics import SolverCounts, add_solver_counts, solver_counts
+from sizing import STANDARD_SIZES
+from timing import end_request, merge, stage, start_request
+from uncertainty import DEFAULT_SAMPLES
+
+
+class SolverBusy(Exception):
+    """The pool queue is full (or the pool was recycled); retry later."""
+
+
+class SolveTimeout(Exception):
+    """A pooled solve ran longer than the executor's timeout."""
+
+
+def flowsheet_cost(flowsheet: Dict[str, Any]) -> int:
+    """Rough cost of one flowsheet solve: its number of pipes."""
+    return len(flowsheet.get("edges", []))
+
+
+def batch_cost(payload: Dict[str, Any]) -> int:
+    """Rough cost of a ``/api/run/batch`` payload: pipes × scenarios."""
+    if isinstance(payload.get("flowsheets"), list):
+        return sum(flowsheet_cost(fs) for fs in payload["flowsheets"] if isinstance(fs, dict))
+    flowsheet = payload.get("flowsheet")
+    scenarios = payload.get("scenarios")
+    if not isinstance(flowsheet, dict) or not isinstance(scenarios, list):
+        return 0
+    return flowsheet_cost(flowsheet) * len(scenarios)
+
+
+def sweep_cost(payload: Dict[str, Any]) -> int:
+    """Rough cost of a ``/api/run/sweep`` payload: its number of points."""
+    values, num = payload.get("values"), payload.get("num", 50)
+    if isinstance(values, list):
+        return len(values)
+    return num if isinstance(num, int) else 0
+
+
+def uncertainty_cost(payload: Dict[str, Any]) -> int:
+    """Rough cost of a ``/api/run/uncertainty`` payload: its number of samples."""
+    samples = payload.get("samples", DEFAULT_SAMPLES)
+    return samples if isinstance(samples, int) else 0
+
+
+def sizing_cost(payload: Dict[str, Any]) -> int:
+    """Rough cost of a ``/api/run/sizing`` payload: pipes × candidate sizes."""
+    pipes, sizes = payload.get("pipes"), payload.get("sizes")
+    flowsheet = payload.get("flowsheet")
+    if not isinstance(pipes, list):
+        pipes = flowsheet.get("edges", []) if isinstance(flowsheet, dict) else []
+    return len(pipes) * (len(sizes) if isinstance(sizes, list) else len(STANDARD_SIZES))
+
+
+def timeseries_cost(payload: Dict[str, Any]) -> int:
+    """Rough cost of a ``/api/run/timeseries`` payload: steps × pipes."""
+    profiles, flowsheet = payload.get("profiles"), payload.get("flowsheet")
+    if not isinstance(profiles, dict) or not isinstance(flowsheet, dict):
+        return 0
+    steps = max((len(values) for element in profiles.values() if isinstance(element, dict)
+                 for values in element.values() if isinstance(values, list)), default=0)
+    return steps * flowsheet_cost(flowsheet)
+
+
+class SolveExecutor:
+    """Inline-or-pool dispatch with backpressure and timeouts."""
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 max_pending: Optional[int] = None,
+                 timeout: float = 30.0,
+                 inline_max_cost: int = 200) -> None:
+        # max_workers=None: one process per CPU; 0: no pool, everything inline
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.max_pending = max_pending or 4 * max(self.max_workers, 1)
+        self.timeout = timeout
+        self.inline_max_cost = inline_max_cost
+        self.recycled = 0
+        self.rejected = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SolveExecutor":
+        """
+        SOLVER_POOL_WORKERS (default: CPU count, ``0`` disables the pool),
+        SOLVER_POOL_PENDING, SOLVER_POOL_TIMEOUT and SOLVER_INLINE_MAX_COST.
+        """
+        workers = os.getenv("SOLVER_POOL_WORKERS")
+        pending = os.getenv("SOLVER_POOL_PENDING")
+        return cls(
+            max_workers=int(workers) if workers else None,
+            max_pending=int(pending) if pending else None,
+            timeout=float(os.getenv("SOLVER_POOL_TIMEOUT", "30")),
+            inline_max_cost=int(os.getenv("SOLVER_INLINE_MAX_COST", "200")),
+        )
+
+    # ──────────────────────────────
+    # ─── Public API ───────────────
+    # ──────────────────────────────
+    def run(self, func: Callable[..., Any], *args: Any, cost: int = 0) -> Any:
+        """
+        ``func(*args)`` inline when ``cost`` is small, otherwise in the pool
+        (``func`` and its arguments must be picklable).  Exceptions raised by
+        ``func`` propagate unchanged.
+        """
+        if self.max_workers == 0 or cost <= self.inline_max_cost:
+            return func(*args)
+
+        future = self.submit(_pooled, func, *args)
+        with stage("pool"):
+            try:
+                result, stages, counters, solver_counters = future.result(timeout=self.timeout)
+            except FutureTimeout:
+                self.cancel(future)
+                raise SolveTimeout(f"Solve exceeded {self.timeout:g} s")
+            except (BrokenProcessPool, CancelledError):
+                raise SolverBusy("Solver pool was restarted; retry the request")
+        merge(stages, counters)
+        add_solver_counts(solver_counters)
+        return result
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> Future:
+        """Queues ``func(*args)``; raises ``SolverBusy`` when the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise SolverBusy(f"Solver queue is full ({self.max_pending} pending solves)")
+        try:
+            future = self._get_pool().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def cancel(self, future: Future) -> None:
+        """Cancels a queued solve, or recycles the pool if it is already running."""
+        if future.cancel() or future.done():
+            return
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            self.recycled += 1
+            _terminate(pool)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "inline_max_cost": self.inline_max_cost,
+            "timeout": self.timeout,
+            "rejected": self.rejected,
+            "recycled": self.recycled,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context(
+                    "forkserver" if "forkserver" in methods else "spawn")
+                self._pool = ProcessPoolExecutor(self.max_workers, mp_context=context)
+            return self._pool
+
+
+def _pooled(func: Callable[..., Any], *args: Any) -> Tuple[Any, Dict[str, float], Dict[str, int], SolverCounts]:
+    """
+    Runs in a pool process: ``func(*args)`` plus the stage times, request
+    counters and Prometheus solver counters it recorded there, which
+    ``SolveExecutor.run`` adds to the calling request and process.
+    """
+    token = start_request()
+    before = solver_counts()
+    try:
+        result = func(*args)
+    finally:
+        timer = end_request(token)
+    moved = {key: value - before.get(key, 0.0) for key, value in solver_counts().items()}
+    return result, timer.stages, timer.counters, moved
+
+
+def _terminate(pool: ProcessPoolExecutor) -> None:
+    """Kills the pool's processes; queued and running futures fail."""
+    terminate = getattr(pool, "terminate_workers", None)      # Python ≥ 3.14
+    if terminate is not None:
+        terminate()
+        return
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
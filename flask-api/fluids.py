@@ -0,0 +1,275 @@
+"""
+fluids.py
+-------------------
+Density and viscosity of common fluids as functions of temperature (and,
+for gases, pressure).
+
+Pipes may still carry ``density`` / ``viscosity`` themselves.  When they
+do not, the values come from the fluid that reaches the pipe:
+
+  • the pipe's own ``fluidType`` if it names a fluid listed here,
+    otherwise the fluid of the feed upstream of it;
+  • ``temperature`` (°C) from the pipe, otherwise from that feed,
+    otherwise ``DEFAULT_TEMPERATURE_C``;
+  • the feed ``pressure`` (kPa, absolute) for gases, or atmospheric
+    pressure when the feed pressure is not specified.
+
+Property evaluations are memoised per (fluid, temperature, pressure).
+A network therefore evaluates each distinct fluid state once, however
+many pipes share it.  The correlations:
+
+  • water     – Kell (1975) density, Vogel viscosity; 0–100 °C
+  • seawater  – UNESCO (1981) density and Sharqawy et al. (2010) viscosity
+                at 35 g/kg salinity; 0–40 °C
+  • oil       – medium crude / lube oil: 850 kg/m³ at 15 °C, linear
+                thermal expansion, ASTM D341 (Walther) viscosity through
+                59 cSt at 20 °C and 7 cSt at 100 °C; −10–150 °C
+  • diesel    – as oil with 835 kg/m³, 3.0 cSt at 40 °C, 1.3 cSt at 100 °C
+  • air, methane – ideal gas density, Sutherland viscosity; −50–400 °C
+"""
+
+from __future__ import annotations
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from graph import FlowsheetGraph
+
+DEFAULT_TEMPERATURE_C = 20.0
+ATMOSPHERIC_KPA = 101.325
+R = 8.314462618                          # J/(mol·K)
+
+
+class FluidProperties(NamedTuple):
+    density: float                       # kg/m³
+    viscosity_cp: float                  # mPa·s
+
+
+# (fluid name, temperature °C, pressure kPa or None for liquids)
+FluidState = Tuple[str, float, Optional[float]]
+
+
+# ──────────────────────────────────────────────────────────
+# Correlations
+# ──────────────────────────────────────────────────────────
+class _Fluid:
+    compressible = False
+
+    def __init__(self, t_min: float, t_max: float) -> None:
+        self.t_min, self.t_max = t_min, t_max
+
+    def properties(self, t: float, p_kpa: Optional[float]) -> FluidProperties:
+        raise NotImplementedError
+
+
+class _Water(_Fluid):
+    def properties(self, t, p_kpa):
+        density = (999.83952 + 16.945176 * t - 7.9870401e-3 * t ** 2 - 46.170461e-6 * t ** 3
+                   + 105.56302e-9 * t ** 4 - 280.54253e-12 * t ** 5) / (1 + 16.879850e-3 * t)
+        viscosity = math.exp(-3.7188 + 578.919 / (t + 273.15 - 137.546))
+        return FluidProperties(density, viscosity)
+
+
+class _Seawater(_Fluid):
+    salinity = 35.0                      # g/kg
+
+    def properties(self, t, p_kpa):
+        s = self.salinity
+        pure = (999.842594 + 6.793952e-2 * t - 9.095290e-3 * t ** 2 + 1.001685e-4 * t ** 3
+                - 1.120083e-6 * t ** 4 + 6.536332e-9 * t ** 5)
+        a = 0.824493 - 4.0899e-3 * t + 7.6438e-5 * t ** 2 - 8.2467e-7 * t ** 3 + 5.3875e-9 * t ** 4
+        b = -5.72466e-3 + 1.0227e-4 * t - 1.6546e-6 * t ** 2
+        density = pure + a * s + b * s ** 1.5 + 4.8314e-4 * s ** 2
+
+        water = _WATER.properties(t, p_kpa).viscosity_cp
+        s_kg = s / 1000
+        a = 1.541 + 1.998e-2 * t - 9.52e-5 * t ** 2
+        b = 7.974 - 7.561e-2 * t + 4.724e-4 * t ** 2
+        return FluidProperties(density, water * (1 + a * s_kg + b * s_kg ** 2))
+
+
+class _Petroleum(_Fluid):
+    """Linear thermal expansion; ASTM D341 viscosity through two kinematic points."""
+
+    def __init__(self, t_min, t_max, density_15c: float, expansion: float,
+                 point_1: Tuple[float, float], point_2: Tuple[float, float]) -> None:
+        super().__init__(t_min, t_max)
+        self.density_15c, self.expansion = density_15c, expansion
+        (t1, nu1), (t2, nu2) = point_1, point_2
+        z1, z2 = math.log10(math.log10(nu1 + 0.7)), math.log10(math.log10(nu2 + 0.7))
+        x1, x2 = math.log10(t1 + 273.15), math.log10(t2 + 273.15)
+        self.slope = (z2 - z1) / (x2 - x1)
+        self.intercept = z1 - self.slope * x1
+
+    def properties(self, t, p_kpa):
+        density = self.density_15c * (1 - self.expansion * (t - 15))
+        nu = 10 ** 10 ** (self.intercept + self.slope * math.log10(t + 273.15)) - 0.7   # cSt
+        return FluidProperties(density, nu * density / 1000)
+
+
+class _IdealGas(_Fluid):
+    compressible = True
+
+    def __init__(self, t_min, t_max, molar_mass: float,
+                 mu_ref: float, t_ref: float, sutherland: float) -> None:
+        super().__init__(t_min, t_max)
+        self.molar_mass = molar_mass                    # kg/mol
+        self.mu_ref, self.t_ref, self.sutherland = mu_ref, t_ref, sutherland
+
+    def properties(self, t, p_kpa):
+        t_k = t + 273.15
+        density = p_kpa * 1000 * self.molar_mass / (R * t_k)
+        mu = self.mu_ref * (t_k / self.t_ref) ** 1.5 * (self.t_ref + self.sutherland) / (t_k + self.sutherland)
+        return FluidProperties(density, mu * 1000)
+
+
+_WATER = _Water(0.0, 100.0)
+
+FLUIDS: Dict[str, _Fluid] = {
+    "water": _WATER,
+    "seawater": _Seawater(0.0, 40.0),
+    "oil": _Petroleum(-10.0, 150.0, 850.0, 7.0e-4, (20.0, 59.0), (100.0, 7.0)),
+    "diesel": _Petroleum(-10.0, 150.0, 835.0, 8.3e-4, (40.0, 3.0), (100.0, 1.3)),
+    "air": _IdealGas(-50.0, 400.0, 0.0289647, 1.716e-5, 273.15, 110.4),
+    "methane": _IdealGas(-50.0, 400.0, 0.01604, 1.087e-5, 293.15, 164.0),
+}
+
+
+# ──────────────────────────────────────────────────────────
+# Lookups
+# ──────────────────────────────────────────────────────────
+def is_known(fluid_type: Any) -> bool:
+    return isinstance(fluid_type, str) and fluid_type.lower() in FLUIDS
+
+
+@lru_cache(maxsize=4096)
+def properties(fluid_type: str, temperature_c: float = DEFAULT_TEMPERATURE_C,
+               pressure_kpa: Optional[float] = None) -> FluidProperties:
+    """
+    Density and viscosity of ``fluid_type`` at ``temperature_c``.  Unknown
+    fluids and temperatures outside the correlation's range raise
+    ``ValueError``.
+    """
+    fluid = FLUIDS.get(fluid_type.lower()) if isinstance(fluid_type, str) else None
+    if fluid is None:
+        raise ValueError(f"Unknown fluid '{fluid_type}'; known fluids: {sorted(FLUIDS)}")
+    if not fluid.t_min <= temperature_c <= fluid.t_max:
+        raise ValueError(f"Fluid '{fluid_type}' properties are valid from {fluid.t_min:g} to "
+                         f"{fluid.t_max:g} °C, got {temperature_c:g} °C")
+    if fluid.compressible and not (pressure_kpa is not None and pressure_kpa > 0):
+        pressure_kpa = ATMOSPHERIC_KPA
+    return fluid.properties(float(temperature_c), pressure_kpa)
+
+
+def state_of(params: Dict[str, Any], upstream: Optional[FluidState] = None) -> Optional[FluidState]:
+    """
+    Fluid state named by feed or pipe ``params`` (``fluidType``,
+    ``temperature``, ``pressure``), completed from ``upstream``.  None
+    when no known fluid applies.
+    """
+    fluid = params.get("fluidType")
+    if is_known(fluid):
+        fluid = fluid.lower()
+    elif upstream is not None:
+        fluid = upstream[0]
+    else:
+        return None
+
+    temperature = _number(params.get("temperature"))
+    if temperature is None:
+        temperature = upstream[1] if upstream is not None else DEFAULT_TEMPERATURE_C
+    pressure = _number(params.get("pressure"))
+    if pressure is None and upstream is not None:
+        pressure = upstream[2]
+    # liquids ignore pressure, so they share one memo entry per temperature
+    return fluid, temperature, pressure if FLUIDS[fluid].compressible else None
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        value = float(value) if value is not None and value != "" else None
+    except (TypeError, ValueError):
+        return None
+    return value if value is not None and math.isfinite(value) else None
+
+
+# ──────────────────────────────────────────────────────────
+# Filling in a compiled flowsheet
+# ──────────────────────────────────────────────────────────
+def fill_properties(graph: FlowsheetGraph) -> FlowsheetGraph:
+    """
+    ``graph`` with missing pipe ``density`` / ``viscosity`` taken from the
+    fluid reaching each pipe (see module docstring).  Returns ``graph``
+    itself when every pipe already has both.
+    """
+    rho, mu = graph.columns["density"], graph.columns["viscosity"]
+    missing = np.isnan(rho) | np.isnan(mu)
+    if not missing.any():
+        return graph
+
+    states, edge_state = _edge_states(graph)
+    mixed = missing & (edge_state == _MIXED)
+    if mixed.any():
+        raise ValueError(f"Pipe {graph.edge_ids[int(np.argmax(mixed))]} needs 'density' and "
+                         "'viscosity': different fluids reach it")
+
+    # one property evaluation per distinct state
+    table = np.full((len(states) + 1, 2), np.nan)               # last row: no fluid
+    for n, state in enumerate(states):
+        table[n] = properties(*state)
+    looked_up = table[np.where(edge_state >= 0, edge_state, len(states))]
+    filled = np.flatnonzero(missing & (edge_state >= 0))
+    return graph.with_columns({
+        "density": np.where(np.isnan(rho), looked_up[:, 0], rho),
+        "viscosity": np.where(np.isnan(mu), looked_up[:, 1], mu),
+    }, filled)
+
+
+_NONE, _MIXED = -1, -2
+
+
+def _edge_states(graph: FlowsheetGraph) -> Tuple[List[FluidState], np.ndarray]:
+    """
+    Distinct fluid states and, per edge, the index of the state flowing in
+    it (``_NONE`` for no known fluid, ``_MIXED`` when different fluids
+    meet upstream).  One pass over the processing order; ``state_of`` only
+    runs for feeds and for pipes that name a fluid or temperature.
+    """
+    states: List[FluidState] = []
+    index: Dict[FluidState, int] = {}
+
+    def intern(state: Optional[FluidState]) -> int:
+        if state is None:
+            return _NONE
+        if state not in index:
+            index[state] = len(states)
+            states.append(state)
+        return index[state]
+
+    own = [("fluidType" in d and is_known(d["fluidType"])) or "temperature" in d for d in graph.edge_data]
+    node_state = [_NONE] * graph.n_nodes
+    edge_state = [_NONE] * graph.n_edges
+    out_ptr, out_edges = graph.out_ptr.tolist(), graph.out_edges.tolist()
+    in_ptr, in_edges = graph.in_ptr.tolist(), graph.in_edges.tolist()
+
+    for i in range(graph.n_nodes):
+        if graph.node_types[i] == "feed":
+            node_state[i] = intern(state_of(graph.node_params[i]))
+        elif in_ptr[i + 1] - in_ptr[i] == 1:
+            node_state[i] = edge_state[in_edges[in_ptr[i]]]
+        else:
+            incoming = {edge_state[k] for k in in_edges[in_ptr[i]:in_ptr[i + 1]]}
+            incoming.discard(_NONE)
+            node_state[i] = incoming.pop() if len(incoming) == 1 else (_MIXED if incoming else _NONE)
+
+        upstream = node_state[i]
+        for k in out_edges[out_ptr[i]:out_ptr[i + 1]]:
+            if not own[k]:
+                edge_state[k] = upstream
+            elif upstream == _MIXED:
+                edge_state[k] = intern(state_of(graph.edge_data[k]))
+            else:
+                edge_state[k] = intern(state_of(graph.edge_data[k], states[upstream] if upstream >= 0 else None))
+    return states, np.array(edge_state, dtype=np.intp)
@@ -0,0 +1,226 @@
+"""
+graph.py
+-------------------
+Compiled, array-backed form of a React Flow flowsheet.
+
+The canvas JSON is walked exactly once.  Node and edge ids become integer
+indices, and nodes are numbered in processing (topological) order, so
+``order[i]`` is node ``i``.  Connectivity is held as CSR incidence
+arrays (``out_ptr`` / ``out_edges`` and ``in_ptr`` / ``in_edges``).  Pipe
+parameters sit in float64 columns, with NaN for values that are missing
+or not numeric.  Traversal, validation, the single-pipe solver, the
+network solver and batch scenarios all read the same compiled graph.
+Nothing scans the edge list again, so building and lookups stay linear
+in the number of elements.
+"""
+
+from __future__ import annotations
+import copy
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from timing import timed
+
+# Edge ``data`` keys compiled into float columns
+PIPE_COLUMNS = ("diameter", "length", "roughness", "massFlowRate", "density", "viscosity")
+
+
+def _float(value: Any) -> float:
+    """``to_float`` for columns: missing or non-numeric values become NaN."""
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _column(values: List[Any]) -> np.ndarray:
+    try:
+        return np.array(values, dtype=float)            # numbers and None (→ NaN)
+    except (TypeError, ValueError):
+        return np.array([_float(v) for v in values], dtype=float)
+
+
+class FlowsheetGraph:
+    """
+    Nodes that appear on at least one edge, in processing order, and all
+    edges in payload order.  Nodes referenced by edges but absent from
+    ``nodes`` are kept (type None) and listed in ``missing``.  Nodes that
+    touch no edge are only recorded in ``unconnected``.
+    """
+
+    __slots__ = (
+        "order", "node_index", "node_types", "node_params", "node_pressure",
+        "missing", "unconnected",
+        "edge_ids", "edge_index", "edge_data", "src", "dst", "columns",
+        "out_ptr", "out_edges", "in_ptr", "in_edges",
+    )
+
+    @timed("graph")
+    def __init__(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> None:
+        records = {n["id"]: n for n in nodes}
+
+        # Provisional numbering by first appearance (target before source).
+        # It fixes the tie-break of the topological sort below.
+        first_seen: Dict[str, int] = {}
+        src, dst = [], []
+        for edge in edges:
+            t, s = edge["target"], edge["source"]
+            dst.append(first_seen.setdefault(t, len(first_seen)))
+            src.append(first_seen.setdefault(s, len(first_seen)))
+        n_nodes = len(first_seen)
+        provisional = list(first_seen)
+
+        src, dst = np.array(src, dtype=np.intp), np.array(dst, dtype=np.intp)
+        rank = _topological_rank(n_nodes, src, dst)
+        self.order: List[str] = [None] * n_nodes
+        for i, r in enumerate(rank.tolist()):
+            self.order[r] = provisional[i]
+        self.node_index: Dict[str, int] = {nid: i for i, nid in enumerate(self.order)}
+
+        self.src, self.dst = rank[src], rank[dst]
+        self.out_ptr, self.out_edges = _csr(self.src, n_nodes)
+        self.in_ptr, self.in_edges = _csr(self.dst, n_nodes)
+
+        self.node_types: List[Optional[str]] = []
+        self.node_params: List[Dict[str, Any]] = []
+        self.missing: List[str] = []
+        for nid in self.order:
+            record = records.get(nid)
+            if record is None:
+                self.missing.append(nid)
+                self.node_types.append(None)
+                self.node_params.append({})
+                continue
+            data = record.get("data") or {}
+            self.node_types.append(data.get("nodeType"))
+            self.node_params.append(data.get("params") or {})
+        self.node_pressure = _column([p.get("pressure") for p in self.node_params])
+        self.unconnected = {nid for nid in records if nid not in self.node_index}
+
+        self.edge_ids: List[str] = [e["id"] for e in edges]
+        self.edge_index: Dict[str, int] = {eid: k for k, eid in enumerate(self.edge_ids)}
+        self.edge_data: List[Dict[str, Any]] = [e.get("data") or {} for e in edges]
+        self.columns: Dict[str, np.ndarray] = {
+            key: _column([d.get(key) for d in self.edge_data]) for key in PIPE_COLUMNS
+        }
+
+    @classmethod
+    def from_flowsheet(cls, flowsheet: Dict[str, Any]) -> "FlowsheetGraph":
+        return cls(flowsheet["nodes"], flowsheet["edges"])
+
+    # ──────────────────────────────
+    # ─── Queries ──────────────────
+    # ──────────────────────────────
+    @property
+    def n_nodes(self) -> int:
+        return len(self.order)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.edge_ids)
+
+    def outgoing(self, i: int) -> np.ndarray:
+        """Edge indices leaving node ``i``, in payload order."""
+        return self.out_edges[self.out_ptr[i]:self.out_ptr[i + 1]]
+
+    def incoming(self, i: int) -> np.ndarray:
+        """Edge indices entering node ``i``, in payload order."""
+        return self.in_edges[self.in_ptr[i]:self.in_ptr[i + 1]]
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.out_ptr)
+
+    def in_degree(self) -> np.ndarray:
+        return np.diff(self.in_ptr)
+
+    def edge_between(self, i: int, j: int) -> Optional[int]:
+        """First edge from node ``i`` to node ``j``, or None."""
+        out = self.outgoing(i)
+        hits = out[self.dst[out] == j]
+        return int(hits[0]) if hits.size else None
+
+    # ──────────────────────────────
+    # ─── Variants ─────────────────
+    # ──────────────────────────────
+    def with_overrides(self, overrides: Dict[str, Dict[str, Any]]) -> "FlowsheetGraph":
+        """
+        A copy with ``overrides`` ({element id: {param: value}}) merged into
+        node params or edge data; ids of other elements are ignored.  The
+        topology arrays are shared, and only the parameters that change are
+        copied.
+        """
+        clone = copy.copy(self)
+        nodes = [(self.node_index[k], v) for k, v in overrides.items() if k in self.node_index]
+        edges = [(self.edge_index[k], v) for k, v in overrides.items() if k in self.edge_index]
+
+        if nodes:
+            clone.node_params = list(self.node_params)
+            clone.node_pressure = self.node_pressure.copy()
+            for i, params in nodes:
+                clone.node_params[i] = {**self.node_params[i], **params}
+                clone.node_pressure[i] = _float(clone.node_params[i].get("pressure"))
+
+        if edges:
+            clone.edge_data = list(self.edge_data)
+            clone.columns = dict(self.columns)
+            for key in {key for _, data in edges for key in data if key in self.columns}:
+                clone.columns[key] = self.columns[key].copy()
+            for k, data in edges:
+                clone.edge_data[k] = {**self.edge_data[k], **data}
+                for key, value in data.items():
+                    if key in clone.columns:
+                        clone.columns[key][k] = _float(value)
+        return clone
+
+    def with_columns(self, columns: Dict[str, np.ndarray], edges: np.ndarray) -> "FlowsheetGraph":
+        """
+        A copy with whole float ``columns`` replaced.  The new values of
+        ``edges`` are also written into their edge data, so both views
+        agree.
+        """
+        clone = copy.copy(self)
+        clone.columns = {**self.columns, **columns}
+        clone.edge_data = list(self.edge_data)
+        keys = list(columns)
+        rows = zip(*(columns[key][edges].tolist() for key in keys))
+        for k, row in zip(edges.tolist(), rows):
+            data = clone.edge_data[k] = dict(self.edge_data[k])
+            data.update(zip(keys, row))
+        return clone
+
+
+def _csr(rows: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row pointer and edge indices grouped by ``rows`` (stable, so payload order)."""
+    ptr = np.zeros(n + 1, dtype=np.intp)
+    np.cumsum(np.bincount(rows, minlength=n), out=ptr[1:])
+    return ptr, np.argsort(rows, kind="stable").astype(np.intp, copy=False)
+
+
+def _topological_rank(n: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Kahn's algorithm on integer indices.  Returns each node's position in
+    processing order.  Raises ``ValueError`` when not every node can be
+    ordered, i.e. the graph has a cycle.
+    """
+    ptr, out = _csr(src, n)
+    ptr_l, out_l, dst_l = ptr.tolist(), out.tolist(), dst.tolist()
+    in_deg = np.bincount(dst, minlength=n).tolist()
+
+    queue = [i for i in range(n) if in_deg[i] == 0]
+    head = 0
+    while head < len(queue):
+        u = queue[head]
+        head += 1
+        for k in out_l[ptr_l[u]:ptr_l[u + 1]]:
+            v = dst_l[k]
+            in_deg[v] -= 1
+            if in_deg[v] == 0:
+                queue.append(v)
+
+    if len(queue) != n:
+        raise ValueError("Graph contains cycles or disconnected nodes")
+
+    rank = np.empty(n, dtype=np.intp)
+    rank[np.array(queue, dtype=np.intp)] = np.arange(n)
+    return rank
@@ -0,0 +1,26 @@
+"""
+gunicorn.conf.py
+-------------------
+Wires Prometheus multi-process metrics into gunicorn:
+
+    PROMETHEUS_MULTIPROC_DIR=/tmp/solver-metrics gunicorn app:app
+
+The directory is emptied when the master starts and a worker's live
+gauges are dropped when it exits, so /api/metrics sums current workers.
+"""
+
+import os
+import shutil
+
+
+def on_starting(server):
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
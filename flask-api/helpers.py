@@ -5,20 +5,41 @@ Improved version that first creates component instances and then uses them to de
 """
 
 from __future__ import annotations
+import logging
 import math
-from collections import defaultdict, deque
 from typing import Dict, List, Any, Literal, Optional, Tuple
 from enum import Enum
 
+import numpy as np
+
 from components.Pipe import Pipe
+from components.PipeBatch import PipeBatch
 from components.Feed import Feed
 from components.Product import Product
+from fluids import fill_properties
+from graph import FlowsheetGraph
+from metrics import observe_solves
+from timing import count, timed
+from warmstart import WarmStartStore
+
+logger = logging.getLogger("solver.helpers")
+
+# Converged flow / pressure-drop pairs of recent flow-rate solves
+flow_rate_starts = WarmStartStore.from_env()
+
+
+# Shapes of a report's "results": one dict per element, or one array per field
+LAYOUTS = ("records", "columnar")
+
+# Friction-factor evaluations a sweep, uncertainty or sizing payload may request
+FRICTION_METHODS = ("auto", "table")
 
 
 class CalculationMode(Enum):
     OUTLET_PRESSURE = 1    # Given inlet P and flow, find outlet P
     INLET_PRESSURE = 2     # Given outlet P and flow, find required inlet P
     FLOW_RATE = 3          # Given inlet and outlet P, find max possible flow
+    NETWORK = 4            # General graph: all pressures and flows solved together
 
 
 # ──────────────────────────────────────────────────────────
@@ -26,60 +47,50 @@ class CalculationMode(Enum):
 # ──────────────────────────────────────────────────────────
 def traversal_order(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> List[str]:
     """Determine processing order based on directed edges"""
-    adj: Dict[str, List[str]] = defaultdict(list)
-    in_deg: Dict[str, int] = defaultdict(int)
-
-    for edge in edges:
-        s, t = edge["source"], edge["target"]
-        adj[s].append(t)
-        in_deg[t] += 1
-        in_deg.setdefault(s, 0)
-
-    queue = deque([n for n, d in in_deg.items() if d == 0])
-    order: List[str] = []
-
-    while queue:
-        node = queue.popleft()
-        order.append(node)
-        for nxt in adj[node]:
-            in_deg[nxt] -= 1
-            if in_deg[nxt] == 0:
-                queue.append(nxt)
-
-    if len(order) != len(in_deg):
-        raise ValueError("Graph contains cycles or disconnected nodes")
+    return FlowsheetGraph(nodes, edges).order
 
-    return order
 
+def is_single_pipe(graph: FlowsheetGraph) -> bool:
+    """True for the classic feed → pipe → product flowsheet (multi-segment lines go to the network solver)"""
+    return (graph.n_edges == 1 and not graph.missing and graph.node_types == ["feed", "product"]
+            and "segments" not in graph.edge_data[0])
 
 
-def validate_order(order, nodes_raw, edges):
-    """Ensure that order contains 'feed' then 'product' and a connecting pipe edge exists"""
+@timed("validate")
+def validate_order(graph: FlowsheetGraph) -> int:
+    """Ensure that order contains 'feed' then 'product' and a connecting pipe edge exists; returns that edge"""
     expected = ["feed", "product"]
-    actual = [nodes_raw[nid]["data"]["nodeType"] for nid in order]
+    actual = graph.node_types
 
     if actual != expected:
         raise ValueError(f"Expected order {expected}, got {actual}")
 
-    feed_id = order[0]
-    product_id = order[1]
-
-    matching_edge = next((e for e in edges if e["source"] == feed_id and e["target"] == product_id), None)
-    if not matching_edge:
+    matching_edge = graph.edge_between(0, 1)
+    if matching_edge is None:
         raise ValueError("Missing edge (pipe) between feed and product")
+    return matching_edge
 
 
 # ──────────────────────────────────────────────────────────
 # Improved Calculation Mode Detection
 # ──────────────────────────────────────────────────────────
+@timed("validate")
 def detect_calculation_mode_from_instances(feed: Feed, pipe: Pipe, product: Product) -> CalculationMode:
     """
     Determine calculation mode based on component instances.
     Returns the calculation mode and validates parameter completeness.
     """
-    has_inlet_p = feed.pressure is not None
-    has_outlet_p = product.get_outlet_pressure() is not None
-    has_flow = pipe.mass_flowrate is not None
+    return single_pipe_mode(feed.pressure, product.get_outlet_pressure(), pipe.mass_flowrate)
+
+
+def single_pipe_mode(inlet: Optional[float], outlet: Optional[float],
+                     flow: Optional[float]) -> CalculationMode:
+    """
+    Calculation mode of a feed → pipe → product line from which of the
+    inlet pressure, outlet pressure and flow are given (None or NaN:
+    missing); anything but exactly two raises ``ValueError``.
+    """
+    has_inlet_p, has_outlet_p, has_flow = (v is not None and not math.isnan(v) for v in (inlet, outlet, flow))
 
     if has_inlet_p and has_flow and not has_outlet_p:
         return CalculationMode.OUTLET_PRESSURE
@@ -102,6 +113,7 @@ def detect_calculation_mode_from_instances(feed: Feed, pipe: Pipe, product: Prod
 # ──────────────────────────────────────────────────────────
 # Case-Specific Solvers (unchanged)
 # ──────────────────────────────────────────────────────────
+@timed("solve")
 def solve_outlet_pressure(pipe: Pipe, inlet_pressure: float) -> Dict[str, Any]:
     """Case 1: Calculate outlet pressure given inlet pressure and flow"""
     pipe_results = pipe.solve()
@@ -115,12 +127,13 @@ def solve_outlet_pressure(pipe: Pipe, inlet_pressure: float) -> Dict[str, Any]:
     }
 
 
+@timed("solve")
 def solve_inlet_pressure(pipe: Pipe, outlet_pressure: float) -> Dict[str, Any]:
     """Case 2: Calculate required inlet pressure given outlet pressure and flow"""
     pipe_results = pipe.solve()
     required_inlet_p = (outlet_pressure + pipe_results["pressure_drop_Pa"])
-    print(outlet_pressure)
-    print(pipe_results, required_inlet_p)
+    logger.debug("Pipe %s: outlet %.6g Pa + drop %.6g Pa → inlet %.6g Pa",
+                 pipe.id, outlet_pressure, pipe_results["pressure_drop_Pa"], required_inlet_p)
     
     return {
         **pipe_results,
@@ -130,72 +143,306 @@ def solve_inlet_pressure(pipe: Pipe, outlet_pressure: float) -> Dict[str, Any]:
     }
 
 
+@timed("solve")
 def solve_flow_rate(pipe: Pipe, 
                    inlet_pressure: float, 
                    outlet_pressure: float,
                    max_iter: int = 100,
-                   tol: float = 1e-5) -> Dict[str, Any]:
-    """Case 3: Calculate maximum possible flow rate given pressure difference"""
-    # Initial guesses
-    min_flow = 0
-    max_flow = 1000000  # kg/h, arbitrary large value
-
-    # RZM: Consider flow corresponding to 10m/s velocity as the max flow
-    best_flow = 0
-    best_diff = float('inf')
-    
-    # Create a copy of pipe parameters
-    pipe_params = {
-        "id": pipe.id,
-        "inner_diameter": pipe.D,
-        "length": pipe.L,
-        "roughness": pipe.epsilon,
-        "density": pipe.rho,
-        "viscosity_cp": pipe.mu_cp,
-    }
-    iterations = 0
+                   tol: float = 1e-5,
+                   rtol: float = 1e-10,
+                   warm_start: bool = True) -> Dict[str, Any]:
+    """
+    Case 3: Calculate maximum possible flow rate given pressure difference.
+
+    The flow is bracketed from a closed-form estimate (laminar and
+    fully-rough limits) and then refined with Brent's method on the
+    pressure-drop residual.  ``tol`` is the absolute residual tolerance
+    in Pa, ``rtol`` the relative tolerance on flow and on the residual
+    (scaled by the available pressure difference).
+
+    If the same pipe was solved before, the search starts instead from the
+    guess and bracket given by ``flow_rate_starts`` (see warmstart.py).
+    ``warm_start=False`` always starts cold.
+    """
     actual_drop = inlet_pressure - outlet_pressure
+    if actual_drop <= 0:
+        raise ValueError("Inlet pressure must exceed outlet pressure to calculate flow rate")
+
+    # A single scratch pipe is re-used for every residual evaluation
+    work = Pipe(
+        id=pipe.id,
+        inner_diameter=pipe.D,
+        length=pipe.L,
+        roughness=pipe.epsilon * 1000,
+        mass_flowrate=None,
+        density=pipe.rho,
+        viscosity_cp=pipe.mu_cp,
+        friction_method=pipe._method,
+    )
+    evaluations = 0
+
+    def residual(flow: float) -> float:
+        nonlocal evaluations
+        evaluations += 1
+        work.mass_flowrate = flow
+        work.Q = flow / 1000
+        return work.solve()["pressure_drop_Pa"] - actual_drop
+
+    ftol = max(tol, rtol * actual_drop)
+    key = WarmStartStore.key(pipe)
+    start = flow_rate_starts.lookup(key, actual_drop) if warm_start else None
+
+    # Bracket: zero flow has no pressure drop, the physics estimate is
+    # normally an upper bound; grow it geometrically if it is not.
+    lo, f_lo = 0.0, -actual_drop
+    if start is None:
+        hi = _flow_rate_estimate(pipe, actual_drop)
+        f_hi = residual(hi)
+    else:
+        lo, f_lo, hi, f_hi = _warm_bracket(start, residual, actual_drop)
+    while f_hi < 0 and evaluations < max_iter:
+        lo, f_lo = hi, f_hi
+        hi *= 4
+        f_hi = residual(hi)
+
+    if f_hi < 0:
+        best_flow, converged = hi, False
+    else:
+        best_flow, converged = _brent_root(
+            residual, lo, hi, f_lo, f_hi,
+            xtol=0.0, rtol=rtol, ftol=ftol,
+            max_iter=max(max_iter - evaluations, 1),
+        )
+
+    count("solver_iterations", evaluations)
+    observe_solves("brent", evaluations, 0 if converged else 1)
+    logger.debug("Pipe %s: flow %.6g kg/h after %d evaluations (converged=%s)",
+                 pipe.id, best_flow, evaluations, converged)
 
-    # RZM: boolean flag for iteration success
-    for _ in range(max_iter):
-        iterations += 1
-
-        test_flow = (min_flow + max_flow) / 2
-        pipe_params["mass_flowrate"] = test_flow
-        
-        test_pipe = Pipe(**pipe_params)
-        pipe_results = test_pipe.solve()
-        calculated_drop = pipe_results["pressure_drop_Pa"]
-        
-        diff = abs(calculated_drop - actual_drop)
-        
-        if diff <= tol:
-            break
-            
-        if calculated_drop < actual_drop:
-            min_flow = test_flow
-        else:
-            max_flow = test_flow
-            
-        if diff < best_diff:
-            best_diff = diff
-            best_flow = test_flow
-    
     # Update the original pipe with calculated flow rate
     pipe.mass_flowrate = best_flow
     pipe.Q = best_flow / 1000
     pipe_results = pipe.solve()
-    print(pipe_results)
-    print(best_flow)
-    print(iterations)
+    if converged and warm_start:
+        flow_rate_starts.remember(key, best_flow, pipe_results["pressure_drop_Pa"])
     return {
         **pipe_results,
         "inlet_pressure_Pa": inlet_pressure,
         "outlet_pressure_Pa": outlet_pressure,
-        "calculation_mode": "flow_rate"
+        "calculation_mode": "flow_rate",
+        "solver_method": "brent",
+        "solver_iterations": evaluations,
+        "solver_converged": converged,
+        "solver_residual_Pa": pipe_results["pressure_drop_Pa"] - actual_drop,
+    }
+
+
+@timed("solve")
+def solve_flow_rate_batch(pipes: PipeBatch,
+                          inlet_pressure: np.ndarray,
+                          outlet_pressure: np.ndarray,
+                          max_iter: int = 100,
+                          tol: float = 1e-5,
+                          rtol: float = 1e-10) -> Dict[str, np.ndarray]:
+    """
+    Case 3 for many pipes at once.  Same bracket as ``solve_flow_rate``,
+    refined with the Illinois variant of regula falsi, which vectorises
+    cleanly.  Only unconverged segments are re-evaluated each pass.
+
+    Returns arrays ``mass_flowrate``, ``iterations``, ``converged`` and
+    ``residual_Pa``; segments without a positive driving pressure get
+    NaN and ``converged=False``.
+    """
+    drop = np.broadcast_to(np.asarray(inlet_pressure, dtype=float)
+                           - np.asarray(outlet_pressure, dtype=float), (len(pipes),)).copy()
+    n = drop.size
+    ftol = np.maximum(tol, rtol * np.abs(drop))
+    valid = drop > 0
+
+    lo, f_lo = np.zeros(n), -drop
+    hi = np.where(valid, _flow_rate_estimate_array(pipes, np.where(valid, drop, 1.0)), np.nan)
+    f_hi = np.full(n, np.nan)
+    iterations = np.zeros(n, dtype=int)
+    f_hi[valid] = pipes.pressure_drop(hi[valid], valid) - drop[valid]
+    iterations[valid] += 1
+
+    grow = valid & (f_hi < 0)
+    while grow.any() and iterations.max() < max_iter:
+        lo[grow], f_lo[grow] = hi[grow], f_hi[grow]
+        hi[grow] *= 4
+        f_hi[grow] = pipes.pressure_drop(hi[grow], grow) - drop[grow]
+        iterations[grow] += 1
+        grow = valid & (f_hi < 0)
+
+    root = np.where(valid & (f_hi <= ftol), hi, np.nan)
+    residual = np.where(valid & (f_hi <= ftol), f_hi, np.nan)
+    done = ~valid | (f_hi <= ftol) | (f_hi < 0)
+    side = np.zeros(n, dtype=int)
+
+    while not done.all() and iterations.max() < max_iter:
+        a = ~done
+        x = hi[a] - f_hi[a] * (hi[a] - lo[a]) / (f_hi[a] - f_lo[a])
+        fx = pipes.pressure_drop(x, a) - drop[a]
+        iterations[a] += 1
+
+        idx = np.flatnonzero(a)
+        above = fx > 0
+        # replace the end point with the same sign; halve the stale one (Illinois)
+        upper, lower = idx[above], idx[~above]
+        hi[upper], f_hi[upper] = x[above], fx[above]
+        f_lo[upper[side[upper] == 1]] /= 2
+        side[upper] = 1
+        lo[lower], f_lo[lower] = x[~above], fx[~above]
+        f_hi[lower[side[lower] == -1]] /= 2
+        side[lower] = -1
+
+        root[idx], residual[idx] = x, fx
+        finished = (np.abs(fx) <= ftol[a]) | (hi[a] - lo[a] <= rtol * hi[a])
+        done[idx[finished]] = True
+
+    converged = valid & (np.abs(residual) <= ftol)
+    count("solver_iterations", int(iterations.sum()))
+    observe_solves("illinois", int(iterations.sum()), int(np.sum(valid & ~converged)),
+                   solves=int(valid.sum()))
+    return {
+        "mass_flowrate": root,
+        "iterations": iterations,
+        "converged": converged,
+        "residual_Pa": residual,
     }
 
 
+def _warm_bracket(start, residual, pressure_drop: float) -> Tuple[float, float, float, float]:
+    """
+    ``(lo, f_lo, hi, f_hi)`` around the warm-start guess: one evaluation at
+    the guess, the other end from the nearest stored pair on the far side
+    (its residual is known) or from zero flow.  ``f_hi < 0`` means the
+    upper end still has to be grown.
+    """
+    f_guess = residual(start.guess)
+    if f_guess >= 0:
+        lo, f_lo = start.below if start.below is not None else (0.0, 0.0)
+        return lo, f_lo - pressure_drop, start.guess, f_guess
+    if start.above is not None:
+        hi, f_hi = start.above
+        return start.guess, f_guess, hi, f_hi - pressure_drop
+    # Below the root: the laminar limit (ΔP ∝ ṁ) bounds the flow from above
+    hi = start.guess * (pressure_drop / (f_guess + pressure_drop))
+    return start.guess, f_guess, hi, residual(hi)
+
+
+def _flow_rate_estimate_array(pipes: PipeBatch, pressure_drop: np.ndarray) -> np.ndarray:
+    """Vectorised ``_flow_rate_estimate`` for a ``PipeBatch``."""
+    area = np.pi * (pipes.D / 2) ** 2
+    velocity = pressure_drop * pipes.D ** 2 / (32 * pipes.mu_pa_s * pipes.L)
+    rough = pipes.epsilon > 0
+    with np.errstate(divide="ignore"):
+        f_rough = 0.25 / np.log10(pipes.epsilon[rough] / (3.7 * pipes.D[rough])) ** 2
+    v_rough = np.sqrt(2 * pressure_drop[rough] * pipes.D[rough] / (f_rough * pipes.L[rough] * pipes.rho[rough]))
+    velocity[rough] = np.minimum(velocity[rough], v_rough)
+    return velocity * area * 3600 * 1000
+
+
+def _flow_rate_estimate(pipe: Pipe, pressure_drop: float) -> float:
+    """
+    Closed-form first guess for the mass flow (kg/h) that produces
+    ``pressure_drop``: the smaller of the Hagen–Poiseuille flow and the
+    fully-rough turbulent flow.  Both friction limits lie below the
+    real friction factor, so the estimate normally brackets the root.
+    """
+    area = math.pi * (pipe.D / 2) ** 2
+    v_laminar = pressure_drop * pipe.D ** 2 / (32 * pipe.mu_pa_s * pipe.L)
+    velocity = v_laminar
+
+    if pipe.epsilon > 0:
+        f_rough = 0.25 / math.log10(pipe.epsilon / (3.7 * pipe.D)) ** 2
+        v_rough = math.sqrt(2 * pressure_drop * pipe.D / (f_rough * pipe.L * pipe.rho))
+        velocity = min(v_laminar, v_rough)
+
+    # Pipe converts kg/h to m3/h with a fixed 1000 kg/m3
+    return velocity * area * 3600 * 1000
+
+
+def _brent_root(f, xa: float, xb: float, fa: float, fb: float, *,
+                xtol: float, rtol: float, ftol: float,
+                max_iter: int) -> Tuple[float, bool]:
+    """
+    Brent's method (inverse quadratic interpolation / secant with a
+    bisection safeguard) on a bracket with ``fa`` and ``fb`` of opposite
+    sign.  Returns ``(root, converged)``; ``f`` is not called for the
+    end points.  ``converged`` is False when the bracket shrinks below
+    the flow tolerance without the residual reaching ``ftol``.
+    """
+    xpre, xcur, fpre, fcur = xa, xb, fa, fb
+    xblk, fblk, spre, scur = 0.0, 0.0, 0.0, 0.0
+
+    if fpre * fcur > 0:
+        raise ValueError("Root is not bracketed")
+    if fpre == 0:
+        return xpre, True
+    if fcur == 0:
+        return xcur, True
+
+    for _ in range(max_iter):
+        if fpre != 0 and fcur != 0 and (fpre < 0) != (fcur < 0):
+            xblk, fblk = xpre, fpre
+            spre = scur = xcur - xpre
+        if abs(fblk) < abs(fcur):
+            xpre, xcur, xblk = xcur, xblk, xcur
+            fpre, fcur, fblk = fcur, fblk, fcur
+
+        delta = (xtol + rtol * abs(xcur)) / 2
+        sbis = (xblk - xcur) / 2
+        if fcur == 0 or abs(fcur) <= ftol:
+            return xcur, True
+        if abs(sbis) < delta:
+            # bracket collapsed onto a jump in f (e.g. the laminar limit)
+            return xcur, False
+
+        if abs(spre) > delta and abs(fcur) < abs(fpre):
+            if xpre == xblk:
+                # secant step
+                stry = -fcur * (xcur - xpre) / (fcur - fpre)
+            else:
+                # inverse quadratic interpolation
+                dpre = (fpre - fcur) / (xpre - xcur)
+                dblk = (fblk - fcur) / (xblk - xcur)
+                stry = -fcur * (fblk * dblk - fpre * dpre) / (dblk * dpre * (fblk - fpre))
+
+            if 2 * abs(stry) < min(abs(spre), 3 * abs(sbis) - delta):
+                spre, scur = scur, stry
+            else:
+                spre, scur = sbis, sbis
+        else:
+            spre, scur = sbis, sbis
+
+        xpre, fpre = xcur, fcur
+        if abs(scur) > delta:
+            xcur += scur
+        else:
+            xcur += delta if sbis > 0 else -delta
+        fcur = f(xcur)
+
+    return xcur, abs(fcur) <= ftol
+
+
+def columnar_results(results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Per-element result dicts as ``{"ids": [...], "columns": {field: [...]}}``;
+    ``columns[field][i]`` belongs to ``ids[i]`` and is null where element
+    ``i`` has no such field.
+    """
+    ids = list(results)
+    columns: Dict[str, List[Any]] = {}
+    for i, record in enumerate(results.values()):
+        for field, value in record.items():
+            column = columns.get(field)
+            if column is None:
+                column = columns[field] = [None] * len(ids)
+            column[i] = value
+    return {"ids": ids, "columns": columns}
+
+
 def to_float(value: Any) -> Optional[float]:
     """Safely convert to float, preserving None"""
     try:
@@ -204,33 +451,62 @@ def to_float(value: Any) -> Optional[float]:
         return None
 
 
+def pipe_index(graph: FlowsheetGraph, pipe_id: Any, purpose: str) -> int:
+    """
+    Edge index of pipe ``pipe_id``, which may be None when the flowsheet
+    has one pipe.  ``purpose`` completes "name the one to ..." in the error.
+    """
+    if pipe_id is None:
+        if graph.n_edges != 1:
+            raise ValueError(f"Flowsheet has several pipes; name the one to {purpose} with 'pipe'")
+        return 0
+    if pipe_id not in graph.edge_index:
+        raise ValueError(f"Unknown pipe '{pipe_id}'")
+    return graph.edge_index[pipe_id]
+
+
+def boundary_pressures(graph: FlowsheetGraph, k: int) -> Tuple[Optional[float], Optional[float]]:
+    """Inlet pressure of a feed source / outlet pressure of a product target of pipe ``k`` (Pa)."""
+    def pressure(i: int, node_type: str) -> Optional[float]:
+        value = graph.node_pressure[i]
+        return float(value) * 1000 if graph.node_types[i] == node_type and np.isfinite(value) else None
+
+    return pressure(int(graph.src[k]), "feed"), pressure(int(graph.dst[k]), "product")
+
+
 # ──────────────────────────────────────────────────────────
 # Improved Flowsheet Execution
 # ──────────────────────────────────────────────────────────
-def execute_flowsheet_extended(flowsheet: Dict[str, Any]) -> Dict[str, Any]:
-    nodes_raw = {n["id"]: n for n in flowsheet["nodes"]}
-    edges = flowsheet["edges"]
-    order = traversal_order(flowsheet["nodes"], edges)
+def execute_flowsheet_extended(flowsheet: Dict[str, Any], layout: str = "records") -> Dict[str, Any]:
+    return execute_graph(FlowsheetGraph.from_flowsheet(flowsheet), layout)
+
 
-    validate_order(order, nodes_raw, edges)
+def execute_graph(graph: FlowsheetGraph, layout: str = "records") -> Dict[str, Any]:
+    """
+    ``execute_flowsheet_extended`` for an already compiled flowsheet.
+    ``layout="columnar"`` returns ``results`` as ``columnar_results``.
+    """
+    order = graph.order
+
+    if not is_single_pipe(graph):
+        # Anything beyond a single feed → pipe → product goes to the network solver
+        # (imported here because network builds on this module)
+        from network import execute_network
+        return execute_network(graph, layout)
+
+    pipe_index = validate_order(graph)
+    graph = fill_properties(graph)
 
     results: Dict[str, Any] = {}
 
     feed_id = order[0]
     product_id = order[1]
-    pipe_edge = next((e for e in edges if e["source"] == feed_id and e["target"] == product_id), None)
-
-    if not pipe_edge:
-        return {"error": "No connecting edge (pipe) found", "order": order, "results": {}, "calculation_mode": "error"}
+    pipe_id = graph.edge_ids[pipe_index]
 
     # Extract component data
-    feed_data = nodes_raw[feed_id]["data"]
-    product_data = nodes_raw[product_id]["data"]
-    pipe_data = pipe_edge["data"]  # from edge now
-
-    feed_params = feed_data.get("params", {})
-    product_params = product_data.get("params", {})
-    pipe_params = pipe_data
+    feed_params = graph.node_params[0]
+    product_params = graph.node_params[1]
+    pipe_params = graph.edge_data[pipe_index]  # from edge now
 
     # Create component instances
     feed = Feed(
@@ -240,7 +516,7 @@ def execute_flowsheet_extended(flowsheet: Dict[str, Any]) -> Dict[str, Any]:
     )
 
     pipe = Pipe(
-        id=pipe_edge["id"],
+        id=pipe_id,
         inner_diameter=to_float(pipe_params.get("diameter", 0)),
         length=to_float(pipe_params.get("length", 0)),
         roughness=to_float(pipe_params.get("roughness", 0)),
@@ -281,7 +557,7 @@ def execute_flowsheet_extended(flowsheet: Dict[str, Any]) -> Dict[str, Any]:
             "fluid_type": feed.fluid_type
         }
 
-        results[pipe_edge["id"]] = {
+        results[pipe_id] = {
             "node_type": "pipe",
             **pipe_results
         }
@@ -293,12 +569,21 @@ def execute_flowsheet_extended(flowsheet: Dict[str, Any]) -> Dict[str, Any]:
             "pressure_drop_Pa": pipe_results.get("pressure_drop_Pa")
         }
 
+        if layout == "columnar":
+            return {
+                "order": order,
+                "results": columnar_results(results),
+                "calculation_mode": mode.name,
+                "layout": layout,
+            }
         return {
             "order": order,
             "results": results,
             "calculation_mode": mode.name
         }
 
+    except ValueError:
+        raise                       # bad input: HTTP 400 from the endpoints
     except Exception as e:
         return {
             "error": str(e),
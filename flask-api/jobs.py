@@ -0,0 +1,245 @@
+"""
+jobs.py
+-------------------
+Background jobs for solves that should not hold an HTTP request open.
+
+A job is either one flowsheet (same report as ``/api/run``) or a batch
+payload (same scenarios as ``/api/run/batch``).  Batches are cut into
+chunks that are solved one after another – each chunk still gets the
+column-wise / warm-started batch solver – and every finished chunk is
+published at once, so clients can render partial results while the rest
+is computing.  Heavy chunks go through the shared ``SolveExecutor`` and
+therefore run in the process pool.
+
+Each job keeps an append-only event log (progress, partial results,
+completion) that ``JobStore.events`` replays and then follows; the API
+serves it as Server-Sent Events.
+
+Jobs live in the memory of one worker process, like sessions: behind
+several gunicorn workers route a job's follow-up requests to the same
+worker, or run a single (threaded) worker for the job API.
+"""
+
+from __future__ import annotations
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import codec
+from batch import execute_batch
+from executor import SolveExecutor, SolverBusy, batch_cost, flowsheet_cost
+from helpers import execute_flowsheet_extended
+from validation import check_flowsheet, check_payload
+
+JOB_MAX_SCENARIOS = 100_000
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = {SUCCEEDED, FAILED, CANCELLED}
+
+
+class Job:
+    """State, results and event log of one background solve."""
+
+    def __init__(self, kind: str, payload: Dict[str, Any], chunks: List[Dict[str, Any]], total: int) -> None:
+        self.id = uuid.uuid4().hex
+        self.kind = kind                        # "run" | "batch"
+        self.payload = payload
+        self.chunks = chunks
+        self.total = total
+        self.done = 0
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.report: Optional[Dict[str, Any]] = None           # "run" jobs
+        self.scenarios: List[Dict[str, Any]] = []              # "batch" jobs, in order
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.cancel_requested = False
+        self._events: List[Tuple[str, Dict[str, Any]]] = []
+        self._changed = threading.Condition()
+
+    def status_dict(self) -> Dict[str, Any]:
+        status = {
+            "job": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total},
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+        if self.error:
+            status["error"] = self.error
+        return status
+
+    def result(self) -> Dict[str, Any]:
+        if self.kind == "run":
+            return self.report or {}
+        return {"scenarios": self.scenarios}
+
+    # ─── event log ────────────────
+    def _publish(self, event: str, data: Dict[str, Any]) -> None:
+        with self._changed:
+            self._events.append((event, data))
+            self._changed.notify_all()
+
+    def _finish(self, status: str, error: Optional[str] = None) -> None:
+        """Sets the final status and logs "done" under one lock, so readers see both or neither."""
+        with self._changed:
+            self.status, self.error, self.finished = status, error, time.time()
+            self.chunks = []                                    # free the inputs
+            self._events.append(("done", self.status_dict()))
+            self._changed.notify_all()
+
+    def events(self, after: int = -1, heartbeat: float = 15.0) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+        """
+        Yields ``(id, event, data)`` from event ``after + 1`` on, waiting for
+        new ones until the job finishes.  ``(-1, "heartbeat", {})`` is yielded
+        when nothing happened for ``heartbeat`` seconds.
+        """
+        index = after + 1
+        while True:
+            with self._changed:
+                if index >= len(self._events) and self.status not in FINISHED:
+                    self._changed.wait(heartbeat)
+                pending = self._events[index:]
+                finished = self.status in FINISHED
+            if not pending and not finished:
+                yield -1, "heartbeat", {}
+            for event, data in pending:
+                yield index, event, data
+                index += 1
+            if finished and index >= len(self._events):
+                return
+
+
+class JobStore:
+    """Runs jobs on a few background threads and keeps them for ``ttl`` seconds."""
+
+    def __init__(self,
+                 executor: SolveExecutor,
+                 max_running: int = 2,
+                 max_jobs: int = 1000,
+                 ttl: float = 3600.0,
+                 chunk_size: int = 256) -> None:
+        self.executor = executor
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.chunk_size = chunk_size
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = ThreadPoolExecutor(max_running, thread_name_prefix="solver-job")
+
+    # ──────────────────────────────
+    # ─── Public API ───────────────
+    # ──────────────────────────────
+    def submit(self, payload: Dict[str, Any]) -> Job:
+        """Queues a flowsheet or batch payload; malformed shapes raise ``ValueError``."""
+        job = self._make_job(payload)
+        with self._lock:
+            self._expire()
+            active = sum(j.status not in FINISHED for j in self._jobs.values())
+            if active >= self.max_jobs:
+                raise SolverBusy(f"Too many unfinished jobs ({active})")
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                oldest = next((jid for jid, j in self._jobs.items() if j.status in FINISHED), None)
+                if oldest is None:
+                    break
+                del self._jobs[oldest]
+        job._publish("progress", {"done": 0, "total": job.total})
+        self._threads.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Stops a job before its next chunk; a chunk already solving runs to the end."""
+        job = self.get(job_id)
+        if job is not None and job.status not in FINISHED:
+            job.cancel_requested = True
+        return job
+
+    def _expire(self) -> None:
+        """Caller holds the lock."""
+        cutoff = time.time() - self.ttl
+        for job_id in [jid for jid, j in self._jobs.items()
+                       if j.finished is not None and j.finished < cutoff]:
+            del self._jobs[job_id]
+
+    # ──────────────────────────────
+    # ─── Work ─────────────────────
+    # ──────────────────────────────
+    def _make_job(self, payload: Dict[str, Any]) -> Job:
+        if "nodes" in payload and "edges" in payload:
+            check_flowsheet(payload)
+            return Job("run", payload, [payload], 1)
+
+        if isinstance(payload.get("flowsheets"), list):
+            items, key, base = payload["flowsheets"], "flowsheets", {}
+        elif isinstance(payload.get("flowsheet"), dict) and isinstance(payload.get("scenarios"), list):
+            items, key, base = payload["scenarios"], "scenarios", {"flowsheet": payload["flowsheet"]}
+        else:
+            raise ValueError("Job payload must be a flowsheet ('nodes' and 'edges') or a batch "
+                             "('flowsheets', or 'flowsheet' with 'scenarios')")
+        if len(items) > JOB_MAX_SCENARIOS:
+            raise ValueError(f"At most {JOB_MAX_SCENARIOS} scenarios per job, got {len(items)}")
+        check_payload(payload)
+
+        size = self.chunk_size
+        chunks = [{**base, key: items[i:i + size]} for i in range(0, len(items), size)] or [{**base, key: []}]
+        return Job("batch", payload, chunks, len(items))
+
+    def _run(self, job: Job) -> None:
+        job.status, job.started = RUNNING, time.time()
+        status, error = FAILED, None
+        try:
+            for chunk in job.chunks:
+                if job.cancel_requested:
+                    status = CANCELLED
+                    break
+                if job.kind == "run":
+                    job.report = self._solve(execute_flowsheet_extended, chunk, flowsheet_cost(chunk))
+                    job.done = 1
+                    job._publish("result", job.report)
+                else:
+                    offset = len(job.scenarios)
+                    scenarios = self._solve(execute_batch, chunk, batch_cost(chunk))["scenarios"]
+                    job.scenarios.extend(scenarios)
+                    job.done = len(job.scenarios)
+                    job._publish("partial", {"offset": offset, "scenarios": scenarios})
+                job._publish("progress", {"done": job.done, "total": job.total})
+            else:
+                status = SUCCEEDED
+        except ValueError as exc:
+            status, error = FAILED, str(exc)
+        except Exception as exc:                               # noqa: BLE001
+            status, error = FAILED, f"Internal error: {exc.__class__.__name__}"
+        finally:
+            job._finish(status, error)
+
+    def _solve(self, func, payload: Dict[str, Any], cost: int) -> Dict[str, Any]:
+        """``executor.run`` that waits out a full pool instead of failing the job."""
+        delay = 0.1
+        while True:
+            try:
+                return self.executor.run(func, payload, cost=cost)
+            except SolverBusy:
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+
+def sse_stream(job: Job, after: int = -1) -> Iterator[str]:
+    """Formats a job's event log as a Server-Sent Events stream."""
+    for event_id, event, data in job.events(after):
+        if event == "heartbeat":
+            yield ": keep-alive\n\n"
+            continue
+        payload = codec.dumps(data).decode()
+        yield f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,146 @@
+"""
+metrics.py
+-------------------
+Prometheus metrics for the solver service.
+
+  • request latency per endpoint and calculation mode (histogram)
+  • in-flight requests per endpoint (gauge)
+  • error responses per endpoint and status – 400 for rejected input
+    (ValueError), 500 for internal failures
+  • solver solves, iterations and convergence failures per method
+  • result-cache lookups by outcome (hit ratio = hits / all lookups)
+  • flow-rate warm-start lookups by outcome
+
+Under gunicorn every worker has its own counters.  Point
+``PROMETHEUS_MULTIPROC_DIR`` at an empty directory before the workers
+start (``gunicorn.conf.py`` clears it and reaps dead workers) and the
+scrape endpoint sums all workers; without it the process's own values
+are reported.
+
+Solves bigger than ``SOLVER_INLINE_MAX_COST`` run in the solve pool's
+child processes.  In multiprocess mode those write their own files and
+are summed like any worker.  Otherwise ``SolveExecutor`` returns the
+solver counters a pooled solve moved together with its result and adds
+them here (``solver_counts`` / ``add_solver_counts``), so large solves
+are counted either way.
+"""
+
+from __future__ import annotations
+import os
+from typing import Dict, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    "solver_request_duration_seconds",
+    "Wall time of API requests",
+    ["endpoint", "calculation_mode"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+             0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "solver_requests_in_flight",
+    "Requests currently being handled",
+    ["endpoint"],
+    multiprocess_mode="livesum",
+)
+REQUEST_ERRORS = Counter(
+    "solver_request_errors_total",
+    "Error responses (400: invalid input, 500: internal failure)",
+    ["endpoint", "status"],
+)
+SOLVES = Counter(
+    "solver_solves_total",
+    "Iterative solves (brent: single-pipe flow rate, illinois: batched "
+    "flow rate, newton: network)",
+    ["method"],
+)
+SOLVER_ITERATIONS = Counter(
+    "solver_iterations_total",
+    "Iterations (residual evaluations for brent/illinois) summed over solves",
+    ["method"],
+)
+SOLVER_FAILURES = Counter(
+    "solver_nonconverged_total",
+    "Solves that stopped without meeting their tolerance",
+    ["method"],
+)
+CACHE_LOOKUPS = Counter(
+    "solver_cache_lookups_total",
+    "Result-cache lookups by outcome",
+    ["result"],
+)
+WARM_START_LOOKUPS = Counter(
+    "solver_warm_start_lookups_total",
+    "Flow-rate warm-start lookups by outcome (hit: pipe seen before)",
+    ["result"],
+)
+
+
+def observe_solves(method: str, iterations: int, failures: int, solves: int = 1) -> None:
+    """Records ``solves`` finished solves of ``method``."""
+    SOLVES.labels(method).inc(solves)
+    SOLVER_ITERATIONS.labels(method).inc(iterations)
+    if failures:
+        SOLVER_FAILURES.labels(method).inc(failures)
+
+
+def observe_cache(hit: bool) -> None:
+    CACHE_LOOKUPS.labels("hit" if hit else "miss").inc()
+
+
+_WARM_START_HIT = WARM_START_LOOKUPS.labels("hit")
+_WARM_START_MISS = WARM_START_LOOKUPS.labels("miss")
+
+
+def observe_warm_start(hit: bool) -> None:
+    # called once per single-pipe flow-rate solve: skip the label lookup
+    (_WARM_START_HIT if hit else _WARM_START_MISS).inc()
+
+
+# Incremented by solver code, i.e. possibly inside a pool process
+_SOLVER_COUNTERS = (SOLVES, SOLVER_ITERATIONS, SOLVER_FAILURES, WARM_START_LOOKUPS)
+
+SolverCounts = Dict[Tuple[int, Tuple[str, ...]], float]
+
+
+def solver_counts() -> SolverCounts:
+    """
+    Current solver counter values by (counter, label values).  Empty in
+    multiprocess mode, where every process already reports its own.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return {}
+    counts: SolverCounts = {}
+    for n, counter in enumerate(_SOLVER_COUNTERS):
+        for family in counter.collect():
+            for sample in family.samples:
+                if sample.name.endswith("_total"):
+                    counts[(n, tuple(sample.labels.values()))] = sample.value
+    return counts
+
+
+def add_solver_counts(counts: SolverCounts) -> None:
+    """Adds counter increments made in another process (see ``solver_counts``)."""
+    for (n, labels), value in counts.items():
+        if value:
+            _SOLVER_COUNTERS[n].labels(*labels).inc(value)
+
+
+def render() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, plus its content type."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
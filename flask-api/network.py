@@ -0,0 +1,902 @@
+"""
+network.py
+-------------------
+General steady-state solver for flowsheets with any number of feeds,
+products, pipes, multi-segment lines, splitters, pumps and valves.
+
+Every port pressure and every pipe flow is an unknown.  The equations are
+  • one head relation per pipe           P_source − P_target − ΔP(ṁ) = 0
+  • one mass balance per internal node   Σṁ_in − Σṁ_out = 0
+  • one head relation per pump / valve   P_out − P_in − ΔP_element(ṁ) = 0
+  • one equation per specified value     (feed/product pressure, pipe flow)
+and the whole system is solved at once with Newton–Raphson on a sparse
+Jacobian.  Pipe residuals are evaluated for all edges in one vectorised
+call to :class:`PipeBatch`.
+"""
+
+from __future__ import annotations
+import warnings
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import spsolve
+
+from components.Line import Line, element_pressure_drop
+from components.PipeBatch import PipeBatch
+from components.Pump import Pump, pump_pressure_change
+from components.Valve import Valve, valve_pressure_change
+from fluids import fill_properties
+from graph import FlowsheetGraph
+from helpers import CalculationMode
+from metrics import observe_solves
+from timing import count, timed
+
+BOUNDARY_TYPES = {"feed", "product"}
+JUNCTION_TYPES = {"splitter"}
+TWO_PORT_TYPES = {"pump", "valve"}
+
+# Reynolds numbers where PipeBatch switches friction correlation; ΔP(ṁ)
+# jumps there (see ``Network.solve``)
+REGIME_JUMPS = (2000.0, 4000.0)
+WIDE_BRIDGE = 0.05              # relative flow half-width of the first-pass ramps
+NARROW_BRIDGE = 1e-6            # … of the ramps that hold pipes on a jump
+HOLD_ROUNDS = 4
+HOLD_ITERATIONS = 10
+
+
+# Two-port element models (``from_params(id, params, density)``)
+TWO_PORT_MODELS = {
+    "pump": Pump,
+    "valve": Valve,
+}
+
+
+# ──────────────────────────────────────────────────────────
+# Network assembly
+# ──────────────────────────────────────────────────────────
+# Pipes held on a regime jump: (edge indices, ramp lower-end flow,
+# ΔP there, ramp slope) – see ``Network._ramps``
+_Held = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+@dataclass
+class NetworkSolution:
+    pressures: np.ndarray       # Pa, one per port
+    flows: np.ndarray           # kg/h, one per pipe edge (signed)
+    iterations: int
+    converged: bool
+    residual: float             # scaled infinity norm
+    held: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.intp))
+                                # pipes held at a regime jump (edge indices)
+
+    @property
+    def state(self) -> np.ndarray:
+        """Unknown vector in solver layout, usable as ``x0`` for a warm start."""
+        return np.concatenate([self.pressures, self.flows])
+
+
+class Network:
+    """
+    A flowsheet compiled into index arrays.  Built once from a
+    :class:`FlowsheetGraph`; ``solve`` can then be called repeatedly
+    (e.g. warm-started from a previous state).
+    """
+
+    @timed("build")
+    def __init__(self, graph: FlowsheetGraph) -> None:
+        if graph.missing:
+            raise ValueError(f"Edges reference unknown nodes: {graph.missing}")
+
+        graph = fill_properties(graph)
+        self.graph = graph
+        self.order = graph.order
+        self.node_ids = graph.order
+        self.edge_ids = graph.edge_ids
+        self.node_types = graph.node_types
+        self.node_params = graph.node_params
+        for nid, ntype in zip(self.node_ids, self.node_types):
+            if ntype not in BOUNDARY_TYPES | JUNCTION_TYPES | TWO_PORT_TYPES:
+                raise ValueError(f"Unsupported node type '{ntype}' for node {nid}")
+
+        self.src, self.dst = graph.src, graph.dst
+        self._is_two_port = np.array([t in TWO_PORT_TYPES for t in self.node_types], dtype=bool)
+        self._is_boundary = np.array([t in BOUNDARY_TYPES for t in self.node_types], dtype=bool)
+        self._is_junction = np.array([t in JUNCTION_TYPES for t in self.node_types], dtype=bool)
+
+        self._check_connections()
+        self._build_pipes()
+        self._build_ports()
+        self._build_specs()
+        self._build_two_ports()
+        self._build_layout()
+
+    @classmethod
+    def from_flowsheet(cls, flowsheet: Dict[str, Any]) -> "Network":
+        return cls(FlowsheetGraph.from_flowsheet(flowsheet))
+
+    # ──────────────────────────────
+    # ─── Build steps ──────────────
+    # ──────────────────────────────
+    def _check_connections(self) -> None:
+        n_in, n_out = self.graph.in_degree(), self.graph.out_degree()
+        is_feed = np.array([t == "feed" for t in self.node_types], dtype=bool)
+        bad = (
+            (is_feed & (n_in > 0))
+            | (self._is_boundary & ~is_feed & (n_out > 0))
+            | (self._is_two_port & ((n_in != 1) | (n_out != 1)))
+            | (self._is_junction & ((n_in == 0) | (n_out == 0)))
+        )
+        if not bad.any():
+            return
+
+        i = int(np.argmax(bad))
+        nid, ntype = self.node_ids[i], self.node_types[i]
+        if ntype == "feed":
+            raise ValueError(f"Feed {nid} cannot have incoming pipes")
+        if ntype == "product":
+            raise ValueError(f"Product {nid} cannot have outgoing pipes")
+        if ntype in TWO_PORT_TYPES:
+            raise ValueError(
+                f"{ntype.capitalize()} {nid} needs exactly one inlet and one outlet pipe"
+            )
+        raise ValueError(f"Splitter {nid} needs at least one inlet and one outlet pipe")
+
+    def _build_pipes(self) -> None:
+        columns = {key: self.graph.columns[key]
+                   for key in ("diameter", "length", "roughness", "density", "viscosity")}
+        lines = {k: Line.from_params(self.edge_ids[k], data)
+                 for k, data in enumerate(self.graph.edge_data) if "segments" in data}
+        if lines:
+            # a line reports as its first pipe segment over its whole straight length
+            columns = {key: column.copy() for key, column in columns.items()}
+            for k, line in lines.items():
+                columns["diameter"][k] = line.reference_diameter
+                columns["length"][k] = line.pipe_length
+                columns["roughness"][k] = line.reference_roughness
+        invalid = np.zeros((len(self.edge_ids), len(columns)), dtype=bool)
+        for j, (key, column) in enumerate(columns.items()):
+            invalid[:, j] = ~(column >= 0) | ((column == 0) & (key != "roughness"))
+        if invalid.any():
+            k, j = np.unravel_index(np.argmax(invalid), invalid.shape)
+            raise ValueError(f"Pipe {self.edge_ids[k]} has an invalid '{list(columns)[j]}'")
+
+        self.pipes = PipeBatch(
+            inner_diameter=columns["diameter"],
+            length=columns["length"],
+            roughness=columns["roughness"],
+            mass_flowrate=0.0,
+            density=columns["density"],
+            viscosity_cp=columns["viscosity"],
+            ids=self.edge_ids,
+        )
+        # Below Re = 1 the pipe is laminar and ΔP is linear in ṁ; using that
+        # line avoids dividing by zero at ṁ = 0.  Re = ṁ / _m_floor throughout.
+        area = np.pi * (self.pipes.D / 2) ** 2
+        self._m_floor = self.pipes.mu_pa_s * area * 3600 * 1000 / (self.pipes.rho * self.pipes.D)
+        self._build_lines(lines)
+
+    def _build_lines(self, lines: Dict[int, Line]) -> None:
+        """
+        Multi-segment lines: every (diameter, roughness) element of every
+        line becomes one row of ``_elements``, so all lines are evaluated in
+        one vectorised call and summed per edge.  The line edges' own pipe
+        rows get a NaN floor, which keeps them out of the regime-jump
+        handling of single pipes.
+        """
+        self.lines = lines
+        self._line_edges = np.fromiter(lines, dtype=np.intp, count=len(lines))
+        self._static = np.zeros(len(self.edge_ids))
+        if not lines:
+            return
+
+        sizes = [line.diameters.size for line in lines.values()]
+        self._element_edge = np.repeat(self._line_edges, sizes)
+        self._elements = PipeBatch(
+            inner_diameter=np.concatenate([line.diameters for line in lines.values()]),
+            length=np.concatenate([line.lengths for line in lines.values()]),
+            roughness=np.concatenate([line.roughness for line in lines.values()]),
+            mass_flowrate=0.0,
+            density=self.pipes.rho[self._element_edge],
+            viscosity_cp=self.pipes.mu_cp[self._element_edge],
+        )
+        self._element_k = np.concatenate([line.k for line in lines.values()])
+        elements = self._elements
+        area = np.pi * (elements.D / 2) ** 2
+        self._element_floor = elements.mu_pa_s * area * 3600 * 1000 / (elements.rho * elements.D)
+        self._static[self._line_edges] = [line.static_pressure(self.pipes.rho[k])
+                                          for k, line in lines.items()]
+        self._m_floor[self._line_edges] = np.nan
+
+    def _build_ports(self) -> None:
+        """Pumps and valves get separate inlet/outlet pressures, other nodes one."""
+        width = 1 + self._is_two_port.astype(np.intp)
+        self.in_port = np.cumsum(width) - width
+        self.out_port = self.in_port + width - 1
+        self.n_ports = int(width.sum())
+        self.n_unknowns = self.n_ports + len(self.edge_ids)
+
+    def _build_specs(self) -> None:
+        pressure = self.graph.node_pressure
+        specified = np.flatnonzero(self._is_boundary & ~np.isnan(pressure))
+        self.pressure_spec_nodes = specified
+        self.pressure_specs: List[Tuple[int, float]] = list(zip(       # (port, Pa)
+            self.in_port[specified].tolist(), (pressure[specified] * 1000).tolist()))
+
+        flow = self.graph.columns["massFlowRate"]
+        specified = np.flatnonzero(~np.isnan(flow))
+        self.flow_specs: List[Tuple[int, float]] = list(zip(           # (edge, kg/h)
+            specified.tolist(), flow[specified].tolist()))
+
+        n_boundary = int(self._is_boundary.sum())
+        n_specs = len(self.pressure_specs) + len(self.flow_specs)
+        if n_specs != n_boundary:
+            raise ValueError(
+                f"Network has {n_boundary} feeds/products but {n_specs} specified values "
+                "(feed/product pressures and pipe flow rates); exactly one is needed per feed or product"
+            )
+        if not self.pressure_specs:
+            raise ValueError("At least one feed or product pressure must be specified")
+
+    def _build_two_ports(self) -> None:
+        """
+        Pump and valve models, plus their parameters as arrays so that every
+        element is evaluated in one expression per Newton step.
+        """
+        self.two_ports: List[Tuple[int, Any]] = []       # (node index, Pump | Valve)
+        for i in np.flatnonzero(self._is_two_port).tolist():
+            inlet = self.graph.incoming(i)[0]
+            model = TWO_PORT_MODELS[self.node_types[i]].from_params(
+                self.node_ids[i], self.node_params[i], float(self.pipes.rho[inlet]))
+            self.two_ports.append((i, model))
+
+        pumps = [(j, model) for j, (_, model) in enumerate(self.two_ports) if isinstance(model, Pump)]
+        valves = [(j, model) for j, (_, model) in enumerate(self.two_ports) if isinstance(model, Valve)]
+        n = len(self.two_ports)
+        self._tp_rise, self._tp_c = np.zeros(n), np.zeros(n)
+        self._tp_head = np.zeros((3, n))                  # a0, a1, a2 per element
+        self._tp_rho, self._tp_speed = np.ones(n), np.ones(n)
+        for j, pump in pumps:
+            self._tp_rise[j] = pump.pressure_rise
+            self._tp_head[:, j] = pump.coefficients
+            self._tp_rho[j], self._tp_speed[j] = pump.rho, pump.speed
+        for j, valve in valves:
+            self._tp_c[j] = valve.c
+
+    def _build_layout(self) -> None:
+        """
+        Fixes the row order of the equation system and pre-assembles every
+        Jacobian entry that does not depend on the state (the ±1 incidence
+        terms).  Rows: pipes | mass balances | pump/valve heads | specs.
+        """
+        n_e, n_p = len(self.edge_ids), self.n_ports
+        edge_rows = np.arange(n_e)
+        self._up = self.out_port[self.src]
+        self._down = self.in_port[self.dst]
+
+        balanced = ~self._is_boundary
+        balance_row = np.full(len(self.node_ids), -1)
+        balance_row[balanced] = n_e + np.arange(balanced.sum())
+        self._n_balance = int(balanced.sum())
+        into, outof = balance_row[self.dst], balance_row[self.src]
+        self._into_mask, self._out_mask = into >= 0, outof >= 0
+        self._into_rows, self._out_rows = into[self._into_mask], outof[self._out_mask]
+
+        row = n_e + self._n_balance
+        tp_nodes = np.array([i for i, _ in self.two_ports], dtype=int)
+        self._tp_rows = row + np.arange(tp_nodes.size)
+        self._tp_in = self.in_port[tp_nodes]
+        self._tp_out = self.out_port[tp_nodes]
+        self._tp_edge = self.graph.in_edges[self.graph.in_ptr[tp_nodes]]
+        row += tp_nodes.size
+
+        self._p_spec_ports = np.array([port for port, _ in self.pressure_specs], dtype=int)
+        self._p_spec_values = np.array([v for _, v in self.pressure_specs], dtype=float)
+        self._p_spec_rows = row + np.arange(self._p_spec_ports.size)
+        row += self._p_spec_ports.size
+        self._f_spec_edges = np.array([k for k, _ in self.flow_specs], dtype=int)
+        self._f_spec_values = np.array([v for _, v in self.flow_specs], dtype=float)
+        self._f_spec_rows = row + np.arange(self._f_spec_edges.size)
+        row += self._f_spec_edges.size
+
+        ones = lambda a: np.ones(a.size)
+        self._const_rows = np.concatenate([
+            edge_rows, edge_rows,
+            self._into_rows, self._out_rows,
+            self._tp_rows, self._tp_rows,
+            self._p_spec_rows, self._f_spec_rows,
+        ])
+        self._const_cols = np.concatenate([
+            self._up, self._down,
+            n_p + edge_rows[self._into_mask], n_p + edge_rows[self._out_mask],
+            self._tp_out, self._tp_in,
+            self._p_spec_ports, n_p + self._f_spec_edges,
+        ])
+        self._const_vals = np.concatenate([
+            ones(edge_rows), -ones(edge_rows),
+            ones(self._into_rows), -ones(self._out_rows),
+            ones(self._tp_rows), -ones(self._tp_rows),
+            ones(self._p_spec_rows), ones(self._f_spec_rows),
+        ])
+        self._var_rows = np.concatenate([edge_rows, self._tp_rows])
+        self._var_cols = n_p + np.concatenate([edge_rows, self._tp_edge])
+
+    # ──────────────────────────────
+    # ─── Residual & Jacobian ──────
+    # ──────────────────────────────
+    def _pipe_pressure_drop(self, m: np.ndarray,
+                            bridge: float = NARROW_BRIDGE,
+                            held: Optional[_Held] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Signed ΔP (Pa) and dΔP/dṁ for every pipe at signed flows ``m``.
+        Each regime jump is bridged by a straight ramp across flows within
+        ``bridge`` (relative) of the jump; ``held`` pipes follow their
+        ramp at any flow.
+        """
+        a = np.maximum(np.abs(m), self._m_floor)
+        h = 1e-7
+        dp = self.pipes.pressure_drop(a)
+        slope = (self.pipes.pressure_drop(a * (1 + h)) - dp) / (a * h)
+
+        for reynolds in REGIME_JUMPS:
+            critical = self._m_floor * reynolds
+            inside = np.flatnonzero(np.abs(a - critical) < bridge * critical)
+            if inside.size:
+                lo, drop, ramp = self._ramps(inside, reynolds, bridge)
+                dp[inside] = drop + ramp * (a[inside] - lo)
+                slope[inside] = ramp
+        if held is not None:
+            k, lo, drop, ramp = held
+            dp[k] = drop + ramp * (a[k] - lo)
+            slope[k] = ramp
+
+        small = np.abs(m) < self._m_floor
+        slope[small] = dp[small] / a[small]
+        dp[small] = slope[small] * np.abs(m[small])
+        if not self.lines:
+            return np.sign(m) * dp, slope
+
+        k = self._line_edges
+        dp[k], slope[k] = self._line_pressure_drop(np.abs(m), bridge)
+        return np.sign(m) * dp + self._static, slope
+
+    def _line_pressure_drop(self, a: np.ndarray, bridge: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Friction ΔP (Pa) and dΔP/dṁ of every line at flows ``a`` (kg/h, ≥ 0,
+        one per edge): each element as in ``_pipe_pressure_drop`` – floored,
+        ramped across regime jumps, linear below Re = 1 – then summed per line.
+        """
+        floor = self._element_floor
+        m = a[self._element_edge]
+        e = np.maximum(m, floor)
+        h = 1e-7
+        dp = self._element_drop(e)
+        slope = (self._element_drop(e * (1 + h)) - dp) / (e * h)
+
+        for reynolds in REGIME_JUMPS:
+            critical = floor * reynolds
+            inside = np.flatnonzero(np.abs(e - critical) < bridge * critical)
+            if inside.size:
+                lo, hi = critical[inside] * (1 - bridge), critical[inside] * (1 + bridge)
+                drop = self._element_drop(lo, inside)
+                ramp = (self._element_drop(hi, inside) - drop) / (hi - lo)
+                dp[inside] = drop + ramp * (e[inside] - lo)
+                slope[inside] = ramp
+
+        small = m < floor
+        slope[small] = dp[small] / e[small]
+        dp[small] = slope[small] * m[small]
+        n_e = len(self.edge_ids)
+        k = self._line_edges
+        return (np.bincount(self._element_edge, dp, minlength=n_e)[k],
+                np.bincount(self._element_edge, slope, minlength=n_e)[k])
+
+    def _element_drop(self, m: np.ndarray, index: Optional[np.ndarray] = None) -> np.ndarray:
+        """Friction plus minor-loss ΔP (Pa) of line elements ``index`` (all by default)."""
+        return element_pressure_drop(self._elements, self._element_k, m, index)
+
+    def _ramps(self, k: np.ndarray, reynolds: float, bridge: float
+               ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Lower end flow, ΔP there and slope of the ramps of pipes ``k`` across the jump at ``reynolds``."""
+        critical = self._m_floor[k] * reynolds
+        lo, hi = critical * (1 - bridge), critical * (1 + bridge)
+        drop = self.pipes.pressure_drop(lo, k)
+        return lo, drop, (self.pipes.pressure_drop(hi, k) - drop) / (hi - lo)
+
+    def _two_port_change(self, m: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Pressure change of every two-port at once (pumps have c = 0, valves no rise or head)."""
+        rise, d_rise = pump_pressure_change(m, self._tp_rise, self._tp_head, self._tp_rho, self._tp_speed)
+        drop, d_drop = valve_pressure_change(m, self._tp_c)
+        return rise + drop, d_rise + d_drop
+
+    def _equations(self, x: np.ndarray,
+                   bridge: float = NARROW_BRIDGE,
+                   held: Optional[_Held] = None) -> Tuple[np.ndarray, sp.csc_matrix]:
+        P, m = x[:self.n_ports], x[self.n_ports:]
+        n_e = m.size
+
+        dp, slope = self._pipe_pressure_drop(m, bridge, held)
+        F_pipe = P[self._up] - P[self._down] - dp
+
+        F_bal = (
+            np.bincount(self._into_rows - n_e, m[self._into_mask], minlength=self._n_balance)
+            - np.bincount(self._out_rows - n_e, m[self._out_mask], minlength=self._n_balance)
+        )
+
+        change, d_change = self._two_port_change(m[self._tp_edge])
+        F_tp = P[self._tp_out] - P[self._tp_in] - change
+
+        F = np.concatenate([
+            F_pipe, F_bal, F_tp,
+            P[self._p_spec_ports] - self._p_spec_values,
+            m[self._f_spec_edges] - self._f_spec_values,
+        ])
+        J = sp.csc_matrix(
+            (np.concatenate([self._const_vals, -slope, -d_change]),
+             (np.concatenate([self._const_rows, self._var_rows]),
+              np.concatenate([self._const_cols, self._var_cols]))),
+            shape=(self.n_unknowns, self.n_unknowns),
+        )
+        return F, J
+
+    def _scales(self, x: np.ndarray) -> np.ndarray:
+        """Per-equation scale so head rows (Pa) and mass rows (kg/h) compare."""
+        p_scale = max(float(np.max(np.abs(self._p_spec_values))), 1e3)
+        flows = np.abs(x[self.n_ports:])
+        m_scale = max(float(flows.max()) if flows.size else 0.0, 1.0)
+
+        n_e = len(self.edge_ids)
+        scale = np.full(self.n_unknowns, p_scale)
+        scale[n_e:n_e + self._n_balance] = m_scale
+        scale[self._f_spec_rows] = m_scale
+        return scale
+
+    def regime_boundary_pipes(self, solution: "NetworkSolution",
+                              tol: float = 1e-10,
+                              max_residual: float = 1e-3) -> Optional[List[str]]:
+        """
+        Explains a stalled solve.  The friction factor jumps at Re 2000
+        (laminar → Swamee–Jain) and Re 4000 (→ Churchill), so a pipe whose
+        required ΔP falls inside a jump has no exact solution on either
+        side.  ``solve`` normally holds such pipes at the jump; when that
+        does not settle it returns the nearest state it found.  Returns the
+        ids of pipes near a jump when mass balances and specifications hold
+        and every head residual is below ``max_residual`` (scaled);
+        otherwise None.
+        """
+        F, _ = self._equations(solution.state)
+        r = np.abs(F) / self._scales(solution.state)
+        n_e = len(self.edge_ids)
+        if np.any(r[n_e:] > tol) or np.max(r, initial=0.0) > max_residual:
+            return None
+
+        near = np.concatenate(self._near_jumps(solution.state))
+        stuck = np.unique(near[r[near] > tol])
+        if stuck.size == 0:
+            return None
+        return [self.edge_ids[k] for k in stuck]
+
+    # ──────────────────────────────
+    # ─── Newton–Raphson ───────────
+    # ──────────────────────────────
+    def initial_state(self) -> np.ndarray:
+        """Mean specified pressure everywhere; flows at the specified rate or 1 m/s."""
+        x = np.empty(self.n_unknowns)
+        x[:self.n_ports] = np.mean([v for _, v in self.pressure_specs])
+
+        if self.flow_specs:
+            flows = np.full(len(self.edge_ids), np.mean([abs(v) for _, v in self.flow_specs]))
+            for k, value in self.flow_specs:
+                flows[k] = value
+        else:
+            area = np.pi * (self.pipes.D / 2) ** 2
+            flows = area * 3600 * 1000           # 1 m/s, with Pipe's kg/h → m3/h convention
+        x[self.n_ports:] = flows
+        return x
+
+    def state_by_id(self, solution: NetworkSolution
+                    ) -> Tuple[Dict[str, Tuple[float, float]], Dict[str, float]]:
+        """Solution keyed by element id: (inlet, outlet) pressure per node, flow per pipe."""
+        P = solution.pressures
+        pressures = {
+            nid: (float(P[self.in_port[i]]), float(P[self.out_port[i]]))
+            for i, nid in enumerate(self.node_ids)
+        }
+        flows = {eid: float(solution.flows[k]) for k, eid in enumerate(self.edge_ids)}
+        return pressures, flows
+
+    def set_specified(self, pressures: np.ndarray, flows: np.ndarray) -> None:
+        """
+        Replaces the specified pressures (Pa) and pipe flows (kg/h), in the
+        order of ``pressure_specs`` / ``flow_specs``, without rebuilding –
+        used to march through time-varying boundary conditions.  Which
+        values are specified stays as built.
+        """
+        self._p_spec_values = np.array(pressures, dtype=float)
+        self._f_spec_values = np.array(flows, dtype=float)
+        self.pressure_specs = list(zip(self._p_spec_ports.tolist(), self._p_spec_values.tolist()))
+        self.flow_specs = list(zip(self._f_spec_edges.tolist(), self._f_spec_values.tolist()))
+
+    def state_from_ids(self,
+                       pressures: Dict[str, Tuple[float, float]],
+                       flows: Dict[str, float]) -> np.ndarray:
+        """
+        Starting vector built from a previous ``state_by_id`` – used to
+        warm-start after the graph changed.  Elements not seen before fall
+        back to ``initial_state``.
+        """
+        x = self.initial_state()
+        for i, nid in enumerate(self.node_ids):
+            if nid in pressures:
+                x[self.in_port[i]], x[self.out_port[i]] = pressures[nid]
+        for k, eid in enumerate(self.edge_ids):
+            if eid in flows:
+                x[self.n_ports + k] = flows[eid]
+        # specified values always win over the remembered state
+        x[self._p_spec_ports] = self._p_spec_values
+        x[self.n_ports + self._f_spec_edges] = self._f_spec_values
+        return x
+
+    def solve(self,
+              x0: Optional[np.ndarray] = None,
+              tol: float = 1e-10,
+              max_iter: int = 50) -> NetworkSolution:
+        """
+        Newton–Raphson from ``x0`` (default ``initial_state``).
+
+        ΔP(ṁ) jumps where the friction correlation changes (``REGIME_JUMPS``).
+        In a network with many parallel branches, some branch usually needs
+        a ΔP inside a jump.  That branch has no exact solution, and Newton
+        keeps bouncing across the jump while every other residual waits on
+        it.  So the solve runs in two steps:
+
+          1. every jump is bridged by a ramp ``WIDE_BRIDGE`` wide, which
+             makes ΔP(ṁ) continuous and monotone;
+          2. pipes whose pressure difference then lies inside a jump are
+             held at the critical flow, on a ramp ``NARROW_BRIDGE`` wide that
+             continues straight past its ends, so their equation stays
+             smooth.  All other pipes go back to their exact curve.  This is
+             repeated until the set of held pipes stops changing.
+
+        A network with no pipe near a jump converges in step 1 and then
+        solves its exact equations unchanged.
+        """
+        x = self.initial_state() if x0 is None else np.array(x0, dtype=float)
+        scale = self._scales(x)
+        x, norm, iterations = self._newton(x, scale, tol, max_iter, WIDE_BRIDGE)
+        held = np.empty(0, dtype=np.intp)
+        if norm <= tol and any(k.size for k in self._near_jumps(x)):
+            x, norm, held, extra = self._hold_jump_pipes(x, scale, tol)
+            iterations += extra
+
+        return NetworkSolution(
+            pressures=x[:self.n_ports],
+            flows=x[self.n_ports:],
+            iterations=iterations,
+            converged=bool(norm <= tol),
+            residual=float(norm),
+            held=held,
+        )
+
+    def _newton(self, x: np.ndarray, scale: np.ndarray, tol: float, max_iter: int,
+                bridge: float, held: Optional[_Held] = None) -> Tuple[np.ndarray, float, int]:
+        """Damped Newton iterations; returns the last state, its scaled residual and the iteration count."""
+        F, J = self._equations(x, bridge, held)
+        norm = np.max(np.abs(F) / scale)
+        iterations = 0
+
+        while norm > tol and iterations < max_iter:
+            iterations += 1
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")     # singular J is reported below
+                dx = spsolve(J, -F)
+            if not np.all(np.isfinite(dx)):
+                raise ValueError(
+                    "Network equations are singular; check that specified flows "
+                    "and pressures are consistent"
+                )
+
+            # backtracking line search on the scaled residual
+            alpha = 1.0
+            while True:
+                x_new = x + alpha * dx
+                F_new, J_new = self._equations(x_new, bridge, held)
+                norm_new = np.max(np.abs(F_new) / scale)
+                if norm_new < (1 - 1e-4 * alpha) * norm or alpha < 1e-3:
+                    break
+                alpha /= 2
+            x, F, J, norm = x_new, F_new, J_new, norm_new
+        return x, norm, iterations
+
+    def _hold_jump_pipes(self, x: np.ndarray, scale: np.ndarray, tol: float
+                         ) -> Tuple[np.ndarray, float, np.ndarray, int]:
+        """
+        Step 2 of ``solve`` from the converged state ``x``.  Returns the
+        state, its residual, the held pipes and the iterations spent.  The
+        residual is taken on the exact equations when the held set does not
+        settle within ``HOLD_ROUNDS``; in that case the last converged state
+        is returned.
+        """
+        held = self._jump_pipes(x)
+        previous: Optional[np.ndarray] = None
+        iterations = 0
+        for _ in range(HOLD_ROUNDS):
+            if previous is not None and np.array_equal(held[0], previous):
+                return x, norm, previous, iterations
+            x_new, norm_new, spent = self._newton(x, scale, tol, HOLD_ITERATIONS, NARROW_BRIDGE, held)
+            iterations += spent
+            if norm_new > tol:
+                break
+            x, norm, previous = x_new, norm_new, held[0]
+            held = self._jump_pipes(x)
+
+        F, _ = self._equations(x)
+        return x, np.max(np.abs(F) / scale), np.empty(0, dtype=np.intp), iterations
+
+    def _near_jumps(self, x: np.ndarray) -> List[np.ndarray]:
+        """Per ``REGIME_JUMPS`` entry, the pipes whose flow in ``x`` is within ``WIDE_BRIDGE`` of it."""
+        Re = np.abs(x[self.n_ports:]) / self._m_floor
+        return [np.flatnonzero(np.abs(Re - reynolds) < WIDE_BRIDGE * reynolds)
+                for reynolds in REGIME_JUMPS]
+
+    def _jump_pipes(self, x: np.ndarray) -> _Held:
+        """Pipes whose pressure difference in ``x`` lies inside a regime jump, with their ramps."""
+        P = x[:self.n_ports]
+        parts = []
+        for reynolds, k in zip(REGIME_JUMPS, self._near_jumps(x)):
+            dP = np.abs(P[self._up[k]] - P[self._down[k]])
+            lo, drop, ramp = self._ramps(k, reynolds, NARROW_BRIDGE)
+            top = drop + ramp * 2 * NARROW_BRIDGE * self._m_floor[k] * reynolds
+            inside = (dP >= drop) & (dP <= top)
+            parts.append((k[inside], lo[inside], drop[inside], ramp[inside]))
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+    # ──────────────────────────────
+    # ─── Reporting ────────────────
+    # ──────────────────────────────
+    def report(self, solution: NetworkSolution) -> Dict[str, Dict[str, Any]]:
+        """Per-node / per-edge result dicts in the shape the canvas expects."""
+        P, m = solution.pressures, solution.flows
+        n_nodes = len(self.node_ids)
+        inflows = np.bincount(self.dst, m, minlength=n_nodes).tolist()
+        outflows = np.bincount(self.src, m, minlength=n_nodes).tolist()
+
+        results: Dict[str, Dict[str, Any]] = {
+            nid: self._node_result(i, P, inflows[i], outflows[i])
+            for i, nid in enumerate(self.node_ids)
+        }
+        pipes = self._pipe_results(np.arange(len(self.edge_ids)), P, m)
+        results.update(zip(self.edge_ids, pipes))
+        return results
+
+    def _node_result(self, i: int, P: np.ndarray, inflow: float, outflow: float) -> Dict[str, Any]:
+        ntype = self.node_types[i]
+        if ntype == "feed":
+            return {
+                "node_type": "feed",
+                "pressure": float(P[self.in_port[i]]),
+                "fluid_type": self.node_params[i].get("fluidType", "unknown"),
+                "mass_flowrate": outflow,
+            }
+        if ntype == "product":
+            return {
+                "node_type": "product",
+                "outlet_pressure_Pa": float(P[self.in_port[i]]),
+                "mass_flowrate": inflow,
+            }
+        if ntype in TWO_PORT_TYPES:
+            p_in, p_out = float(P[self.in_port[i]]), float(P[self.out_port[i]])
+            return {
+                "node_type": ntype,
+                "inlet_pressure_Pa": p_in,
+                "outlet_pressure_Pa": p_out,
+                "pressure_change_Pa": p_out - p_in,
+                "mass_flowrate": inflow,
+            }
+        return {
+            "node_type": ntype,
+            "pressure_Pa": float(P[self.in_port[i]]),
+            "mass_flowrate": inflow,
+        }
+
+    def _pipe_results(self, edges: np.ndarray, P: np.ndarray, m: np.ndarray) -> List[Dict[str, Any]]:
+        """Result dicts of the pipes ``edges`` (indices), in that order."""
+        pipes = self.pipes
+        records = PipeBatch(
+            inner_diameter=pipes.D[edges],
+            length=pipes.L[edges],
+            roughness=pipes.epsilon[edges] * 1000,
+            mass_flowrate=np.abs(m[edges]),
+            density=pipes.rho[edges],
+            viscosity_cp=pipes.mu_cp[edges],
+        ).to_records()
+        p_up = P[self.out_port[self.src[edges]]].tolist()
+        p_down = P[self.in_port[self.dst[edges]]].tolist()
+        flows = m[edges].tolist()
+        edge_list = edges.tolist()
+
+        results = []
+        for j, record in enumerate(records):
+            record = {key: _finite_or_none(v) for key, v in record.items()}
+            if flows[j] == 0:
+                record.update(flow_velocity_m_s=0.0, head_loss_m=0.0)
+            record.update({
+                "mass_flowrate": flows[j],
+                "pressure_drop_Pa": p_up[j] - p_down[j],
+                "inlet_pressure_Pa": p_up[j],
+                "outlet_pressure_Pa": p_down[j],
+            })
+            line = self.lines.get(edge_list[j])
+            if line is not None:
+                record.update(self._line_fields(edge_list[j], line, p_up[j] - p_down[j]))
+            results.append({"node_type": "pipe", **record})
+        return results
+
+    def _line_fields(self, k: int, line: Line, pressure_drop: float) -> Dict[str, Any]:
+        """
+        Extra result fields of line edge ``k``.  The pipe fields describe its
+        first segment over the whole straight length; ``head_loss_m`` is
+        the line's friction and fitting loss, net of the static head.
+        """
+        static = float(self._static[k])
+        return {
+            "head_loss_m": abs(pressure_drop - static) / (float(self.pipes.rho[k]) * Line.g),
+            "elevation_change_m": line.elevation_change,
+            "static_pressure_Pa": static,
+            "segments": line.segments,
+        }
+
+    def report_columns(self, solution: NetworkSolution) -> Dict[str, Any]:
+        """
+        ``report`` in the layout of ``helpers.columnar_results`` – nodes
+        then pipes, one array per field – built straight from the solution
+        arrays instead of per-element dicts.
+        """
+        P, m = solution.pressures, solution.flows
+        n_nodes, n_edges = len(self.node_ids), len(self.edge_ids)
+        n = n_nodes + n_edges
+        columns: Dict[str, np.ndarray] = {}
+
+        def put(field: str, rows: np.ndarray, values: Any) -> None:
+            column = columns.get(field)
+            if column is None:
+                if not rows.size:
+                    return
+                column = columns[field] = np.full(n, None, dtype=object)
+            column[rows] = values
+
+        p_in, p_out = P[self.in_port], P[self.out_port]
+        inflow = np.bincount(self.dst, m, minlength=n_nodes)
+        outflow = np.bincount(self.src, m, minlength=n_nodes)
+        types = np.array(self.node_types, dtype=object)
+        put("node_type", np.arange(n_nodes), types)
+
+        feeds = np.flatnonzero(types == "feed")
+        products = np.flatnonzero(types == "product")
+        two_ports = np.flatnonzero(self._is_two_port)
+        junctions = np.flatnonzero(self._is_junction)
+        put("pressure", feeds, p_in[feeds])
+        put("fluid_type", feeds,
+            np.array([self.node_params[i].get("fluidType", "unknown") for i in feeds], dtype=object))
+        put("mass_flowrate", feeds, outflow[feeds])
+        put("outlet_pressure_Pa", products, p_in[products])
+        put("mass_flowrate", products, inflow[products])
+        put("inlet_pressure_Pa", two_ports, p_in[two_ports])
+        put("outlet_pressure_Pa", two_ports, p_out[two_ports])
+        put("pressure_change_Pa", two_ports, p_out[two_ports] - p_in[two_ports])
+        put("mass_flowrate", two_ports, inflow[two_ports])
+        put("pressure_Pa", junctions, p_in[junctions])
+        put("mass_flowrate", junctions, inflow[junctions])
+
+        pipes = n_nodes + np.arange(n_edges)
+        put("node_type", pipes, "pipe")
+        records = PipeBatch(
+            inner_diameter=self.pipes.D,
+            length=self.pipes.L,
+            roughness=self.pipes.epsilon * 1000,
+            mass_flowrate=np.abs(m),
+            density=self.pipes.rho,
+            viscosity_cp=self.pipes.mu_cp,
+        ).solve()
+        still = m == 0
+        for field, values in records.items():
+            if values.dtype.kind == "f":
+                values = values.copy()
+                if field in ("flow_velocity_m_s", "head_loss_m"):
+                    values[still] = 0.0
+                finite = np.isfinite(values)
+                put(field, pipes[finite], values[finite])
+                put(field, pipes[~finite], None)
+            else:
+                put(field, pipes, values.astype(object))
+        p_up, p_down = p_out[self.src], p_in[self.dst]
+        put("mass_flowrate", pipes, m)
+        put("pressure_drop_Pa", pipes, p_up - p_down)
+        put("inlet_pressure_Pa", pipes, p_up)
+        put("outlet_pressure_Pa", pipes, p_down)
+        for k, line in self.lines.items():
+            for field, value in self._line_fields(k, line, float(p_up[k] - p_down[k])).items():
+                put(field, np.array([n_nodes + k]), value)
+
+        return {
+            "ids": [*self.node_ids, *self.edge_ids],
+            "columns": {field: column.tolist() for field, column in columns.items()},
+        }
+
+
+def _finite_or_none(value: Any) -> Any:
+    """NaN / inf are not valid JSON; zero-flow pipes report them as null."""
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+# ──────────────────────────────────────────────────────────
+# Flowsheet entry point
+# ──────────────────────────────────────────────────────────
+def execute_network(graph: FlowsheetGraph, layout: str = "records") -> Dict[str, Any]:
+    """Solves a general flowsheet; structural problems raise ``ValueError``."""
+    report, _ = solve_network(Network(graph), layout=layout)
+    return report
+
+
+@timed("solve")
+def solve_network(network: Network,
+                  x0: Optional[np.ndarray] = None,
+                  layout: Optional[str] = "records") -> Tuple[Dict[str, Any], Optional[NetworkSolution]]:
+    """
+    Solves a compiled network and builds the flowsheet report.  Returns
+    the report and the solution (None on failure) so callers can warm-start
+    the next solve from ``solution.state``.  ``layout=None`` leaves out
+    ``results``, for callers that read the solution itself.
+    """
+    order = network.order
+    try:
+        solution = network.solve(x0=x0)
+        count("solver_iterations", solution.iterations)
+        observe_solves("newton", solution.iterations, 0 if solution.converged else 1)
+        warning = None
+        if not solution.converged:
+            stuck = network.regime_boundary_pipes(solution)
+            if stuck is None:
+                raise ValueError(
+                    f"Network solve did not converge after {solution.iterations} iterations "
+                    f"(residual {solution.residual:.3g})"
+                )
+            warning = (
+                f"Pipes {stuck[:10]} sit on a friction-factor regime jump (Re 2000/4000); "
+                f"pressures are accurate to a scaled residual of {solution.residual:.2g}"
+            )
+        elif solution.held.size:
+            held = [network.edge_ids[k] for k in solution.held[:10].tolist()]
+            warning = (
+                f"Pipes {held} sit on a friction-factor regime jump (Re 2000/4000); their "
+                "flow is held at the critical Reynolds number, with a pressure drop between "
+                "the values on either side of the jump"
+            )
+
+        columnar = layout == "columnar"
+        report: Dict[str, Any] = {"order": order}
+        if layout is not None:
+            report["results"] = network.report_columns(solution) if columnar else network.report(solution)
+        report["calculation_mode"] = CalculationMode.NETWORK.name
+        report["solver"] = {
+            "method": "newton",
+            "iterations": solution.iterations,
+            "converged": solution.converged,
+            "residual": solution.residual,
+        }
+        if warning:
+            report["warning"] = warning
+        if columnar:
+            report["layout"] = layout
+        return report, solution
+
+    except Exception as e:
+        return {
+            "error": str(e),
+            "order": order,
+            "results": {},
+            "calculation_mode": "error"
+        }, None
@@ -0,0 +1,289 @@
+"""
+sessions.py
+-------------------
+Incremental re-solve for the canvas edit → run loop.
+
+A session keeps the last flowsheet, its per-element results and the
+solver state (port pressures and pipe flows) keyed by node / edge id.
+A delta request – changed params, added or removed nodes and edges –
+marks the connected parts of the graph it touches; only those parts are
+rebuilt and re-solved, warm-started from the previous state, and only
+results that actually changed are sent back.
+
+The unit of re-solve is the whole weakly connected component, not the
+elements downstream of the edit: in a network every pressure and flow
+can depend on any element of its component, so for the usual single
+connected flowsheet each delta is a full (warm-started) re-solve.  The
+saving comes from the warm start and from untouched components of
+multi-part canvases.  Every response reports the scope it re-solved
+(``resolved_components`` / ``total_components`` and
+``resolved_elements`` / ``total_elements``).
+
+Sessions live in the memory of one worker process.  Behind several
+gunicorn workers, pin a session to its worker or recreate it on a 404.
+"""
+
+from __future__ import annotations
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from graph import FlowsheetGraph
+from helpers import execute_graph, is_single_pipe, traversal_order
+from network import Network, solve_network
+from validation import check_flowsheet
+
+
+class SolveSession:
+    """One flowsheet plus everything needed to re-solve it incrementally."""
+
+    def __init__(self, flowsheet: Dict[str, Any]) -> None:
+        self.nodes: Dict[str, Dict[str, Any]] = {n["id"]: n for n in flowsheet["nodes"]}
+        self.edges: Dict[str, Dict[str, Any]] = {e["id"]: e for e in flowsheet["edges"]}
+        self.order = self._check(self.nodes, self.edges)
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.modes: Dict[str, str] = {}                    # node id → component mode
+        self.pressures: Dict[str, Tuple[float, float]] = {}
+        self.flows: Dict[str, float] = {}
+        self.resolved_components = 0
+        self.total_components = 0
+        self.resolved_elements = 0
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    @staticmethod
+    def _check(nodes: Dict[str, Any], edges: Dict[str, Any]) -> List[str]:
+        check_flowsheet({"nodes": list(nodes.values()), "edges": list(edges.values())})
+        return traversal_order(list(nodes.values()), list(edges.values()))
+
+    # ──────────────────────────────
+    # ─── Public API ───────────────
+    # ──────────────────────────────
+    def solve_all(self) -> Dict[str, Any]:
+        """First solve: every component, full report."""
+        errors = self._resolve(set(self.nodes) | set(self.edges))
+        return self._summary(results=self.results, errors=errors)
+
+    def apply_delta(self, delta: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Applies ``delta`` and re-solves what it touched.  Accepted keys:
+        ``params`` ({id: {param: value}}), ``addNodes``, ``removeNodes``,
+        ``addEdges``, ``removeEdges``.  The session is left unchanged if
+        the edited graph is invalid.
+        """
+        nodes, edges = dict(self.nodes), dict(self.edges)
+        touched: Set[str] = set()
+        dropped: Set[str] = set()                          # edges removed with their node
+
+        for nid in delta.get("removeNodes", []):
+            if nodes.pop(nid, None) is None:
+                raise ValueError(f"Cannot remove unknown node '{nid}'")
+            for eid, edge in list(edges.items()):
+                if nid in (edge["source"], edge["target"]):
+                    del edges[eid]
+                    dropped.add(eid)
+                    touched.update((edge["source"], edge["target"]))
+        for eid in delta.get("removeEdges", []):
+            edge = edges.pop(eid, None)
+            if edge is None:
+                if eid in dropped:
+                    continue
+                raise ValueError(f"Cannot remove unknown edge '{eid}'")
+            touched.update((edge["source"], edge["target"]))
+        for node in delta.get("addNodes", []):
+            nodes[node["id"]] = node
+            touched.add(node["id"])
+        for edge in delta.get("addEdges", []):
+            edges[edge["id"]] = edge
+            touched.update((edge["id"], edge["source"], edge["target"]))
+
+        params = delta.get("params", {})
+        unknown = [i for i in params if i not in nodes and i not in edges]
+        if unknown:
+            raise ValueError(f"Unknown elements in params: {unknown}")
+        if params:
+            nodes, edges = _with_params(nodes, edges, params)
+        touched.update(params)
+
+        order = self._check(nodes, edges)
+        gone = (set(self.nodes) - set(nodes)) | (set(self.edges) - set(edges))
+        connected = {nid for edge in edges.values() for nid in (edge["source"], edge["target"])}
+        gone |= {nid for nid in self.results if nid in nodes and nid not in connected}  # orphaned nodes
+        self.nodes, self.edges, self.order = nodes, edges, order
+        for element_id in gone:
+            self.results.pop(element_id, None)
+            self.modes.pop(element_id, None)
+
+        before = dict(self.results)
+        errors = self._resolve(touched - gone)
+        changed = {
+            element_id: result for element_id, result in self.results.items()
+            if element_id not in before or not _same(before[element_id], result)
+        }
+        removed = sorted(gone | (set(before) - set(self.results)))
+        return self._summary(changed=changed, removed=removed, errors=errors)
+
+    # ──────────────────────────────
+    # ─── Re-solve ─────────────────
+    # ──────────────────────────────
+    def _components(self) -> List[Tuple[Set[str], List[str]]]:
+        """Weakly connected components as (node ids, edge ids)."""
+        parent = {nid: nid for nid in self.nodes}
+
+        def find(x: str) -> str:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for edge in self.edges.values():
+            parent[find(edge["source"])] = find(edge["target"])
+
+        groups: Dict[str, Tuple[Set[str], List[str]]] = {}
+        for edge in self.edges.values():
+            root = find(edge["source"])
+            group = groups.setdefault(root, (set(), []))
+            group[0].update((edge["source"], edge["target"]))
+            group[1].append(edge["id"])
+        return list(groups.values())
+
+    def _resolve(self, touched: Set[str]) -> List[str]:
+        errors = []
+        self.resolved_components = self.resolved_elements = 0
+        components = self._components()
+        self.total_components = len(components)
+
+        for node_ids, edge_ids in components:
+            if not (touched & node_ids or touched & set(edge_ids)):
+                continue
+            self.resolved_components += 1
+            self.resolved_elements += len(node_ids) + len(edge_ids)
+            for element_id in (*node_ids, *edge_ids):
+                self.results.pop(element_id, None)
+
+            report = self._solve_component(node_ids, edge_ids)
+            for nid in node_ids:
+                self.modes[nid] = report["calculation_mode"]
+            if "error" in report:
+                errors.append(report["error"])
+                continue
+            self.results.update(report["results"])
+        return errors
+
+    def _solve_component(self, node_ids: Set[str], edge_ids: List[str]) -> Dict[str, Any]:
+        order = [nid for nid in self.order if nid in node_ids]
+
+        try:
+            graph = FlowsheetGraph([self.nodes[nid] for nid in order],
+                                   [self.edges[eid] for eid in edge_ids])
+            if is_single_pipe(graph):
+                return execute_graph(graph)
+            network = Network(graph)
+        except ValueError as exc:
+            return {"error": str(exc), "order": order, "results": {}, "calculation_mode": "error"}
+
+        x0 = network.state_from_ids(self.pressures, self.flows) if self.flows else None
+        report, solution = solve_network(network, x0=x0)
+        if solution is None and x0 is not None:
+            report, solution = solve_network(network)
+        if solution is not None:
+            pressures, flows = network.state_by_id(solution)
+            self.pressures.update(pressures)
+            self.flows.update(flows)
+        return report
+
+    def _summary(self, **fields: Any) -> Dict[str, Any]:
+        modes = set(self.modes.values())
+        summary = {
+            "order": self.order,
+            "calculation_mode": modes.pop() if len(modes) == 1 else "NETWORK",
+            "resolved_components": self.resolved_components,
+            "total_components": self.total_components,
+            "resolved_elements": self.resolved_elements,
+            "total_elements": len(self.nodes) + len(self.edges),
+        }
+        errors = fields.pop("errors")
+        summary.update(fields)
+        if errors:
+            summary["error"] = "; ".join(errors)
+        return summary
+
+
+def _with_params(nodes: Dict[str, Dict[str, Any]], edges: Dict[str, Dict[str, Any]],
+                 params: Dict[str, Dict[str, Any]]
+                 ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Copies of ``nodes`` / ``edges`` with ``params`` merged in by
+    ``FlowsheetGraph.with_overrides``, so a delta edits the session exactly
+    as a batch scenario overrides a flowsheet.  Nodes that touch no pipe
+    are not part of the graph, so their params cannot be set.
+    """
+    graph = FlowsheetGraph(list(nodes.values()), list(edges.values()))
+    loose = sorted(set(params) & graph.unconnected)
+    if loose:
+        raise ValueError(f"Cannot set params of unconnected nodes: {loose}")
+    graph = graph.with_overrides(params)
+    nodes, edges = dict(nodes), dict(edges)
+    for element_id in params:
+        if element_id in graph.node_index:
+            node = nodes[element_id]
+            merged = graph.node_params[graph.node_index[element_id]]
+            nodes[element_id] = {**node, "data": {**(node.get("data") or {}), "params": merged}}
+        else:
+            edges[element_id] = {**edges[element_id], "data": graph.edge_data[graph.edge_index[element_id]]}
+    return nodes, edges
+
+
+def _same(a: Any, b: Any) -> bool:
+    """Structural equality that ignores round-off in floats."""
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-12)
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    return a == b
+
+
+# ──────────────────────────────────────────────────────────
+# Session store
+# ──────────────────────────────────────────────────────────
+class SessionStore:
+    """Bounded, idle-expiring map of session id → ``SolveSession``."""
+
+    def __init__(self, max_sessions: int = 256, ttl: float = 1800.0) -> None:
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, SolveSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, flowsheet: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        session = SolveSession(flowsheet)
+        report = session.solve_all()
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._expire()
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session_id, report
+
+    def get(self, session_id: str) -> Optional[SolveSession]:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self) -> None:
+        """Caller holds the lock."""
+        cutoff = time.monotonic() - self.ttl
+        for session_id in [s for s, v in self._sessions.items() if v.last_used < cutoff]:
+            del self._sessions[session_id]
@@ -0,0 +1,219 @@
+"""
+sizing.py
+-------------------
+Line sizing: the smallest standard diameter that keeps each pipe within
+a pressure-drop-per-length and velocity budget.
+
+Every (pipe, candidate size) pair is evaluated in one :class:`PipeBatch`
+pass at the pipe's design flow, length, roughness and fluid.  Each pipe
+gets its full trade-off table (ΔP, ΔP per metre, velocity, Reynolds
+number, regime and feasibility per size) and the first feasible size,
+counting up from the smallest.
+
+Design flows are the pipes' own ``massFlowRate``.  Pipes without one take
+the flow of a network solve of the flowsheet as given, so a network
+whose feeds and products fix the pressures can be sized in one request
+(the solve uses the current diameters).
+"""
+
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from components.PipeBatch import PipeBatch
+from fluids import fill_properties
+from graph import FlowsheetGraph
+from helpers import FRICTION_METHODS, to_float
+from network import Network
+from timing import stage
+
+MAX_SIZING_EVALUATIONS = 1_000_000
+
+INCH = 0.0254
+
+# ASME B36.10M schedule 40 steel pipe: nominal size → inner diameter (m)
+STANDARD_SIZES: Tuple[Tuple[str, float], ...] = tuple((name, inches * INCH) for name, inches in (
+    ("1/2\"", 0.622), ("3/4\"", 0.824), ("1\"", 1.049), ("1-1/4\"", 1.380),
+    ("1-1/2\"", 1.610), ("2\"", 2.067), ("2-1/2\"", 2.469), ("3\"", 3.068),
+    ("4\"", 4.026), ("5\"", 5.047), ("6\"", 6.065), ("8\"", 7.981),
+    ("10\"", 10.020), ("12\"", 11.938), ("14\"", 13.124), ("16\"", 15.000),
+    ("18\"", 16.876), ("20\"", 18.812), ("24\"", 22.624),
+))
+
+# Payload key → limit name in the report
+LIMITS = {
+    "maxPressureDropPerLength": "max_pressure_drop_per_length_Pa_m",
+    "maxVelocity": "max_velocity_m_s",
+    "minVelocity": "min_velocity_m_s",
+}
+
+
+def execute_sizing(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Entry point for ``/api/run/sizing``; malformed payloads raise
+    ``ValueError``.
+
+    Payload::
+
+        {"flowsheet": {...},
+         "pipes": ["e1", "e2"],                       # default: every pipe
+         "sizes": [{"nominal": "DN50", "diameter": 0.0525}, 0.08, ...],
+                                                      # default: STANDARD_SIZES
+         "maxPressureDropPerLength": 400,             # Pa/m
+         "maxVelocity": 3.0, "minVelocity": 0.5,      # m/s; at least one limit
+         "frictionMethod": "auto" | "table"}
+    """
+    flowsheet = payload.get("flowsheet")
+    if not isinstance(flowsheet, dict) or "nodes" not in flowsheet or "edges" not in flowsheet:
+        raise ValueError("Sizing payload needs a 'flowsheet' with 'nodes' and 'edges'")
+    method = payload.get("frictionMethod", "auto")
+    if method not in FRICTION_METHODS:
+        raise ValueError(f"frictionMethod must be one of {FRICTION_METHODS}")
+    limits = _limits(payload)
+    names, diameters = _sizes(payload.get("sizes"))
+
+    graph = FlowsheetGraph.from_flowsheet(flowsheet)
+    if graph.missing:
+        raise ValueError(f"Edges reference unknown nodes: {graph.missing}")
+    edges = _selected_edges(graph, payload.get("pipes"))
+    lines = [graph.edge_ids[k] for k in edges.tolist() if "segments" in graph.edge_data[k]]
+    if lines:
+        raise ValueError(f"Pipes {lines[:10]} are multi-segment lines; size their segments separately")
+    if edges.size * diameters.size > MAX_SIZING_EVALUATIONS:
+        raise ValueError(f"At most {MAX_SIZING_EVALUATIONS} pipe × size evaluations, "
+                         f"got {edges.size * diameters.size}")
+    graph = fill_properties(graph)
+    columns = {key: graph.columns[key][edges] for key in ("length", "roughness", "density", "viscosity")}
+    for key, column in columns.items():
+        invalid = ~(column >= 0) | ((column == 0) & (key != "roughness"))
+        if invalid.any():
+            raise ValueError(f"Pipe {graph.edge_ids[edges[np.argmax(invalid)]]} has an invalid '{key}'")
+
+    flows, from_network = _design_flows(graph, edges)
+
+    # row-major (pipe, size): pipe k's candidates are rows k·S … k·S + S − 1
+    n, s = edges.size, diameters.size
+    with stage("solve"):
+        results = PipeBatch(
+            inner_diameter=np.tile(diameters, n),
+            length=np.repeat(columns["length"], s),
+            roughness=np.repeat(columns["roughness"], s),
+            mass_flowrate=np.repeat(flows, s),
+            density=np.repeat(columns["density"], s),
+            viscosity_cp=np.repeat(columns["viscosity"], s),
+            friction_method=method,
+        ).solve()
+
+    drop = results["pressure_drop_Pa"].reshape(n, s)
+    per_length = drop / columns["length"][:, None]
+    velocity = results["flow_velocity_m_s"].reshape(n, s)
+    feasible = np.ones((n, s), dtype=bool)
+    if "max_pressure_drop_per_length_Pa_m" in limits:
+        feasible &= per_length <= limits["max_pressure_drop_per_length_Pa_m"]
+    if "max_velocity_m_s" in limits:
+        feasible &= velocity <= limits["max_velocity_m_s"]
+    if "min_velocity_m_s" in limits:
+        feasible &= velocity >= limits["min_velocity_m_s"]
+    selected = np.where(feasible.any(axis=1), feasible.argmax(axis=1), -1)
+
+    reynolds = results["reynolds_number"].reshape(n, s)
+    regime = results["flow_regime"].reshape(n, s)
+    lines: Dict[str, Dict[str, Any]] = {}
+    for row, k in enumerate(edges.tolist()):
+        choice = int(selected[row])
+        lines[graph.edge_ids[k]] = {
+            "design_flow": float(flows[row]),
+            "flow_source": "network" if from_network[row] else "specified",
+            "selected": names[choice] if choice >= 0 else None,
+            "diameter": float(diameters[choice]) if choice >= 0 else None,
+            "candidates": {
+                "nominal": list(names),
+                "diameter": diameters.tolist(),
+                "pressure_drop_Pa": drop[row].tolist(),
+                "pressure_drop_per_length_Pa_m": per_length[row].tolist(),
+                "flow_velocity_m_s": velocity[row].tolist(),
+                "reynolds_number": reynolds[row].tolist(),
+                "flow_regime": regime[row].tolist(),
+                "feasible": feasible[row].tolist(),
+            },
+        }
+
+    report: Dict[str, Any] = {"limits": limits, "sizes": list(names), "lines": lines}
+    unsized = [graph.edge_ids[k] for k in edges[selected < 0].tolist()]
+    if unsized:
+        report["warning"] = f"No candidate size meets the limits for pipes {unsized[:10]}"
+    return report
+
+
+# ──────────────────────────────────────────────────────────
+# Payload parsing
+# ──────────────────────────────────────────────────────────
+def _limits(payload: Dict[str, Any]) -> Dict[str, float]:
+    limits: Dict[str, float] = {}
+    for key, name in LIMITS.items():
+        if payload.get(key) is None:
+            continue
+        value = to_float(payload[key])
+        if value is None or not value > 0:
+            raise ValueError(f"'{key}' must be a positive number")
+        limits[name] = value
+    if not limits:
+        raise ValueError(f"Give at least one sizing limit: {sorted(LIMITS)}")
+    if limits.get("min_velocity_m_s", 0) > limits.get("max_velocity_m_s", np.inf):
+        raise ValueError("'minVelocity' exceeds 'maxVelocity'")
+    return limits
+
+
+def _sizes(raw: Any) -> Tuple[List[str], np.ndarray]:
+    """Candidate (nominal names, inner diameters in m), smallest first."""
+    if raw is None:
+        return [name for name, _ in STANDARD_SIZES], np.array([d for _, d in STANDARD_SIZES])
+    if not isinstance(raw, list) or not raw:
+        raise ValueError("'sizes' must be a non-empty list of diameters (m) or {nominal, diameter}")
+    sizes = []
+    for entry in raw:
+        if isinstance(entry, dict):
+            diameter = to_float(entry.get("diameter"))
+            name = entry.get("nominal")
+        else:
+            diameter, name = to_float(entry), None
+        if diameter is None or not diameter > 0:
+            raise ValueError(f"Invalid candidate size {entry!r}; diameters are positive, in m")
+        sizes.append((diameter, str(name) if name is not None else f"{diameter:g}"))
+    sizes.sort(key=lambda size: size[0])
+    return [name for _, name in sizes], np.array([d for d, _ in sizes])
+
+
+def _selected_edges(graph: FlowsheetGraph, pipes: Any) -> np.ndarray:
+    if pipes is None:
+        return np.arange(graph.n_edges)
+    if not isinstance(pipes, list) or not pipes:
+        raise ValueError("'pipes' must be a non-empty list of pipe ids")
+    unknown = [p for p in pipes if p not in graph.edge_index]
+    if unknown:
+        raise ValueError(f"Unknown pipes {unknown[:10]}")
+    return np.array(sorted({graph.edge_index[p] for p in pipes}), dtype=np.intp)
+
+
+def _design_flows(graph: FlowsheetGraph, edges: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Design flow (kg/h) per selected pipe, and whether it came from a network solve."""
+    flows = graph.columns["massFlowRate"][edges].copy()
+    missing = np.isnan(flows)
+    if missing.any():
+        try:
+            solution = Network(graph).solve()
+        except ValueError as exc:
+            raise ValueError(f"Pipes {_ids(graph, edges[missing])} need a design 'massFlowRate' "
+                             f"(the flowsheet cannot be solved for it: {exc})")
+        if not solution.converged:
+            raise ValueError(f"Pipes {_ids(graph, edges[missing])} need a design 'massFlowRate' "
+                             "(the network solve for it did not converge)")
+        flows[missing] = np.abs(solution.flows[edges[missing]])
+    if not np.all(flows > 0):
+        raise ValueError(f"Pipes {_ids(graph, edges[~(flows > 0)])} need a positive design flow")
+    return flows, missing
+
+
+def _ids(graph: FlowsheetGraph, edges: np.ndarray) -> List[str]:
+    return [graph.edge_ids[k] for k in edges[:10].tolist()]
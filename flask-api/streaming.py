@@ -0,0 +1,126 @@
+"""
+streaming.py
+-------------------
+Line-delimited JSON (NDJSON) output for huge flowsheets, batches and
+sweeps, sent as a Flask streaming response.
+
+  • flowsheet – first the report without ``results`` (``order``,
+    ``calculation_mode``, ``solver``), then ``{"id": ..., "node_type": ...,
+    ...}`` per element in traversal order, each node followed by the pipes
+    leaving it.  The report is solved and cached as for ``/api/run``, so
+    it is held whole; only its JSON text is streamed
+  • batch     – ``{"scenario": i, ...report}`` per scenario, sent as each
+    chunk of scenarios is solved
+  • sweep     – first ``pipe``, ``parameter``, ``points`` and the column
+    names, then ``{"massFlowRate": ..., "pressure_drop_Pa": ..., ...}`` per
+    point
+  • timeseries – first ``order``, ``calculation_mode``, ``steps``,
+    ``interval_s`` and ``ids``, then one columnar block of steps per line
+    (``start``, ``time_s``, ``series``, ``solver``).  The whole series is
+    solved first, like ``/api/run/timeseries``
+
+A report that fails outright is sent as its usual single error line.
+If something fails after the first line has gone out, the stream ends
+with ``{"error": ...}``.  The generators yield blocks of records, and
+each block goes out as one write.  The server never holds the whole
+JSON text.
+"""
+
+from __future__ import annotations
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+import codec
+from batch import execute_batch, split_batch
+from graph import FlowsheetGraph
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+logger = logging.getLogger("solver.streaming")
+
+Block = List[Dict[str, Any]]
+
+
+def stream_report(report: Dict[str, Any], flowsheet: Dict[str, Any],
+                  chunk_size: int = 1024) -> Iterator[Block]:
+    """
+    Splits a finished ``/api/run`` report: first the report without
+    ``results``, then ``chunk_size`` element records per block in
+    traversal order, each node followed by the pipes leaving it.
+    """
+    results = report.get("results") or {}
+    yield [{k: v for k, v in report.items() if k != "results"}]
+    if not results:
+        return
+
+    graph = FlowsheetGraph.from_flowsheet(flowsheet)
+    ids: List[str] = []
+    for i, node_id in enumerate(graph.order):
+        ids.append(node_id)
+        ids.extend(graph.edge_ids[k] for k in graph.outgoing(i).tolist())
+    placed = set(ids)
+    ids = [element_id for element_id in ids if element_id in results]
+    ids += [element_id for element_id in results if element_id not in placed]
+    for start in range(0, len(ids), chunk_size):
+        yield [{"id": element_id, **results[element_id]} for element_id in ids[start:start + chunk_size]]
+
+
+def stream_batch(payload: Dict[str, Any],
+                 run: Optional[Callable[[Callable, Dict[str, Any]], Dict[str, Any]]] = None,
+                 chunk_size: int = 256) -> Iterator[Block]:
+    """
+    ``execute_batch`` ``chunk_size`` scenarios at a time, one block per
+    chunk.  ``run(execute_batch, chunk)`` solves a chunk, e.g. through the
+    process pool; by default it is called directly.
+    """
+    run = run or (lambda func, chunk: func(chunk))
+    chunks = split_batch(payload, chunk_size)
+    offset = 0
+    for chunk in chunks:
+        scenarios = run(execute_batch, chunk)["scenarios"]
+        yield [{"scenario": offset + i, **report} for i, report in enumerate(scenarios)]
+        offset += len(scenarios)
+
+
+def stream_sweep(sweep: Dict[str, Any], chunk_size: int = 4096) -> Iterator[Block]:
+    """One record per sweep point; non-finite numbers become null."""
+    columns = sweep["columns"]
+    yield [{"pipe": sweep["pipe"], "parameter": sweep["parameter"],
+            "points": sweep["points"], "columns": list(columns)}]
+    for start in range(0, sweep["points"], chunk_size):
+        block = {}
+        for name, column in columns.items():
+            column = column[start:start + chunk_size]
+            if column.dtype.kind == "f":
+                column = np.where(np.isfinite(column), column, None)
+            block[name] = column.tolist()
+        yield [dict(zip(block, row)) for row in zip(*block.values())]
+
+
+def stream_timeseries(payload: Dict[str, Any],
+                      run: Optional[Callable[[Callable, Dict[str, Any]], List[Dict[str, Any]]]] = None
+                      ) -> Iterator[Block]:
+    """
+    A time series as its header, then one line per block of steps.
+    ``run(timeseries_blocks, payload)`` solves all of it, e.g. through the
+    process pool; by default it is called directly.  Payload problems
+    raise ``ValueError`` from the first ``next()``.
+    """
+    from timeseries import timeseries_blocks
+    run = run or (lambda func, payload: func(payload))
+    for block in run(timeseries_blocks, payload):
+        yield [block]
+
+
+def ndjson(blocks: Iterable[Block]) -> Iterator[bytes]:
+    """Encodes each block as NDJSON; a failure mid-stream becomes a final error line."""
+    try:
+        for block in blocks:
+            yield b"".join(codec.dumps(record) + b"\n" for record in block)
+    except ValueError as exc:
+        yield codec.dumps({"error": str(exc)}) + b"\n"
+    except Exception:
+        logger.exception("Streaming response failed")
+        yield codec.dumps({"error": "Internal server error"}) + b"\n"
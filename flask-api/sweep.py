@@ -0,0 +1,177 @@
+"""
+sweep.py
+-------------------
+Parametric sweep of one pipe: the ΔP-vs-flow system curve (or ΔP vs
+diameter / length / roughness) in a single vectorised evaluation.
+
+The pipe is taken from a flowsheet, the swept parameter replaces its
+value column-wise and everything else is held at the flowsheet values.
+If the pipe's source feed has a pressure, outlet pressures are reported
+as well (the OUTLET_PRESSURE case at every point); otherwise, if its
+target product has one, required inlet pressures are reported.
+
+Results are columnar – one array per quantity – and can be sent as JSON
+or as packed little-endian float64 columns (see ``sweep_to_binary``).
+"""
+
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from components.PipeBatch import PipeBatch, classify_regime
+from fluids import fill_properties
+from graph import FlowsheetGraph
+from helpers import FRICTION_METHODS, boundary_pressures, pipe_index, to_float
+from timing import stage
+
+MAX_SWEEP_POINTS = 100_000
+
+# Swept parameter (edge ``data`` key) → PipeBatch argument
+SWEEP_PARAMETERS = {
+    "massFlowRate": "mass_flowrate",
+    "diameter": "inner_diameter",
+    "length": "length",
+    "roughness": "roughness",
+}
+
+
+def execute_sweep(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Entry point for ``/api/run/sweep``; malformed payloads raise ``ValueError``.
+
+    Payload::
+
+        {"flowsheet": {...}, "pipe": "e1",            # pipe optional if only one
+         "parameter": "massFlowRate",
+         "values": [...]                              # or a range:
+         "start": 1000, "stop": 50000, "num": 200, "spacing": "linear" | "log",
+         "frictionMethod": "auto" | "table"}
+    """
+    flowsheet = payload.get("flowsheet")
+    if not isinstance(flowsheet, dict) or "nodes" not in flowsheet or "edges" not in flowsheet:
+        raise ValueError("Sweep payload needs a 'flowsheet' with 'nodes' and 'edges'")
+
+    parameter = payload.get("parameter", "massFlowRate")
+    if parameter not in SWEEP_PARAMETERS:
+        raise ValueError(f"Cannot sweep '{parameter}'; choose one of {sorted(SWEEP_PARAMETERS)}")
+    method = payload.get("frictionMethod", "auto")
+    if method not in FRICTION_METHODS:
+        raise ValueError(f"frictionMethod must be one of {FRICTION_METHODS}")
+
+    graph = FlowsheetGraph.from_flowsheet(flowsheet)
+    if graph.missing:
+        raise ValueError(f"Edges reference unknown nodes: {graph.missing}")
+    k = pipe_index(graph, payload.get("pipe"), "sweep")
+    pipe_id = graph.edge_ids[k]
+    if "segments" in graph.edge_data[k]:
+        raise ValueError(f"Pipe '{pipe_id}' is a multi-segment line; sweeps take a single pipe")
+    values = sweep_values(payload)
+    if parameter == "roughness":
+        if not np.all(np.isfinite(values) & (values >= 0)):
+            raise ValueError("Sweep values for 'roughness' must be finite and non-negative")
+    elif not np.all(np.isfinite(values) & (values > 0)):
+        raise ValueError(f"Sweep values for '{parameter}' must be finite and positive")
+
+    # Missing density / viscosity come from the pipe's fluid (fluids.py)
+    graph = fill_properties(graph)
+    base = {key: float(graph.columns[key][k]) for key in
+            ("diameter", "length", "roughness", "massFlowRate", "density", "viscosity")}
+    if parameter != "massFlowRate" and not np.isfinite(base["massFlowRate"]):
+        raise ValueError(f"Pipe {pipe_id} needs a 'massFlowRate' to sweep '{parameter}'")
+    kwargs = {
+        "inner_diameter": base["diameter"],
+        "length": base["length"],
+        "roughness": base["roughness"],
+        "mass_flowrate": base["massFlowRate"],
+        "density": base["density"],
+        "viscosity_cp": base["viscosity"],
+    }
+    kwargs[SWEEP_PARAMETERS[parameter]] = values
+    for key in ("inner_diameter", "length", "density", "viscosity_cp", "roughness"):
+        value = np.asarray(kwargs[key])
+        if not np.all(np.isfinite(value)) or np.any(value < 0) or \
+           (key != "roughness" and np.any(value == 0)):
+            raise ValueError(f"Pipe {pipe_id} has invalid geometry or fluid properties")
+
+    with stage("solve"):
+        results = PipeBatch(**kwargs, friction_method=method).solve()
+    columns: Dict[str, np.ndarray] = {
+        parameter: values,
+        "pressure_drop_Pa": results["pressure_drop_Pa"],
+        "flow_velocity_m_s": results["flow_velocity_m_s"],
+        "reynolds_number": results["reynolds_number"],
+        "flow_regime": results["flow_regime"],
+        "friction_factor": results["friction_factor"],
+        "head_loss_m": results["head_loss_m"],
+    }
+
+    inlet, outlet = boundary_pressures(graph, k)
+    if inlet is not None:
+        columns["inlet_pressure_Pa"] = np.full(values.size, inlet)
+        columns["outlet_pressure_Pa"] = inlet - results["pressure_drop_Pa"]
+    elif outlet is not None:
+        columns["inlet_pressure_Pa"] = outlet + results["pressure_drop_Pa"]
+        columns["outlet_pressure_Pa"] = np.full(values.size, outlet)
+
+    return {"pipe": pipe_id, "parameter": parameter, "points": int(values.size),
+            "columns": columns}
+
+
+def sweep_values(payload: Dict[str, Any]) -> np.ndarray:
+    """The swept values: an explicit ``values`` list or a start/stop/num range."""
+    if "values" in payload:
+        try:
+            values = np.asarray(payload["values"], dtype=float)
+        except (TypeError, ValueError):
+            raise ValueError("'values' must be a list of numbers")
+        if values.ndim != 1 or values.size == 0:
+            raise ValueError("'values' must be a non-empty list of numbers")
+    else:
+        start, stop = to_float(payload.get("start")), to_float(payload.get("stop"))
+        num = payload.get("num", 50)
+        if start is None or stop is None or not isinstance(num, int) or num < 1:
+            raise ValueError("Give 'values', or 'start', 'stop' and an integer 'num'")
+        spacing = payload.get("spacing", "linear")
+        if spacing == "linear":
+            values = np.linspace(start, stop, num)
+        elif spacing == "log":
+            if start <= 0 or stop <= 0:
+                raise ValueError("Log spacing needs positive 'start' and 'stop'")
+            values = np.geomspace(start, stop, num)
+        else:
+            raise ValueError("'spacing' must be 'linear' or 'log'")
+
+    if values.size > MAX_SWEEP_POINTS:
+        raise ValueError(f"At most {MAX_SWEEP_POINTS} sweep points, got {values.size}")
+    return values
+
+
+# ──────────────────────────────────────────────────────────
+# Encodings
+# ──────────────────────────────────────────────────────────
+def sweep_to_json(sweep: Dict[str, Any]) -> Dict[str, Any]:
+    """Columns as plain lists (non-finite numbers become null)."""
+    columns = {}
+    for name, column in sweep["columns"].items():
+        if column.dtype.kind == "f":
+            column = np.where(np.isfinite(column), column, None)
+        columns[name] = column.tolist()
+    return {**sweep, "columns": columns}
+
+
+def sweep_to_binary(sweep: Dict[str, Any]) -> Tuple[bytes, List[str]]:
+    """
+    Packs every column as little-endian float64, one after the other
+    (``points`` values each), and returns the bytes with the column names
+    in order.  ``flow_regime`` is sent as its code: 0 laminar,
+    1 transitional, 2 turbulent.
+    """
+    names, blocks = [], []
+    for name, column in sweep["columns"].items():
+        if name == "flow_regime":
+            column = classify_regime(sweep["columns"]["reynolds_number"])
+        names.append(name)
+        blocks.append(np.asarray(column, dtype="<f8"))
+    return np.concatenate(blocks).tobytes(), names
+
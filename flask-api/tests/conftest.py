@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The API modules are imported flat (``from helpers import ...``), as app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,78 @@
+import copy
+
+import cache
+from benchmarks.flowsheets import single_pipe
+from cache import ResultCache, flowsheet_key
+
+
+class _Solver:
+    def __init__(self, *reports):
+        self.reports = list(reports)
+        self.calls = 0
+
+    def __call__(self, flowsheet):
+        self.calls += 1
+        return self.reports.pop(0) if self.reports else {"results": {}, "solve": self.calls}
+
+
+def test_hit_and_miss():
+    store, solve = ResultCache(max_entries=4), _Solver()
+    flowsheet = single_pipe("OUTLET_PRESSURE")
+    first = store.get_or_compute(flowsheet, solve)
+    assert store.get_or_compute(copy.deepcopy(flowsheet), solve) is first
+    assert solve.calls == 1
+    assert store.stats()["hits"] == 1 and store.stats()["misses"] == 1
+
+
+def test_key_ignores_layout_only_fields():
+    flowsheet = single_pipe("OUTLET_PRESSURE")
+    moved = copy.deepcopy(flowsheet)
+    moved["nodes"][0]["position"] = {"x": 120, "y": -40}
+    moved["nodes"][0]["data"]["label"] = "renamed"
+    assert flowsheet_key(moved) == flowsheet_key(flowsheet)
+    moved["edges"][0]["data"]["diameter"] = 0.2
+    assert flowsheet_key(moved) != flowsheet_key(flowsheet)
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: clock[0])
+    store, solve = ResultCache(ttl=60.0), _Solver()
+    flowsheet = single_pipe("OUTLET_PRESSURE")
+    store.get_or_compute(flowsheet, solve)
+    clock[0] += 59.0
+    store.get_or_compute(flowsheet, solve)
+    assert solve.calls == 1
+    clock[0] += 2.0
+    store.get_or_compute(flowsheet, solve)
+    assert solve.calls == 2
+
+
+def test_lru_eviction():
+    store, solve = ResultCache(max_entries=2), _Solver()
+    a, b, c = (single_pipe("OUTLET_PRESSURE", flow=flow) for flow in (1000.0, 2000.0, 3000.0))
+    for flowsheet in (a, b, a, c):                  # b is the least recently used
+        store.get_or_compute(flowsheet, solve)
+    assert solve.calls == 3
+    store.get_or_compute(a, solve)
+    assert solve.calls == 3
+    store.get_or_compute(b, solve)
+    assert solve.calls == 4
+
+
+def test_error_reports_are_not_cached():
+    store = ResultCache()
+    solve = _Solver({"error": "transient", "results": {}})
+    flowsheet = single_pipe("OUTLET_PRESSURE")
+    assert "error" in store.get_or_compute(flowsheet, solve)
+    assert "error" not in store.get_or_compute(flowsheet, solve)
+    assert solve.calls == 2
+
+
+def test_shared_tier(tmp_path):
+    db = str(tmp_path / "cache.db")
+    flowsheet = single_pipe("OUTLET_PRESSURE")
+    ResultCache(db_path=db).get_or_compute(flowsheet, _Solver())
+    other, solve = ResultCache(db_path=db), _Solver()
+    assert other.get_or_compute(flowsheet, solve) == {"results": {}, "solve": 1}
+    assert solve.calls == 0
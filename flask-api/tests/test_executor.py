@@ -0,0 +1,74 @@
+import os
+import time
+
+import pytest
+
+import app as api
+from benchmarks.flowsheets import single_pipe, tree_network
+from executor import SolveExecutor, SolverBusy
+from helpers import execute_flowsheet_extended
+from metrics import SOLVES, solver_counts
+from timing import current, end_request, start_request
+
+
+def _newton_solves():
+    return SOLVES.labels("newton")._value.get()
+
+
+def test_cheap_solves_run_inline():
+    executor = SolveExecutor(max_workers=1, inline_max_cost=10)
+    assert executor.run(os.getpid, cost=10) == os.getpid()
+    assert executor._pool is None
+    assert SolveExecutor(max_workers=0).run(os.getpid, cost=10**9) == os.getpid()
+
+
+def test_costly_solves_run_in_the_pool():
+    executor = SolveExecutor(max_workers=1, inline_max_cost=10)
+    try:
+        assert executor.run(os.getpid, cost=11) != os.getpid()
+    finally:
+        executor.shutdown()
+
+
+def test_full_queue_raises_solver_busy():
+    executor = SolveExecutor(max_workers=1, max_pending=1)
+    try:
+        running = executor.submit(time.sleep, 0.5)
+        with pytest.raises(SolverBusy):
+            executor.submit(time.sleep, 0)
+        assert executor.rejected == 1
+        running.result()
+    finally:
+        executor.shutdown()
+
+
+def test_full_queue_answers_503(monkeypatch):
+    executor = SolveExecutor(max_workers=1, max_pending=1, inline_max_cost=-1)
+    monkeypatch.setattr(api, "solve_executor", executor)
+    executor._slots.acquire()                   # queue already full
+    response = api.app.test_client().post(
+        "/api/run/batch", json={"flowsheets": [single_pipe("OUTLET_PRESSURE")]})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert "queue is full" in response.get_json()["error"]
+
+
+def test_pooled_solve_reports_its_counters():
+    executor = SolveExecutor(max_workers=1, inline_max_cost=-1)
+    solves = _newton_solves()
+    token = start_request()
+    try:
+        report = executor.run(execute_flowsheet_extended, tree_network(4), "records", cost=1)
+        timer = current()
+    finally:
+        end_request(token)
+        executor.shutdown()
+    assert report["results"]
+    assert timer.counters["solver_iterations"] > 0
+    assert "solve" in timer.stages
+    assert _newton_solves() == solves + 1
+
+
+def test_solver_counts_are_empty_in_multiprocess_mode(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    assert solver_counts() == {}
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from components.Pipe import Pipe
+from components.PipeBatch import PipeBatch
+from helpers import _flow_rate_estimate, solve_flow_rate, solve_flow_rate_batch
+
+# (diameter m, length m, roughness mm, ΔP Pa): laminar, transitional, turbulent, fully rough
+CASES = [
+    (0.01, 100.0, 0.045, 50.0),
+    (0.05, 100.0, 0.045, 150.0),
+    (0.1, 100.0, 0.045, 5_000.0),
+    (0.05, 10.0, 2.0, 2e6),
+]
+
+
+def _pipe(D, L, eps, flow=None):
+    return Pipe("p", D, L, eps, flow, 998.0, 1.0)
+
+
+@pytest.mark.parametrize("D, L, eps, drop", CASES)
+def test_estimate_brackets_root(D, L, eps, drop):
+    # exact in laminar flow, an upper bound on the flow otherwise
+    estimate = _flow_rate_estimate(_pipe(D, L, eps), drop)
+    assert _pipe(D, L, eps, estimate).solve()["pressure_drop_Pa"] >= drop * (1 - 1e-12)
+
+
+@pytest.mark.parametrize("D, L, eps, drop", CASES)
+def test_solve_flow_rate_matches_pipe(D, L, eps, drop):
+    result = solve_flow_rate(_pipe(D, L, eps), 1e5 + drop, 1e5, warm_start=False)
+    assert result["solver_converged"]
+    assert result["solver_iterations"] <= 12
+    check = _pipe(D, L, eps, result["mass_flowrate"]).solve()
+    assert check["pressure_drop_Pa"] == pytest.approx(drop, rel=1e-8)
+    assert abs(result["solver_residual_Pa"]) <= max(1e-5, 1e-10 * drop)
+
+
+def test_iteration_limit_reports_not_converged():
+    result = solve_flow_rate(_pipe(0.1, 100.0, 0.045), 105_000.0, 100_000.0, max_iter=2, warm_start=False)
+    assert result["solver_converged"] is False
+    assert result["solver_iterations"] == 2
+
+
+@pytest.mark.parametrize("inlet", [100_000.0, 90_000.0])
+def test_inlet_not_above_outlet(inlet):
+    with pytest.raises(ValueError, match="Inlet pressure must exceed outlet pressure"):
+        solve_flow_rate(_pipe(0.1, 100.0, 0.045), inlet, 100_000.0)
+
+
+def test_batch_matches_scalar():
+    D, L, eps, drop = (np.array(column) for column in zip(*CASES))
+    drop = np.append(drop, -1.0)                            # no driving pressure
+    D, L, eps = np.append(D, 0.1), np.append(L, 100.0), np.append(eps, 0.045)
+    pipes = PipeBatch(D, L, eps, 0.0, 998.0, 1.0)
+    result = solve_flow_rate_batch(pipes, 1e5 + drop, 1e5)
+
+    assert result["converged"].tolist() == [True] * len(CASES) + [False]
+    assert np.isnan(result["mass_flowrate"][-1])
+    for i, case in enumerate(CASES):
+        scalar = solve_flow_rate(_pipe(*case[:3]), 1e5 + case[3], 1e5, warm_start=False)
+        assert result["mass_flowrate"][i] == pytest.approx(scalar["mass_flowrate"], rel=1e-7)
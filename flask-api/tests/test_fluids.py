@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from benchmarks.flowsheets import tree_network
+from fluids import fill_properties, properties
+from graph import FlowsheetGraph
+
+
+def _graph(feed_params, pipe_data=None):
+    flowsheet = tree_network(8)
+    flowsheet["nodes"][0]["data"]["params"].update(feed_params)
+    for edge in flowsheet["edges"]:
+        del edge["data"]["density"], edge["data"]["viscosity"]
+    if pipe_data:
+        flowsheet["edges"][-1]["data"].update(pipe_data)
+    return FlowsheetGraph.from_flowsheet(flowsheet)
+
+
+def test_named_feed_fluid_fills_every_pipe():
+    graph = fill_properties(_graph({"fluidType": "Seawater", "temperature": 30}))
+    seawater = properties("seawater", 30.0)
+    np.testing.assert_array_equal(graph.columns["density"], seawater.density)
+    np.testing.assert_array_equal(graph.columns["viscosity"], seawater.viscosity_cp)
+    assert graph.edge_data[0]["density"] == seawater.density      # edge data agrees with the columns
+
+
+def test_pipe_fluid_and_temperature_override_the_feed():
+    graph = fill_properties(_graph({"fluidType": "water"}, {"fluidType": "oil", "temperature": 60}))
+    assert graph.columns["density"][-1] == properties("oil", 60.0).density
+    assert graph.columns["density"][0] == properties("water").density
+
+
+def test_gas_density_follows_the_feed_pressure():
+    graph = fill_properties(_graph({"fluidType": "air", "pressure": 600}))
+    assert graph.columns["density"][0] == pytest.approx(6 * properties("air", 20.0, 100.0).density)
+
+
+def test_explicit_properties_are_kept():
+    graph = _graph({"fluidType": "water"}, {"density": 1100.0, "viscosity": 2.0})
+    filled = fill_properties(graph)
+    assert filled.columns["density"][-1] == 1100.0 and filled.columns["viscosity"][-1] == 2.0
+
+
+def test_out_of_range_temperature_is_rejected():
+    with pytest.raises(ValueError, match="valid from"):
+        fill_properties(_graph({"fluidType": "water", "temperature": 150}))
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from components.FrictionTable import MAX_RELATIVE_ERROR, RE_MAX, friction_table
+from components.Pipe import Pipe
+from components.PipeBatch import PipeBatch
+
+# (diameter m, roughness mm, mass flow kg/h) from laminar to fully rough
+CASES = [
+    (0.05, 0.045, 50.0),
+    (0.05, 0.045, 350.0),
+    (0.05, 0.045, 600.0),
+    (0.1, 0.0, 20_000.0),
+    (0.1, 0.045, 20_000.0),
+    (0.3, 1.5, 500_000.0),
+    (0.02, 2.0, 2_000.0),
+]
+
+
+def _pipe(D, eps, m, method):
+    return Pipe("p", D, 100.0, eps, m, 998.0, 1.0, friction_method=method).solve()
+
+
+def test_table_error_below_documented_bound():
+    assert friction_table().max_relative_error() < MAX_RELATIVE_ERROR
+
+
+def test_lookup_outside_table():
+    table = friction_table()
+    assert table.lookup(1000.0, 1e-3) is None
+    assert table.lookup(2 * RE_MAX, 1e-3) is None
+    assert table.lookup(1e5, 0.5) is None
+    assert np.isnan(table.lookup_array(np.array([1000.0, 1e5]), np.array([1e-3, 0.5]))).all()
+
+
+def test_curve_matches_lookup_array():
+    table = friction_table()
+    Re = np.geomspace(2000, RE_MAX, 500)
+    curve = table.curve(1e-3)
+    scalar = np.array([curve.friction_factor(r) for r in Re])
+    np.testing.assert_allclose(scalar, table.lookup_array(Re, 1e-3), rtol=1e-12)
+
+
+@pytest.mark.parametrize("D, eps, m", CASES)
+def test_pipe_table_close_to_exact(D, eps, m):
+    exact, table = _pipe(D, eps, m, "auto"), _pipe(D, eps, m, "table")
+    assert table["flow_regime"] == exact["flow_regime"]
+    assert table["friction_factor"] == pytest.approx(exact["friction_factor"], rel=MAX_RELATIVE_ERROR)
+    assert table["pressure_drop_Pa"] == pytest.approx(exact["pressure_drop_Pa"], rel=MAX_RELATIVE_ERROR)
+
+
+def test_pipe_and_pipebatch_agree_with_table():
+    D, eps, m = (np.array(column) for column in zip(*CASES))
+    batch = PipeBatch(D, 100.0, eps, m, 998.0, 1.0, friction_method="table")
+    records = batch.to_records()
+    for (d, e, flow), record in zip(CASES, records):
+        single = _pipe(d, e, flow, "table")
+        assert record["flow_regime"] == single["flow_regime"]
+        for key in ("reynolds_number", "friction_factor", "head_loss_m", "pressure_drop_Pa"):
+            assert record[key] == pytest.approx(single[key], rel=1e-9), key
+    np.testing.assert_allclose(batch.pressure_drop(m), batch.solve()["pressure_drop_Pa"], rtol=1e-12)
@@ -0,0 +1,33 @@
+from benchmarks.flowsheets import single_pipe
+from executor import SolveExecutor
+from jobs import FAILED, FINISHED, SUCCEEDED, JobStore
+
+
+def _store():
+    return JobStore(SolveExecutor(max_workers=0), chunk_size=2)
+
+
+def _events(job):
+    return [(event, data) for _, event, data in job.events(heartbeat=1.0) if event != "heartbeat"]
+
+
+def test_batch_job_streams_partials_then_done():
+    flowsheet = single_pipe("OUTLET_PRESSURE")
+    job = _store().submit({"flowsheets": [flowsheet] * 5})
+    events = _events(job)
+
+    event, data = events[-1]
+    assert event == "done" and data["status"] == SUCCEEDED
+    assert data["finished"] is not None and data["progress"] == {"done": 5, "total": 5}
+    assert sum(len(d["scenarios"]) for e, d in events if e == "partial") == 5
+    assert [e for e, _ in events].count("done") == 1
+    assert len(job.result()["scenarios"]) == 5
+
+
+def test_done_event_matches_final_status():
+    flowsheet = single_pipe("OUTLET_PRESSURE")
+    job = _store().submit({"flowsheet": flowsheet, "scenarios": [{"nope": {"diameter": 1}}]})
+    event, data = _events(job)[-1]
+    assert job.status in FINISHED
+    assert event == "done" and data["status"] == job.status == FAILED
+    assert data["error"] == job.error
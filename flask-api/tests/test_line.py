@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from benchmarks.flowsheets import node, pipe
+from components.Line import Line, element_pressure_drop
+from components.PipeBatch import PipeBatch
+from helpers import execute_flowsheet_extended
+
+
+def _flowsheet(data):
+    edge = pipe("e1", "f", "p", 0.1, flow=20_000.0)
+    edge["data"].update(data)
+    return {"nodes": [node("f", "feed", pressure=300), node("p", "product")], "edges": [edge]}
+
+
+def test_single_segment_line_matches_pipe():
+    single = execute_flowsheet_extended(_flowsheet({}))["results"]["e1"]
+    line = execute_flowsheet_extended(_flowsheet({"segments": [{"length": 100.0}]}))
+    assert line["calculation_mode"] == "NETWORK"
+    result = line["results"]["e1"]
+    for key in ("pressure_drop_Pa", "outlet_pressure_Pa", "friction_factor"):
+        assert result[key] == pytest.approx(single[key], rel=1e-9), key
+
+
+def test_elevation_and_fittings():
+    segments = [{"length": 60.0, "elevationChange": 5.0},
+                {"type": "fitting", "fitting": "elbow_90", "count": 2},
+                {"length": 40.0, "elevationChange": 3.0},
+                {"type": "fitting", "K": 0.5}]
+    report = execute_flowsheet_extended(_flowsheet({"segments": segments}))
+    result = report["results"]["e1"]
+    assert result["elevation_change_m"] == 8.0
+    assert result["static_pressure_Pa"] == pytest.approx(998 * Line.g * 8.0)
+
+    line = Line.from_params("e1", {"segments": segments, "diameter": 0.1, "roughness": 0.045})
+    assert line.diameters.size == 1                       # one distinct size
+    elements = PipeBatch(line.diameters, line.lengths, line.roughness, 0.0, 998, 1.0)
+    friction = element_pressure_drop(elements, line.k, np.array([20_000.0])).sum()
+    drop = result["inlet_pressure_Pa"] - result["outlet_pressure_Pa"]
+    assert drop == pytest.approx(friction + result["static_pressure_Pa"], rel=1e-9)
@@ -0,0 +1,48 @@
+import pytest
+
+from benchmarks.flowsheets import node, pipe
+from helpers import execute_flowsheet_extended
+from network import Network
+
+BRANCH_DIAMETER = 0.02          # Re 2000 at 113 kg/h, ~0.8 kPa over the branch
+
+
+def _two_branches(drop_kpa):
+    """A 20 mm branch at ~Re 2000 in parallel with a 100 mm one, 100 m each."""
+    nodes = [node("feed", "feed", pressure=100.0 + drop_kpa, fluidType="water"),
+             node("header", "splitter"), node("merge", "splitter"),
+             node("product", "product", pressure=100.0)]
+    edges = [pipe("e_in", "feed", "header", 0.5), pipe("e_out", "merge", "product", 0.5)]
+    for b, diameter in enumerate((BRANCH_DIAMETER, 0.1)):
+        nodes.append(node(f"b{b}", "splitter"))
+        edges += [pipe(f"e_b{b}a", "header", f"b{b}", diameter, 50.0),
+                  pipe(f"e_b{b}b", f"b{b}", "merge", diameter, 50.0)]
+    return {"nodes": nodes, "edges": edges}
+
+
+@pytest.mark.parametrize("drop_kpa", [0.8, 0.9, 1.1, 1.3, 1.4, 4.3, 4.4])
+def test_branch_on_a_regime_jump_converges_or_is_held(drop_kpa):
+    flowsheet = _two_branches(drop_kpa)
+    network = Network.from_flowsheet(flowsheet)
+    solution = network.solve()
+    assert solution.converged
+
+    held = {network.edge_ids[k] for k in solution.held.tolist()}
+    report = execute_flowsheet_extended(flowsheet)
+    assert "error" not in report
+    reynolds = report["results"]["e_b0a"]["reynolds_number"]
+    if held:
+        assert held == {"e_b0a", "e_b0b"}
+        assert reynolds == pytest.approx(2000.0, rel=1e-5)
+        assert "held at the critical Reynolds number" in report["warning"]
+    else:
+        assert "warning" not in report
+        assert network.regime_boundary_pipes(solution) is None
+
+
+def test_drop_inside_the_jump_holds_the_branch():
+    network = Network.from_flowsheet(_two_branches(1.1))
+    solution = network.solve()
+    assert solution.converged and solution.held.size == 2
+    warning = execute_flowsheet_extended(_two_branches(1.1))["warning"]
+    assert "['e_b0a', 'e_b0b']" in warning and "regime jump" in warning
@@ -0,0 +1,51 @@
+import pytest
+
+from benchmarks.flowsheets import single_pipe, tree_network
+from sessions import SolveSession
+
+
+def test_removed_edge_drops_orphaned_node():
+    session = SolveSession(tree_network(16))
+    session.solve_all()
+    assert "p3" in session.results
+
+    report = session.apply_delta({"removeEdges": ["e_p3"]})
+    assert report["removed"] == ["e_p3", "p3"]
+    assert "p3" not in session.results and "e_p3" not in session.results
+    assert "error" not in report
+
+
+def test_delta_reports_resolved_scope():
+    flowsheet = tree_network(4)
+    separate = single_pipe("OUTLET_PRESSURE")
+    for node in separate["nodes"]:
+        node["id"] = "x_" + node["id"]
+    for edge in separate["edges"]:
+        edge.update(id="x_" + edge["id"], source="x_" + edge["source"], target="x_" + edge["target"])
+    flowsheet["nodes"] += separate["nodes"]
+    flowsheet["edges"] += separate["edges"]
+
+    session = SolveSession(flowsheet)
+    first = session.solve_all()
+    total = len(flowsheet["nodes"]) + len(flowsheet["edges"])
+    assert first["resolved_elements"] == first["total_elements"] == total
+
+    report = session.apply_delta({"params": {"x_pipe": {"diameter": 0.08}}})
+    assert (report["resolved_components"], report["total_components"]) == (1, 2)
+    assert report["resolved_elements"] == 3
+    assert set(report["changed"]) <= {"x_feed", "x_pipe", "x_product"}
+
+
+def test_params_delta_edits_the_session_flowsheet():
+    flowsheet = single_pipe("OUTLET_PRESSURE")
+    flowsheet["nodes"].append({"id": "spare", "data": {"nodeType": "product", "params": {}}})
+    session = SolveSession(flowsheet)
+    session.solve_all()
+
+    session.apply_delta({"params": {"pipe": {"diameter": 0.08}, "feed": {"pressure": 450}}})
+    assert session.edges["pipe"]["data"]["diameter"] == 0.08
+    assert session.nodes["feed"]["data"]["params"]["pressure"] == 450
+    assert flowsheet["edges"][0]["data"]["diameter"] != 0.08          # caller's copy untouched
+
+    with pytest.raises(ValueError, match="unconnected"):
+        session.apply_delta({"params": {"spare": {"pressure": 100}}})
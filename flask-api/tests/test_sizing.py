@@ -0,0 +1,37 @@
+import numpy as np
+
+from benchmarks.flowsheets import single_pipe, tree_network
+from sizing import STANDARD_SIZES, execute_sizing
+
+
+def test_smallest_feasible_size_is_selected():
+    report = execute_sizing({"flowsheet": single_pipe("OUTLET_PRESSURE"), "maxVelocity": 1.5})
+    line = report["lines"]["pipe"]
+    feasible = line["candidates"]["feasible"]
+    velocity = np.array(line["candidates"]["flow_velocity_m_s"])
+    choice = feasible.index(True)
+    assert not any(feasible[:choice]) and velocity[choice] <= 1.5 < velocity[choice - 1]
+    assert (line["selected"], line["diameter"]) == STANDARD_SIZES[choice]
+    assert "warning" not in report
+
+
+def test_custom_sizes_are_sorted_and_limits_combine():
+    report = execute_sizing({"flowsheet": single_pipe("OUTLET_PRESSURE"),
+                             "sizes": [0.3, {"nominal": "DN100", "diameter": 0.1}, 0.05],
+                             "maxPressureDropPerLength": 100, "minVelocity": 0.1})
+    line = report["lines"]["pipe"]
+    assert line["candidates"]["nominal"] == ["0.05", "DN100", "0.3"]
+    assert line["selected"] == "DN100"                  # 0.05 m drops too much, 0.3 m is too slow
+
+
+def test_no_feasible_size_gives_a_warning():
+    report = execute_sizing({"flowsheet": single_pipe("OUTLET_PRESSURE"), "maxVelocity": 1e-3})
+    line = report["lines"]["pipe"]
+    assert line["selected"] is None and line["diameter"] is None
+    assert "pipe" in report["warning"]
+
+
+def test_network_solve_supplies_missing_design_flows():
+    report = execute_sizing({"flowsheet": tree_network(4), "maxVelocity": 2.0})
+    assert {line["flow_source"] for line in report["lines"].values()} == {"network"}
+    assert all(line["design_flow"] > 0 for line in report["lines"].values())
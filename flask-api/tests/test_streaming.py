@@ -0,0 +1,31 @@
+import json
+
+import app as api
+from benchmarks.flowsheets import tree_network
+from cache import ResultCache
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.data.splitlines()]
+
+
+def test_ndjson_run_streams_the_cached_report(monkeypatch):
+    monkeypatch.setattr(api, "result_cache", ResultCache(max_entries=8))
+    client = api.app.test_client()
+    flowsheet = tree_network(16)
+
+    streamed = client.post("/api/run", json={**flowsheet, "format": "ndjson"})
+    assert streamed.status_code == 200
+    assert api.result_cache.misses == 1
+    header, *records = _lines(streamed)
+    report = client.post("/api/run", json=flowsheet).get_json()
+    assert api.result_cache.hits == 1                  # one solve serves both layouts
+
+    assert header == {k: v for k, v in report.items() if k != "results"}
+    assert {r.pop("id"): r for r in records} == report["results"]
+    # each node, then the pipes leaving it
+    source = {edge["id"]: edge["source"] for edge in flowsheet["edges"]}
+    ids = [r["id"] for r in _lines(streamed)[1:]]
+    for before, pipe in zip(ids, ids[1:]):
+        if pipe in source:
+            assert source.get(before, before) == source[pipe]
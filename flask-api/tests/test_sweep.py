@@ -0,0 +1,29 @@
+import copy
+
+import numpy as np
+import pytest
+
+from benchmarks.flowsheets import single_pipe
+from fluids import properties
+from sweep import execute_sweep
+
+
+def test_sweep_fills_fluid_properties():
+    explicit = single_pipe("OUTLET_PRESSURE")
+    data = explicit["edges"][0]["data"]
+    implicit = copy.deepcopy(explicit)
+    for key in ("density", "viscosity"):
+        del implicit["edges"][0]["data"][key]
+
+    water = properties("water")                 # feed fluid, 20 °C
+    data.update(density=water.density, viscosity=water.viscosity_cp)
+    values = [1000.0, 5000.0, 50_000.0]
+    a = execute_sweep({"flowsheet": explicit, "values": values})["columns"]
+    b = execute_sweep({"flowsheet": implicit, "values": values})["columns"]
+    np.testing.assert_allclose(b["pressure_drop_Pa"], a["pressure_drop_Pa"], rtol=1e-12)
+    assert np.all(b["pressure_drop_Pa"] > 0)
+
+
+def test_sweep_rejects_unknown_pipe():
+    with pytest.raises(ValueError, match="Unknown pipe"):
+        execute_sweep({"flowsheet": single_pipe("OUTLET_PRESSURE"), "pipe": "nope", "values": [1.0]})
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from benchmarks.flowsheets import single_pipe, tree_network
+from helpers import CalculationMode, single_pipe_mode
+from timeseries import CHUNK_STEPS, execute_timeseries, timeseries_blocks
+
+
+def test_single_pipe_mode_needs_exactly_two_values():
+    assert single_pipe_mode(400.0, None, 20000.0) == CalculationMode.OUTLET_PRESSURE
+    assert single_pipe_mode(float("nan"), 100.0, 20000.0) == CalculationMode.INLET_PRESSURE
+    assert single_pipe_mode(400.0, 100.0, None) == CalculationMode.FLOW_RATE
+    with pytest.raises(ValueError, match="Invalid parameter combination"):
+        single_pipe_mode(400.0, 100.0, 20000.0)
+
+
+def test_reversed_pressures_fail_only_their_steps():
+    report = execute_timeseries({"flowsheet": single_pipe("flow_rate"),
+                                 "profiles": {"feed": {"pressure": [500, 50, 400, 100]}}})
+    solver = report["solver"]
+    assert solver["failed_steps"] == [1, 3]
+    assert solver["error"] == ("Inlet pressure must exceed outlet pressure to calculate flow rate "
+                               "(steps [1, 3])")
+    assert report["series"]["pipe"]["mass_flowrate"][1] is None
+    assert report["series"]["pipe"]["mass_flowrate"][2] > 0
+
+
+def test_streamed_blocks_match_the_full_report():
+    steps = CHUNK_STEPS + 40
+    payload = {"flowsheet": tree_network(8),
+               "profiles": {"feed": {"pressure": (500 + 20 * np.sin(np.arange(steps) / 5)).tolist()}}}
+    report = execute_timeseries(payload)
+    header, *blocks = timeseries_blocks(payload)
+    assert header == {k: report[k] for k in header}
+    assert [block["start"] for block in blocks] == [0, CHUNK_STEPS]
+    for element_id, columns in report["series"].items():
+        for quantity, values in columns.items():
+            streamed = sum((block["series"][element_id][quantity] for block in blocks), [])
+            np.testing.assert_allclose(streamed, values, rtol=1e-9)
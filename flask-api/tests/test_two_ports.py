@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from benchmarks.flowsheets import node, pipe
+from components.Pump import Pump, parse_curve
+from components.Valve import Valve
+from helpers import execute_flowsheet_extended
+
+CURVE = [{"flow": 0, "head": 30}, {"flow": 20, "head": 27}, {"flow": 40, "head": 18}]
+
+
+def _pump_and_valve():
+    return {
+        "nodes": [node("f", "feed", pressure=200), node("pu", "pump", curve=CURVE),
+                  node("v", "valve", kv=30, opening=0.6), node("p", "product", pressure=150)],
+        "edges": [pipe("e1", "f", "pu", 0.1), pipe("e2", "pu", "v", 0.1), pipe("e3", "v", "p", 0.1)],
+    }
+
+
+def test_network_matches_component_models():
+    results = execute_flowsheet_extended(_pump_and_valve())["results"]
+    m = results["e1"]["mass_flowrate"]
+    pump = Pump.from_params("pu", {"curve": CURVE}, 998.0)
+    valve = Valve.from_params("v", {"kv": 30, "opening": 0.6}, 998.0)
+    assert results["pu"]["pressure_change_Pa"] == pytest.approx(pump.process(m)[0], rel=1e-9)
+    assert results["v"]["pressure_change_Pa"] == pytest.approx(valve.process(m)[0], rel=1e-9)
+
+
+@pytest.mark.parametrize("model", [
+    Pump("pu", 998.0, pressure_rise=5e4, curve=parse_curve(CURVE), speed=0.9),
+    Valve("v", 30.0, 998.0, opening=0.5, characteristic="equal_percentage"),
+])
+def test_process_derivative(model):
+    m = np.array([-5000.0, 100.0, 20_000.0, 40_000.0])
+    h = 1e-3
+    _, slope = model.process(m)
+    numeric = (model.process(m + h)[0] - model.process(m - h)[0]) / (2 * h)
+    np.testing.assert_allclose(slope, numeric, rtol=1e-5, atol=1e-9)
+    assert model.name == model.id
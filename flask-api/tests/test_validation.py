@@ -0,0 +1,34 @@
+import app as api
+from benchmarks.flowsheets import node, pipe, tree_network
+from validation import MAX_ERRORS, validate_flowsheet
+
+
+def _broken():
+    return {
+        "nodes": [node("f", "feed", pressure=-5), node("v", "valve", opening=2),
+                  node("p", "product", pressure=100), node("x", "mixer")],
+        "edges": [pipe("e1", "f", "v", 0.0), pipe("e2", "v", "p", 0.1, length=-1),
+                  pipe("e3", "p", "x", 0.1), pipe("e4", "x", "nowhere", 0.1)],
+    }
+
+
+def test_every_problem_comes_back_in_one_400():
+    response = api.app.test_client().post("/api/run", json=_broken())
+    assert response.status_code == 400
+    body = response.get_json()
+    found = {(error["id"], error["field"]) for error in body["errors"]}
+    assert {("f", "pressure"), ("v", "opening"), ("v", "kv"), ("e1", "diameter"),
+            ("e2", "length"), ("p", None), ("x", "nodeType"), ("e4", "target")} <= found
+    assert body["error"].startswith("Invalid flowsheet: ")
+
+
+def test_valid_flowsheet_has_no_errors():
+    assert validate_flowsheet(tree_network(16)) == []
+
+
+def test_errors_are_capped():
+    flowsheet = {
+        "nodes": [node("f", "feed", pressure=200), node("p", "product", pressure=100)],
+        "edges": [pipe(f"e{k}", "f", "p", -1.0) for k in range(MAX_ERRORS + 5)],
+    }
+    assert len(validate_flowsheet(flowsheet)) == MAX_ERRORS
@@ -0,0 +1,59 @@
+import pytest
+
+from warmstart import DEFAULT_EXPONENT, WarmStartStore
+
+
+def _store_law(store, key, exponent, flows, k=1e-3):
+    for flow in flows:
+        store.remember(key, flow, k * flow ** exponent)
+
+
+def test_interpolates_on_the_power_law_between_stored_drops():
+    store = WarmStartStore()
+    _store_law(store, "pipe", 1.5, [1000.0, 4000.0])
+    start = store.lookup("pipe", 1e-3 * 2000.0 ** 1.5)
+    assert start.guess == pytest.approx(2000.0)
+    assert start.below == pytest.approx((1000.0, 1e-3 * 1000.0 ** 1.5))
+    assert start.above == pytest.approx((4000.0, 1e-3 * 4000.0 ** 1.5))
+
+
+def test_extrapolation_exponent_is_clamped_to_laminar_and_rough():
+    store = WarmStartStore()
+    _store_law(store, "steep", 3.0, [1000.0, 2000.0])      # n = 3 → clamped to 2
+    _store_law(store, "flat", 0.5, [1000.0, 2000.0])       # n = 0.5 → clamped to 1
+    top = 1e-3 * 2000.0 ** 3.0
+    assert store.lookup("steep", 4 * top).guess == pytest.approx(2000.0 * 2)
+    assert store.lookup("steep", 4 * top).above is None
+    top = 1e-3 * 2000.0 ** 0.5
+    assert store.lookup("flat", 4 * top).guess == pytest.approx(2000.0 * 4)
+
+
+def test_single_pair_uses_the_default_exponent():
+    store = WarmStartStore()
+    store.remember("pipe", 1000.0, 500.0)
+    assert store.lookup("pipe", 1000.0).guess == pytest.approx(1000.0 * 2 ** (1 / DEFAULT_EXPONENT))
+
+
+def test_least_recently_used_pipe_is_evicted():
+    store = WarmStartStore(max_entries=2)
+    store.remember("a", 1000.0, 500.0)
+    store.remember("b", 1000.0, 500.0)
+    store.lookup("a", 600.0)                               # "b" is now the oldest
+    store.remember("c", 1000.0, 500.0)
+    assert store.lookup("b", 600.0) is None
+    assert store.lookup("a", 600.0) is not None and store.lookup("c", 600.0) is not None
+    assert store.stats()["entries"] == 2
+
+
+def test_each_pipe_keeps_its_most_recent_points():
+    store = WarmStartStore(max_points=2)
+    for flow, drop in [(1000.0, 100.0), (2000.0, 300.0), (3000.0, 600.0)]:
+        store.remember("pipe", flow, drop)
+    start = store.lookup("pipe", 50.0)
+    assert start.below is None and start.above == (2000.0, 300.0)   # (1000, 100) was dropped
+
+
+def test_disabled_store_remembers_nothing():
+    store = WarmStartStore(max_entries=0)
+    store.remember("pipe", 1000.0, 500.0)
+    assert store.lookup("pipe", 500.0) is None
@@ -0,0 +1,466 @@
+"""
+timeseries.py
+-------------------
+Extended-period simulation: one flowsheet marched through time-varying
+feed / product pressures and pipe flows (e.g. 24 h at 1-minute steps).
+
+The flowsheet is compiled once.  Only the specified values change from
+step to step:
+
+  • a feed → pipe → product line is evaluated for every step at once,
+    as one :class:`PipeBatch` pass (or one ``solve_flow_rate_batch``
+    call when both pressures are given);
+  • a network is compiled as ``STACK_STEPS`` disjoint copies of itself,
+    one per step, and each block of steps is one Newton solve of that
+    stack, warm-started from the last solved step.  Only the specified
+    values change between blocks (``Network.set_specified``).  A block
+    that does not converge is marched one step at a time.
+
+Results are columnar: per element, one array per quantity over the
+steps.  ``TimeSeries.chunks`` produces them a block of steps at a time,
+which is how long horizons are streamed.
+
+Fluid properties are taken at the first step's conditions (gas densities
+follow the feed pressure of step 0).
+"""
+
+from __future__ import annotations
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from components.PipeBatch import PipeBatch
+from fluids import fill_properties
+from graph import FlowsheetGraph
+from helpers import (CalculationMode, is_single_pipe, single_pipe_mode, solve_flow_rate_batch, to_float,
+                     validate_order)
+from network import Network, solve_network
+from timing import timed
+
+MAX_STEPS = 100_000
+DEFAULT_INTERVAL_S = 60.0
+CHUNK_STEPS = 256
+STACK_STEPS = 16               # time steps solved together as one network …
+STACK_UNKNOWNS = 50_000        # … as long as the stacked system stays this small
+
+# Parameters that can follow a profile, per element kind
+NODE_PROFILE_KEYS = ("pressure",)                     # kPa, feeds and products
+EDGE_PROFILE_KEYS = ("massFlowRate",)                 # kg/h
+
+
+def execute_timeseries(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Entry point for ``/api/run/timeseries``; malformed payloads raise
+    ``ValueError``.
+
+    Payload::
+
+        {"flowsheet": {...},
+         "profiles": {"f1": {"pressure": [500, 498, ...]},      # kPa
+                      "e3": {"massFlowRate": [1200, 1180, ...]}},  # kg/h
+         "interval": 60, "start": 0}                           # seconds
+
+    Every profile has one value per step.  Steps that fail are reported in
+    ``solver.failed_steps`` and their results are null.
+    """
+    series = TimeSeries(payload)
+    return {**series.header(), **series.solve(0, series.steps)}
+
+
+def timeseries_blocks(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    The NDJSON lines of a streamed time series: the header, then the
+    results ``CHUNK_STEPS`` steps at a time (network solves carry over).
+    """
+    series = TimeSeries(payload)
+    return [series.header(), *series.chunks()]
+
+
+class TimeSeries:
+    """A flowsheet compiled once, plus its boundary-condition profiles."""
+
+    @timed("build")
+    def __init__(self, payload: Dict[str, Any]) -> None:
+        flowsheet = payload.get("flowsheet")
+        if not isinstance(flowsheet, dict) or "nodes" not in flowsheet or "edges" not in flowsheet:
+            raise ValueError("Time-series payload needs a 'flowsheet' with 'nodes' and 'edges'")
+        interval = to_float(payload.get("interval", DEFAULT_INTERVAL_S))
+        start = to_float(payload.get("start", 0.0))
+        if interval is None or not interval > 0 or start is None:
+            raise ValueError("'interval' must be a positive number of seconds and 'start' a number")
+
+        graph = FlowsheetGraph.from_flowsheet(flowsheet)
+        if graph.missing:
+            raise ValueError(f"Edges reference unknown nodes: {graph.missing}")
+        self.profiles = _profiles(payload.get("profiles"), graph)
+        self.steps = next(iter(self.profiles.values())).shape[0]
+        self.time_s = start + interval * np.arange(self.steps)
+        self.interval = interval
+
+        graph = graph.with_overrides(self._overrides(0))
+        self.order = graph.order
+        self.single_pipe = is_single_pipe(graph)
+        if self.single_pipe:
+            validate_order(graph)
+            self._build_single_pipe(fill_properties(graph))
+        else:
+            self._build_network(graph)
+        self.ids = [*graph.order, *graph.edge_ids]
+
+        # pipe → node incidence, for the node flows in the results
+        self._inflow = sp.csr_matrix((np.ones(graph.n_edges), (graph.dst, np.arange(graph.n_edges))),
+                                     shape=(graph.n_nodes, graph.n_edges))
+        self._outflow = sp.csr_matrix((np.ones(graph.n_edges), (graph.src, np.arange(graph.n_edges))),
+                                      shape=(graph.n_nodes, graph.n_edges))
+        self.graph = graph
+        self._last: Optional[_State] = None           # last solved step, for warm starts
+
+    def _overrides(self, step: int) -> Dict[str, Dict[str, Any]]:
+        overrides: Dict[str, Dict[str, Any]] = {}
+        for (element_id, key), values in self.profiles.items():
+            overrides.setdefault(element_id, {})[key] = float(values[step])
+        return overrides
+
+    # ──────────────────────────────
+    # ─── Build ────────────────────
+    # ──────────────────────────────
+    def _build_single_pipe(self, graph: FlowsheetGraph) -> None:
+        feed_id, product_id, pipe_id = graph.order[0], graph.order[1], graph.edge_ids[0]
+        inlet, outlet = graph.node_pressure[0], graph.node_pressure[1]
+        flow = graph.columns["massFlowRate"][0]
+        self.mode = single_pipe_mode(float(inlet), float(outlet), float(flow))
+
+        columns = {key: float(graph.columns[key][0])
+                   for key in ("diameter", "length", "roughness", "density", "viscosity")}
+        for key, value in columns.items():
+            if not value >= 0 or (value == 0 and key != "roughness"):
+                raise ValueError(f"Pipe {pipe_id} has an invalid '{key}'")
+        self._pipe = columns
+        # constant boundary values, Pa and kg/h; profiles replace them per step
+        self._inlet = self._profile_or(feed_id, "pressure", inlet) * 1000
+        self._outlet = self._profile_or(product_id, "pressure", outlet) * 1000
+        self._flow = self._profile_or(pipe_id, "massFlowRate", flow)
+
+    def _profile_or(self, element_id: str, key: str, value: float) -> np.ndarray:
+        profile = self.profiles.get((element_id, key))
+        return profile if profile is not None else np.full(self.steps, value)
+
+    def _build_network(self, graph: FlowsheetGraph) -> None:
+        self.mode = CalculationMode.NETWORK
+        pressures = {graph.node_index[element_id]: values * 1000
+                     for (element_id, _), values in self.profiles.items() if element_id in graph.node_index}
+        flows = {graph.edge_index[element_id]: values
+                 for (element_id, _), values in self.profiles.items() if element_id in graph.edge_index}
+        args = (graph, pressures, flows)
+
+        self.march = _Stack(Network(graph), 1, *args)
+        copies = min(STACK_STEPS, self.steps, STACK_UNKNOWNS // self.march.network.n_unknowns)
+        self.stack = _Stack(None, copies, *args) if copies > 1 else None
+
+    # ──────────────────────────────
+    # ─── March ────────────────────
+    # ──────────────────────────────
+    def header(self) -> Dict[str, Any]:
+        return {
+            "order": self.order,
+            "calculation_mode": self.mode.name,
+            "steps": self.steps,
+            "interval_s": self.interval,
+            "ids": self.ids,
+        }
+
+    def chunks(self, chunk_steps: int = CHUNK_STEPS) -> Iterator[Dict[str, Any]]:
+        """Results ``chunk_steps`` steps at a time, in order (network solves carry over)."""
+        for start in range(0, self.steps, chunk_steps):
+            yield self.solve(start, min(start + chunk_steps, self.steps))
+
+    @timed("solve")
+    def solve(self, start: int, stop: int) -> Dict[str, Any]:
+        """Columnar results of steps ``start`` … ``stop`` − 1."""
+        if self.single_pipe:
+            node_in, node_out, flows, solver = self._solve_single_pipe(start, stop)
+        else:
+            node_in, node_out, flows, solver = self._solve_network(start, stop)
+        return {
+            "start": start,
+            "time_s": self.time_s[start:stop].tolist(),
+            "series": self._series(node_in, node_out, flows),
+            "solver": solver,
+        }
+
+    def _solve_single_pipe(self, start: int, stop: int):
+        n = stop - start
+        inlet, outlet = self._inlet[start:stop].copy(), self._outlet[start:stop].copy()
+        flow = self._flow[start:stop].copy()
+        pipe = self._pipe
+        pipes = PipeBatch(
+            inner_diameter=np.full(n, pipe["diameter"]),
+            length=pipe["length"],
+            roughness=pipe["roughness"],
+            mass_flowrate=flow if self.mode != CalculationMode.FLOW_RATE else 0.0,
+            density=pipe["density"],
+            viscosity_cp=pipe["viscosity"],
+        )
+        iterations, converged = np.zeros(n, dtype=int), np.ones(n, dtype=bool)
+        if self.mode == CalculationMode.FLOW_RATE:
+            solved = solve_flow_rate_batch(pipes, inlet, outlet)
+            flow, iterations, converged = solved["mass_flowrate"], solved["iterations"], solved["converged"]
+            flow[~converged] = np.nan
+        elif self.mode == CalculationMode.OUTLET_PRESSURE:
+            outlet = inlet - pipes.pressure_drop(flow)
+        else:
+            inlet = outlet + pipes.pressure_drop(flow)
+
+        failed = np.flatnonzero(~converged)
+        solver = {"method": "illinois" if self.mode == CalculationMode.FLOW_RATE else "direct",
+                  "iterations": iterations.tolist(), "converged": converged.tolist(),
+                  "failed_steps": (start + failed).tolist()}
+        reversed_, stalled = failed[inlet[failed] <= outlet[failed]], failed[inlet[failed] > outlet[failed]]
+        errors = []
+        if reversed_.size:
+            errors.append("Inlet pressure must exceed outlet pressure to calculate flow rate "
+                          f"(steps {(start + reversed_)[:10].tolist()})")
+        if stalled.size:
+            errors.append(f"Flow-rate solve did not converge (steps {(start + stalled)[:10].tolist()})")
+        if errors:
+            solver["error"] = "; ".join(errors)
+        pressures = np.column_stack([inlet, outlet])
+        return pressures, pressures, flow[:, None], solver
+
+    def _solve_network(self, start: int, stop: int):
+        """
+        Blocks of ``stack.copies`` steps solved as one system, warm-started
+        from the last solved step.  A block that does not converge is
+        marched one step at a time instead.
+        """
+        n, n_nodes, n_edges = stop - start, self.graph.n_nodes, self.graph.n_edges
+        node_in, node_out = np.full((n, n_nodes), np.nan), np.full((n, n_nodes), np.nan)
+        flows = np.full((n, n_edges), np.nan)
+        iterations, converged = np.zeros(n, dtype=int), np.zeros(n, dtype=bool)
+        failed: List[int] = []
+        notes: Dict[str, Optional[str]] = {"error": None, "warning": None}
+
+        def store(rows: slice, state: _State, count: int) -> None:
+            node_in[rows], node_out[rows], flows[rows] = state
+            iterations[rows], converged[rows] = count, True
+            self._last = (state[0][-1], state[1][-1], state[2][-1])
+
+        row, stack = 0, self.stack
+        while row < n:
+            take = min(stack.copies, n - row) if stack is not None else 0
+            if take:
+                # a short last block is padded by repeating its last step
+                steps = np.minimum(np.arange(start + row, start + row + stack.copies), stop - 1)
+                solved = stack.solve(steps, self._last)
+                if solved is not None:
+                    state, count, warning = solved
+                    store(slice(row, row + take), tuple(a[:take] for a in state), count)
+                    notes["warning"] = notes["warning"] or warning
+                    row += take
+                    continue
+
+            block_end = row + take if take else n
+            for step_row in range(row, block_end):
+                step = np.array([start + step_row])
+                solved = self.march.solve(step, self._last)
+                if solved is None and self._last is not None:
+                    # a poor warm start can fail where the default guess succeeds
+                    solved = self.march.solve(step, None)
+                if solved is None:
+                    failed.append(start + step_row)
+                    notes["error"] = notes["error"] or self.march.error
+                    continue
+                state, count, warning = solved
+                store(slice(step_row, step_row + 1), state, count)
+                notes["warning"] = notes["warning"] or warning
+            row = block_end
+
+        solver = {"method": "newton", "iterations": iterations.tolist(),
+                  "converged": converged.tolist(), "failed_steps": failed}
+        solver.update({key: note for key, note in notes.items() if note})
+        return node_in, node_out, flows, solver
+
+    # ──────────────────────────────
+    # ─── Result columns ───────────
+    # ──────────────────────────────
+    def _series(self, node_in: np.ndarray, node_out: np.ndarray,
+                flows: np.ndarray) -> Dict[str, Dict[str, List[Any]]]:
+        """
+        ``{element_id: {quantity: [value per step]}}`` from node inlet /
+        outlet pressures (steps × nodes, Pa) and pipe flows (steps × pipes).
+        """
+        graph = self.graph
+        n, n_edges = flows.shape
+        inflow = (self._inflow @ flows.T).T
+        outflow = (self._outflow @ flows.T).T
+        series: Dict[str, Dict[str, List[Any]]] = {}
+        for i, (node_id, node_type) in enumerate(zip(graph.order, graph.node_types)):
+            columns = {"pressure_Pa": node_in[:, i],
+                       "mass_flowrate": outflow[:, i] if node_type == "feed" else inflow[:, i]}
+            if node_type in ("pump", "valve"):
+                columns["outlet_pressure_Pa"] = node_out[:, i]
+            series[node_id] = {key: _to_list(column) for key, column in columns.items()}
+
+        if self.single_pipe:
+            pipe = self._pipe
+            D, L, eps, rho, mu = (np.full(n * n_edges, pipe[key]) for key in
+                                  ("diameter", "length", "roughness", "density", "viscosity"))
+        else:
+            pipes = self.march.network.pipes
+            D, L, eps, rho, mu = (np.tile(a, n) for a in
+                                  (pipes.D, pipes.L, pipes.epsilon * 1000, pipes.rho, pipes.mu_cp))
+        solved = PipeBatch(inner_diameter=D, length=L, roughness=eps,
+                           mass_flowrate=np.abs(flows).ravel(),
+                           density=rho, viscosity_cp=mu).solve()
+        velocity = solved["flow_velocity_m_s"].reshape(n, n_edges)
+        reynolds = solved["reynolds_number"].reshape(n, n_edges)
+        up, down = node_out[:, graph.src], node_in[:, graph.dst]
+        for k, edge_id in enumerate(graph.edge_ids):
+            columns = {
+                "mass_flowrate": flows[:, k],
+                "inlet_pressure_Pa": up[:, k],
+                "outlet_pressure_Pa": down[:, k],
+                "pressure_drop_Pa": up[:, k] - down[:, k],
+                "flow_velocity_m_s": np.where(flows[:, k] == 0, 0.0, velocity[:, k]),
+                "reynolds_number": reynolds[:, k],
+            }
+            series[edge_id] = {key: _to_list(column) for key, column in columns.items()}
+        return series
+
+
+# Node inlet pressures, node outlet pressures (Pa) and pipe flows (kg/h);
+# one row per step, or 1-D for a single step
+_State = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class _Stack:
+    """
+    ``copies`` disjoint copies of a network, copy j standing for one time
+    step, compiled into one :class:`Network`.  The copies share no
+    unknowns, so one Newton solve of the stack solves every step at once
+    and the sparse system grows linearly with ``copies``.  Only the
+    specified values change between solves.
+    """
+
+    def __init__(self, network: Optional[Network], copies: int, graph: FlowsheetGraph,
+                 pressures: Dict[int, np.ndarray], flows: Dict[int, np.ndarray]) -> None:
+        self.copies = copies
+        if network is None:
+            network = Network(_stacked(graph, copies))
+            index = network.graph.node_index
+            stacked = np.array([[index[f"{nid}#{j}"] for nid in graph.order] for j in range(copies)])
+        else:
+            stacked = np.arange(graph.n_nodes)[None, :]
+        self.network = network
+        self.error: Optional[str] = None
+        self.edge_ids = graph.edge_ids
+        self._n_edges = graph.n_edges
+
+        # stacked node → (copy, node of the flowsheet)
+        copy_of, node_of = np.empty(network.graph.n_nodes, dtype=int), np.empty(network.graph.n_nodes, dtype=int)
+        copy_of[stacked], node_of[stacked] = np.arange(copies)[:, None], np.arange(graph.n_nodes)[None, :]
+        self._in_ports, self._out_ports = network.in_port[stacked], network.out_port[stacked]
+
+        p_nodes = network.pressure_spec_nodes
+        f_edges = np.array([k for k, _ in network.flow_specs], dtype=int)
+        self._p_copy, self._f_copy = copy_of[p_nodes], f_edges // graph.n_edges
+        self._p_base = np.array([v for _, v in network.pressure_specs])
+        self._f_base = np.array([v for _, v in network.flow_specs])
+        self._p_profiles = [(np.flatnonzero(node_of[p_nodes] == i), values) for i, values in pressures.items()]
+        self._f_profiles = [(np.flatnonzero(f_edges % graph.n_edges == k), values) for k, values in flows.items()]
+        self._specs: Optional[np.ndarray] = None
+        self._state: Optional[_State] = None
+
+    def solve(self, steps: np.ndarray, last: Optional[_State]
+              ) -> Optional[Tuple[_State, int, Optional[str]]]:
+        """
+        Solves steps ``steps`` (one per copy) from the last solved step.
+        Returns (state, Newton iterations, warning), or None when the solve
+        fails or does not converge (``error`` then says why, if known).
+        """
+        network = self.network
+        p_values, f_values = self._p_base.copy(), self._f_base.copy()
+        for slots, values in self._p_profiles:
+            p_values[slots] = values[steps[self._p_copy[slots]]]
+        for slots, values in self._f_profiles:
+            f_values[slots] = values[steps[self._f_copy[slots]]]
+        specs = np.concatenate([p_values, f_values])
+        if self._state is not None and last is not None and np.array_equal(specs, self._specs):
+            return self._state, 0, None                     # nothing changed
+
+        network.set_specified(p_values, f_values)
+        x0 = None
+        if last is not None:
+            x0 = network.initial_state()
+            x0[self._in_ports], x0[self._out_ports] = last[0], last[1]
+            x0[network.n_ports:] = np.tile(last[2], self.copies)
+        report, solution = solve_network(network, x0=x0, layout=None)
+        self.error = report.get("error")
+        if solution is None or not (solution.converged or self.copies == 1):
+            return None
+
+        P = solution.pressures
+        state = (P[self._in_ports], P[self._out_ports], solution.flows.reshape(self.copies, self._n_edges))
+        warning = report.get("warning")
+        if self.copies > 1 and solution.held.size:
+            held = sorted({self.edge_ids[k] for k in (solution.held % self._n_edges).tolist()})
+            warning = (f"Pipes {held[:10]} sit on a friction-factor regime jump (Re 2000/4000) in "
+                       "some steps; their flow is held at the critical Reynolds number")
+        self._specs, self._state = specs, state
+        return state, solution.iterations, warning
+
+
+def _stacked(graph: FlowsheetGraph, copies: int) -> FlowsheetGraph:
+    """``copies`` disjoint copies of ``graph``; copy j's ids end in ``#j``."""
+    nodes = [{"id": f"{nid}#{j}", "data": {"nodeType": ntype, "params": params}}
+             for j in range(copies)
+             for nid, ntype, params in zip(graph.order, graph.node_types, graph.node_params)]
+    ends = [(graph.order[s], graph.order[t]) for s, t in zip(graph.src.tolist(), graph.dst.tolist())]
+    edges = [{"id": f"{eid}#{j}", "source": f"{source}#{j}", "target": f"{target}#{j}", "data": data}
+             for j in range(copies)
+             for eid, (source, target), data in zip(graph.edge_ids, ends, graph.edge_data)]
+    return FlowsheetGraph(nodes, edges)
+
+
+def _to_list(column: np.ndarray) -> List[Any]:
+    """JSON-ready list; NaN (failed steps) becomes null."""
+    finite = np.isfinite(column)
+    return column.tolist() if finite.all() else np.where(finite, column, None).tolist()
+
+
+def _profiles(raw: Any, graph: FlowsheetGraph) -> Dict[Tuple[str, str], np.ndarray]:
+    """``{(element id, parameter): values}``, all of one length."""
+    if not isinstance(raw, dict) or not raw:
+        raise ValueError("'profiles' must map element ids to {parameter: [value per step]}")
+    profiles: Dict[Tuple[str, str], np.ndarray] = {}
+    for element_id, params in raw.items():
+        if element_id in graph.node_index:
+            node_type = graph.node_types[graph.node_index[element_id]]
+            if node_type not in ("feed", "product"):
+                raise ValueError(f"Only feeds and products take pressure profiles, not '{element_id}'")
+            allowed = NODE_PROFILE_KEYS
+        elif element_id in graph.edge_index:
+            allowed = EDGE_PROFILE_KEYS
+        else:
+            raise ValueError(f"Profile for unknown element '{element_id}'")
+        if not isinstance(params, dict) or not params:
+            raise ValueError(f"Profile for '{element_id}' must be an object of {{parameter: [values]}}")
+        for key, values in params.items():
+            if key not in allowed:
+                raise ValueError(f"'{element_id}' cannot follow a '{key}' profile; "
+                                 f"profiles are allowed for {list(allowed)}")
+            try:
+                values = np.asarray(values, dtype=float)
+            except (TypeError, ValueError):
+                raise ValueError(f"Profile '{element_id}.{key}' must be a list of numbers")
+            if values.ndim != 1 or values.size == 0 or not np.all(np.isfinite(values)):
+                raise ValueError(f"Profile '{element_id}.{key}' must be a non-empty list of numbers")
+            profiles[element_id, key] = values
+
+    lengths = {values.size for values in profiles.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Profiles must all have the same number of steps, got {sorted(lengths)}")
+    if lengths.pop() > MAX_STEPS:
+        raise ValueError(f"At most {MAX_STEPS} time steps")
+    return profiles
@@ -0,0 +1,126 @@
+"""
+timing.py
+-------------------
+Per-request instrumentation: wall time per stage (parse, graph, validate,
+build, solve, serialize) and solver counters such as iterations.
+
+A ``RequestTimer`` is bound to the current context for the duration of
+a request; solver code records into it through ``stage`` / ``timed`` /
+``count`` and pays only a context-variable lookup when no request is
+being timed.  ``app.py`` turns the result into a log line and, when
+enabled, a ``Server-Timing`` header.
+"""
+
+from __future__ import annotations
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, Optional, Set
+
+# Parent of every solver logger ("solver.helpers", "solver.timing", ...),
+# so one level controls them all
+logger = logging.getLogger("solver")
+
+
+class RequestTimer:
+    """Stage durations (seconds) and counters for one request."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._active: Set[str] = set()
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value, durations in milliseconds."""
+        entries = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items()]
+        entries.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(entries)
+
+    def summary(self) -> str:
+        """One ``key=value`` line for the log."""
+        parts = [f"total={self.elapsed() * 1000:.2f}ms"]
+        parts += [f"{name}={seconds * 1000:.2f}ms" for name, seconds in self.stages.items()]
+        parts += [f"{name}={value}" for name, value in self.counters.items()]
+        return " ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimer]] = ContextVar("request_timer", default=None)
+
+
+def start_request() -> Token:
+    """Binds a fresh ``RequestTimer`` to the current context."""
+    return _current.set(RequestTimer())
+
+
+def end_request(token: Token) -> Optional[RequestTimer]:
+    """Unbinds the timer set by ``start_request`` and returns it."""
+    timer = _current.get()
+    _current.reset(token)
+    return timer
+
+
+def current() -> Optional[RequestTimer]:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Adds the wall time of the block to stage ``name``.  Re-entering a
+    stage that is already running (e.g. a solve inside a batch solve)
+    is not counted twice.
+    """
+    timer = _current.get()
+    if timer is None or name in timer._active:
+        yield
+        return
+    timer._active.add(name)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - t0)
+        timer._active.discard(name)
+
+
+def timed(name: str):
+    """Decorator form of :func:`stage`."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name: str, value: int = 1) -> None:
+    """Adds ``value`` to counter ``name`` of the current request, if any."""
+    timer = _current.get()
+    if timer is not None:
+        timer.count(name, value)
+
+
+def merge(stages: Dict[str, float], counters: Dict[str, int]) -> None:
+    """Adds stage times and counters recorded in another process to the current request."""
+    timer = _current.get()
+    if timer is None:
+        return
+    for name, seconds in stages.items():
+        timer.add(name, seconds)
+    for name, value in counters.items():
+        timer.count(name, value)
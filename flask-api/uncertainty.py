@@ -0,0 +1,344 @@
+"""
+uncertainty.py
+-------------------
+Monte Carlo uncertainty analysis of one pipe.
+
+Roughness, viscosity, density and flow are often only known within a
+range.  Each of them can be given a distribution; the pipe is then
+evaluated at N random draws in one vectorised pass over
+:class:`PipeBatch` arrays (or, when the flow is the unknown, one
+vectorised ``solve_flow_rate_batch``), and the report gives the mean,
+spread and percentiles of inlet / outlet pressure, ΔP and flow.
+
+The calculation mode follows the pipe's boundaries, as for a single-pipe
+flowsheet: a pressurised feed upstream and a known flow give outlet
+pressures, a pressurised product downstream and a known flow give
+required inlet pressures, and both pressures without a flow give flow
+rates.
+
+Draws come from ``numpy.random.default_rng(seed)`` in batches that double
+in size.  After each batch the percentiles are recomputed; sampling
+stops early once no percentile moved by more than ``tolerance`` times
+the spread of its quantity.  The same seed and payload always give the
+same samples and the same report.
+"""
+
+from __future__ import annotations
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from components.PipeBatch import PipeBatch
+from fluids import fill_properties
+from graph import FlowsheetGraph
+from helpers import (FRICTION_METHODS, CalculationMode, boundary_pressures, pipe_index,
+                     solve_flow_rate_batch, to_float)
+from timing import stage
+
+MAX_SAMPLES = 1_000_000
+DEFAULT_SAMPLES = 10_000
+FIRST_BATCH = 4096
+DEFAULT_PERCENTILES = (5.0, 50.0, 95.0)
+DEFAULT_TOLERANCE = 0.01
+
+# Uncertain parameter (edge ``data`` key) → PipeBatch argument
+UNCERTAIN_PARAMETERS = {
+    "massFlowRate": "mass_flowrate",
+    "roughness": "roughness",
+    "viscosity": "viscosity_cp",
+    "density": "density",
+}
+
+
+# ──────────────────────────────────────────────────────────
+# Distributions
+# ──────────────────────────────────────────────────────────
+# name → (sampler(rng, spec, size), required keys); ``spec`` has the
+# defaults filled in from the pipe's own value (see ``_spec``)
+Sampler = Callable[[np.random.Generator, Dict[str, float], int], np.ndarray]
+
+DISTRIBUTIONS: Dict[str, Tuple[Sampler, Tuple[str, ...]]] = {
+    "normal": (lambda rng, s, n: rng.normal(s["mean"], s["std"], n), ("mean", "std")),
+    "uniform": (lambda rng, s, n: rng.uniform(s["low"], s["high"], n), ("low", "high")),
+    "triangular": (lambda rng, s, n: rng.triangular(s["low"], s["mode"], s["high"], n),
+                   ("low", "mode", "high")),
+    "lognormal": (lambda rng, s, n: s["median"] * np.exp(rng.normal(0.0, s["sigma"], n)),
+                  ("median", "sigma")),
+}
+
+# Keys that default to the pipe's own value
+_CENTRE_KEYS = {"normal": "mean", "triangular": "mode", "lognormal": "median"}
+
+
+def _spec(parameter: str, raw: Any, base: Optional[float]) -> Tuple[str, Dict[str, float]]:
+    """Validated ``(distribution, parameters)`` for ``parameter``."""
+    if not isinstance(raw, dict):
+        raise ValueError(f"Distribution for '{parameter}' must be an object with a 'distribution' name")
+    name = raw.get("distribution", "normal")
+    if name not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution '{name}' for '{parameter}'; "
+                         f"choose one of {sorted(DISTRIBUTIONS)}")
+    _, keys = DISTRIBUTIONS[name]
+    spec: Dict[str, float] = {}
+    for key in keys:
+        value = to_float(raw.get(key))
+        if value is None and key == _CENTRE_KEYS.get(name):
+            value = base
+        if value is None or not math.isfinite(value):
+            raise ValueError(f"Distribution for '{parameter}' needs a numeric '{key}'")
+        spec[key] = value
+
+    if name == "normal" and spec["std"] < 0 or name == "lognormal" and spec["sigma"] < 0:
+        raise ValueError(f"Distribution for '{parameter}' needs a non-negative spread")
+    if name == "uniform" and not spec["low"] <= spec["high"]:
+        raise ValueError(f"Distribution for '{parameter}' needs 'low' <= 'high'")
+    if name == "triangular" and not spec["low"] <= spec["mode"] <= spec["high"]:
+        raise ValueError(f"Distribution for '{parameter}' needs 'low' <= 'mode' <= 'high'")
+    if name == "lognormal" and spec["median"] <= 0:
+        raise ValueError(f"Distribution for '{parameter}' needs a positive 'median'")
+    return name, spec
+
+
+def _draw(rng: np.random.Generator, parameter: str, name: str,
+          spec: Dict[str, float], size: int) -> np.ndarray:
+    """
+    ``size`` draws, redrawing values outside the parameter's physical range
+    (negative roughness, non-positive viscosity, density or flow), so a
+    normal distribution close to zero is truncated rather than clipped.
+    """
+    sampler, _ = DISTRIBUTIONS[name]
+    minimum_ok = (lambda v: v >= 0) if parameter == "roughness" else (lambda v: v > 0)
+    values = sampler(rng, spec, size)
+    for _ in range(20):
+        bad = np.flatnonzero(~minimum_ok(values))
+        if bad.size == 0:
+            return values
+        values[bad] = sampler(rng, spec, bad.size)
+    raise ValueError(f"Distribution for '{parameter}' puts too much weight on invalid values")
+
+
+# ──────────────────────────────────────────────────────────
+# Entry point
+# ──────────────────────────────────────────────────────────
+def execute_uncertainty(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Entry point for ``/api/run/uncertainty``; malformed payloads raise
+    ``ValueError``.
+
+    Payload::
+
+        {"flowsheet": {...}, "pipe": "e1",            # pipe optional if only one
+         "distributions": {                           # or the pipe's data["uncertainty"]
+             "roughness": {"distribution": "uniform", "low": 0.02, "high": 0.1},
+             "viscosity": {"distribution": "normal", "std": 0.05},    # mean: pipe value
+             ...},
+         "samples": 10000, "seed": 1,
+         "percentiles": [5, 50, 95],
+         "tolerance": 0.01,                           # 0: always draw every sample
+         "frictionMethod": "auto" | "table"}
+    """
+    flowsheet = payload.get("flowsheet")
+    if not isinstance(flowsheet, dict) or "nodes" not in flowsheet or "edges" not in flowsheet:
+        raise ValueError("Uncertainty payload needs a 'flowsheet' with 'nodes' and 'edges'")
+    method = payload.get("frictionMethod", "auto")
+    if method not in FRICTION_METHODS:
+        raise ValueError(f"frictionMethod must be one of {FRICTION_METHODS}")
+
+    samples = payload.get("samples", DEFAULT_SAMPLES)
+    if not isinstance(samples, int) or isinstance(samples, bool) or not 1 <= samples <= MAX_SAMPLES:
+        raise ValueError(f"'samples' must be an integer from 1 to {MAX_SAMPLES}")
+    seed = payload.get("seed")
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        raise ValueError("'seed' must be a non-negative integer")
+    percentiles = _percentiles(payload.get("percentiles", DEFAULT_PERCENTILES))
+    tolerance = to_float(payload.get("tolerance", DEFAULT_TOLERANCE))
+    if tolerance is None or not tolerance >= 0:
+        raise ValueError("'tolerance' must be a non-negative number")
+
+    graph = FlowsheetGraph.from_flowsheet(flowsheet)
+    if graph.missing:
+        raise ValueError(f"Edges reference unknown nodes: {graph.missing}")
+    k = pipe_index(graph, payload.get("pipe"), "analyse")
+    if "segments" in graph.edge_data[k]:
+        raise ValueError(f"Pipe '{graph.edge_ids[k]}' is a multi-segment line; "
+                         "uncertainty analysis takes a single pipe")
+    graph = fill_properties(graph)
+    pipe_id = graph.edge_ids[k]
+    base = {key: float(graph.columns[key][k]) for key in
+            ("diameter", "length", "roughness", "massFlowRate", "density", "viscosity")}
+    base = {key: value if math.isfinite(value) else None for key, value in base.items()}
+
+    raw = payload.get("distributions", graph.edge_data[k].get("uncertainty"))
+    if not isinstance(raw, dict) or not raw:
+        raise ValueError(f"Give 'distributions' for at least one of {sorted(UNCERTAIN_PARAMETERS)}")
+    unknown = sorted(set(raw) - set(UNCERTAIN_PARAMETERS))
+    if unknown:
+        raise ValueError(f"Cannot attach distributions to {unknown}; "
+                         f"choose from {sorted(UNCERTAIN_PARAMETERS)}")
+
+    inlet, outlet = boundary_pressures(graph, k)
+    has_flow = base["massFlowRate"] is not None or "massFlowRate" in raw
+    mode = _mode(pipe_id, inlet, outlet, has_flow)
+    distributions = {p: _spec(p, raw[p], base[p]) for p in sorted(raw)}
+    for key in ("diameter", "length", "density", "viscosity", "roughness"):
+        value = base[key]
+        if key not in distributions and (value is None or value < 0 or (value == 0 and key != "roughness")):
+            raise ValueError(f"Pipe {pipe_id} has an invalid '{key}'")
+
+    with stage("solve"):
+        columns, drawn, stopped_early = _sample(
+            base, distributions, mode, inlet, outlet, method,
+            samples, np.random.default_rng(seed), percentiles, tolerance)
+
+    valid = np.isfinite(columns["mass_flowrate"])
+    return {
+        "pipe": pipe_id,
+        "calculation_mode": mode.name,
+        "samples": drawn,
+        "requested_samples": samples,
+        "seed": seed,
+        "stopped_early": stopped_early,
+        "failed": int(drawn - valid.sum()),
+        "percentiles": list(percentiles),
+        "distributions": {p: {"distribution": name, **spec} for p, (name, spec) in distributions.items()},
+        "results": {name: _summary(column[valid], percentiles) for name, column in columns.items()},
+    }
+
+
+def _sample(base: Dict[str, Optional[float]],
+            distributions: Dict[str, Tuple[str, Dict[str, float]]],
+            mode: CalculationMode,
+            inlet: Optional[float], outlet: Optional[float], method: str,
+            samples: int, rng: np.random.Generator,
+            percentiles: Tuple[float, ...], tolerance: float
+            ) -> Tuple[Dict[str, np.ndarray], int, bool]:
+    """
+    Draws and evaluates batches of doubling size until ``samples`` are
+    drawn or the percentiles settle.  Returns the result columns, the
+    number of samples drawn and whether sampling stopped early.
+    """
+    batches: Dict[str, List[np.ndarray]] = {}
+    drawn, size = 0, min(FIRST_BATCH, samples)
+    previous: Optional[np.ndarray] = None
+    while True:
+        for name, column in _evaluate(base, distributions, mode, inlet, outlet,
+                                      method, rng, size).items():
+            batches.setdefault(name, []).append(column)
+        drawn += size
+        if drawn >= samples:
+            break
+
+        columns = {name: np.concatenate(parts) for name, parts in batches.items()}
+        batches = {name: [column] for name, column in columns.items()}
+        current = np.array([_nan_percentiles(column, percentiles) for column in columns.values()])
+        if tolerance > 0 and previous is not None and _settled(previous, current, tolerance):
+            return columns, drawn, True
+        previous = current
+        size = min(drawn, samples - drawn)            # double the total each batch
+
+    return {name: np.concatenate(parts) for name, parts in batches.items()}, drawn, False
+
+
+def _evaluate(base: Dict[str, Optional[float]],
+              distributions: Dict[str, Tuple[str, Dict[str, float]]],
+              mode: CalculationMode,
+              inlet: Optional[float], outlet: Optional[float], method: str,
+              rng: np.random.Generator, size: int) -> Dict[str, np.ndarray]:
+    """Result columns for ``size`` fresh draws (parameters drawn in sorted order)."""
+    values: Dict[str, Any] = {key: base[key] for key in UNCERTAIN_PARAMETERS}
+    for parameter, (name, spec) in distributions.items():
+        values[parameter] = _draw(rng, parameter, name, spec, size)
+
+    pipes = PipeBatch(
+        inner_diameter=np.full(size, base["diameter"]),
+        length=base["length"],
+        roughness=values["roughness"],
+        mass_flowrate=values["massFlowRate"] if mode != CalculationMode.FLOW_RATE else 0.0,
+        density=values["density"],
+        viscosity_cp=values["viscosity"],
+        friction_method=method,
+    )
+    if mode == CalculationMode.FLOW_RATE:
+        solved = solve_flow_rate_batch(pipes, inlet, outlet)
+        flow = np.where(solved["converged"], solved["mass_flowrate"], np.nan)
+        return {
+            "inlet_pressure_Pa": np.full(size, inlet),
+            "outlet_pressure_Pa": np.full(size, outlet),
+            "pressure_drop_Pa": np.where(np.isnan(flow), np.nan, inlet - outlet),
+            "mass_flowrate": flow,
+        }
+
+    flow = pipes.mass_flowrate
+    drop = pipes.pressure_drop(flow)
+    if mode == CalculationMode.OUTLET_PRESSURE:
+        inlet_p, outlet_p = np.full(size, inlet), inlet - drop
+    else:
+        inlet_p, outlet_p = outlet + drop, np.full(size, outlet)
+    return {
+        "inlet_pressure_Pa": inlet_p,
+        "outlet_pressure_Pa": outlet_p,
+        "pressure_drop_Pa": drop,
+        "mass_flowrate": flow,
+    }
+
+
+# ──────────────────────────────────────────────────────────
+# Statistics
+# ──────────────────────────────────────────────────────────
+def _percentiles(raw: Any) -> Tuple[float, ...]:
+    try:
+        values = tuple(float(q) for q in raw)
+    except (TypeError, ValueError):
+        raise ValueError("'percentiles' must be a list of numbers between 0 and 100")
+    if not values or not all(0 <= q <= 100 for q in values):
+        raise ValueError("'percentiles' must be a list of numbers between 0 and 100")
+    return tuple(sorted(set(values)))
+
+
+def _nan_percentiles(column: np.ndarray, percentiles: Tuple[float, ...]) -> np.ndarray:
+    finite = column[np.isfinite(column)]
+    if finite.size == 0:
+        return np.full(len(percentiles), np.nan)
+    return np.percentile(finite, percentiles)
+
+
+def _settled(previous: np.ndarray, current: np.ndarray, tolerance: float) -> bool:
+    """Every percentile moved by at most ``tolerance`` × the spread of its quantity."""
+    spread = np.nanmax(current, axis=1) - np.nanmin(current, axis=1)
+    shift = np.nanmax(np.abs(current - previous), axis=1)
+    with np.errstate(invalid="ignore"):
+        return bool(np.all(shift <= tolerance * spread))
+
+
+def _summary(column: np.ndarray, percentiles: Tuple[float, ...]) -> Dict[str, Any]:
+    if column.size == 0:
+        return {"mean": None, "std": None, "min": None, "max": None,
+                "percentiles": {f"{q:g}": None for q in percentiles}}
+    return {
+        "mean": float(column.mean()),
+        "std": float(column.std()),
+        "min": float(column.min()),
+        "max": float(column.max()),
+        "percentiles": dict(zip((f"{q:g}" for q in percentiles),
+                                np.percentile(column, percentiles).tolist())),
+    }
+
+
+# ──────────────────────────────────────────────────────────
+# Flowsheet lookups
+# ──────────────────────────────────────────────────────────
+
+def _mode(pipe_id: str, inlet: Optional[float], outlet: Optional[float],
+          has_flow: bool) -> CalculationMode:
+    """Same three cases as ``detect_calculation_mode_from_instances``."""
+    if inlet is not None and has_flow and outlet is None:
+        return CalculationMode.OUTLET_PRESSURE
+    if outlet is not None and has_flow and inlet is None:
+        return CalculationMode.INLET_PRESSURE
+    if inlet is not None and outlet is not None and not has_flow:
+        return CalculationMode.FLOW_RATE
+    raise ValueError(
+        f"Pipe {pipe_id} needs exactly two of: a feed pressure upstream, a product "
+        "pressure downstream, a flow rate (value or distribution)"
+    )
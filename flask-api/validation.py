@@ -0,0 +1,454 @@
+"""
+validation.py
+-------------------
+Single-pass validation of a flowsheet payload, before any solver work.
+
+Every component type has a schema: its fields with type, unit and range,
+and the fields of which at least one must be given.  The schemas are
+built once at import.  ``validate_flowsheet`` walks the nodes and edges
+once, then checks each field for all elements of a type at a time
+(one float column per field, vectorised range checks), the port counts
+of every node type, and cycles with one Kahn pass over integer indices.
+
+All problems come back together, each with the id of the node or edge
+it belongs to, so a malformed payload costs one linear scan and is
+rejected before graphs, fluids or solvers are built.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from components.Line import Line
+from components.Pump import parse_curve
+from components.Valve import CHARACTERISTICS
+from timing import timed
+
+MAX_ERRORS = 1000               # errors kept per payload
+MAX_LISTED = 10                 # … of which the message names
+
+
+class FlowsheetError(ValueError):
+    """
+    A flowsheet that failed validation.  ``errors`` holds every problem as
+    ``{"id": element id or None, "field": param or None, "message": str}``.
+    """
+
+    def __init__(self, errors: List[Dict[str, Any]]) -> None:
+        self.errors = errors
+        shown = "; ".join(error["message"] for error in errors[:MAX_LISTED])
+        more = f" (and {len(errors) - MAX_LISTED} more)" if len(errors) > MAX_LISTED else ""
+        super().__init__(f"Invalid flowsheet: {shown}{more}")
+
+
+# ──────────────────────────────────────────────────────────
+# Field kinds
+# ──────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class Number:
+    """A finite number in ``unit``; blank (None / "") counts as not given."""
+    unit: str = ""
+    above: Optional[float] = None           # exclusive lower bound
+    minimum: Optional[float] = None         # inclusive bounds
+    maximum: Optional[float] = None
+
+    def out_of_range(self, x: np.ndarray) -> np.ndarray:
+        ok = np.ones(x.shape, dtype=bool)
+        if self.above is not None:
+            ok &= x > self.above
+        if self.minimum is not None:
+            ok &= x >= self.minimum
+        if self.maximum is not None:
+            ok &= x <= self.maximum
+        return ~ok & ~np.isnan(x)
+
+    def describe(self) -> str:
+        bounds = [f"{op} {value:g}" for op, value in
+                  ((">", self.above), ("≥", self.minimum), ("≤", self.maximum)) if value is not None]
+        unit = f" {self.unit}" if self.unit else ""
+        return f"a number {' and '.join(bounds)}{unit}" if bounds else f"a number{unit}"
+
+
+@dataclass(frozen=True)
+class Choice:
+    """One of ``options``."""
+    options: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class Text:
+    """A string."""
+
+
+@dataclass(frozen=True)
+class Parsed:
+    """Checked by ``parse(id, params)``, the component's own parser; it raises ``ValueError``."""
+    parse: Callable[[Any, Dict[str, Any]], Any]
+
+
+Field = Any                                 # Number | Choice | Text | Parsed
+
+
+@dataclass(frozen=True)
+class Schema:
+    label: str                              # "Feed", "Pipe", … in messages
+    fields: Dict[str, Field]
+    one_of: Tuple[Tuple[str, ...], ...] = ()    # per entry, at least one key must be given
+
+
+# ──────────────────────────────────────────────────────────
+# Component schemas
+# ──────────────────────────────────────────────────────────
+PRESSURE = Number("kPa", minimum=0.0)
+TEMPERATURE = Number("°C", minimum=-273.15)
+
+NODE_SCHEMAS: Dict[str, Schema] = {
+    "feed": Schema("Feed", {
+        "pressure": PRESSURE,
+        "temperature": TEMPERATURE,
+        "fluidType": Text(),
+    }),
+    "product": Schema("Product", {
+        "pressure": PRESSURE,
+    }),
+    "splitter": Schema("Splitter", {}),
+    "pump": Schema("Pump", {
+        "pressureRise": Number("kPa"),
+        "curve": Parsed(lambda id, params: parse_curve(params["curve"])),
+        "speed": Number(above=0.0),
+    }, one_of=(("pressureRise", "curve"),)),
+    "valve": Schema("Valve", {
+        "kv": Number("m³/h", above=0.0),
+        "cv": Number("US gpm", above=0.0),
+        "opening": Number(above=0.0, maximum=1.0),
+        "characteristic": Choice(tuple(sorted(CHARACTERISTICS))),
+        "rangeability": Number(above=1.0),
+    }, one_of=(("kv", "cv"),)),
+}
+
+PIPE_SCHEMA = Schema("Pipe", {
+    "diameter": Number("m", above=0.0),
+    "length": Number("m", above=0.0),
+    "roughness": Number("mm", minimum=0.0),
+    "massFlowRate": Number("kg/h"),
+    "density": Number("kg/m³", above=0.0),
+    "viscosity": Number("cP", above=0.0),
+    "temperature": TEMPERATURE,
+    "fluidType": Text(),
+    "segments": Parsed(Line.from_params),
+}, one_of=(("diameter", "segments"), ("length", "segments")))
+
+# Inlet / outlet pipe counts: (min in, max in, min out, max out); None = unbounded
+PORTS: Dict[str, Tuple[int, Optional[int], int, Optional[int]]] = {
+    "feed": (0, 0, 1, None),
+    "product": (1, None, 0, 0),
+    "splitter": (1, None, 1, None),
+    "pump": (1, 1, 1, 1),
+    "valve": (1, 1, 1, 1),
+}
+PORT_MESSAGES = {
+    "feed": "cannot have incoming pipes",
+    "product": "cannot have outgoing pipes",
+    "splitter": "needs at least one inlet and one outlet pipe",
+    "pump": "needs exactly one inlet and one outlet pipe",
+    "valve": "needs exactly one inlet and one outlet pipe",
+}
+
+
+# ──────────────────────────────────────────────────────────
+# Entry points
+# ──────────────────────────────────────────────────────────
+def check_flowsheet(flowsheet: Any) -> None:
+    """Raises :class:`FlowsheetError` listing every problem of ``flowsheet``."""
+    errors = validate_flowsheet(flowsheet)
+    if errors:
+        raise FlowsheetError(errors)
+
+
+def check_payload(payload: Dict[str, Any]) -> None:
+    """
+    :func:`check_flowsheet` for the flowsheets a batch, sweep, uncertainty,
+    sizing or time-series payload carries: its ``flowsheet``, or each of
+    its ``flowsheets`` (errors then name the flowsheet's index).  A
+    missing flowsheet is left to the endpoint, which reports it itself.
+    """
+    if payload.get("flowsheet") is not None:
+        check_flowsheet(payload["flowsheet"])
+    flowsheets = payload.get("flowsheets")
+    if not isinstance(flowsheets, list):
+        return
+    errors: List[Dict[str, Any]] = []
+    for i, flowsheet in enumerate(flowsheets):
+        errors += [{**error, "flowsheet": i, "message": f"Flowsheet {i}: {error['message']}"}
+                   for error in validate_flowsheet(flowsheet)]
+        if len(errors) >= MAX_ERRORS:
+            del errors[MAX_ERRORS:]
+            break
+    if errors:
+        raise FlowsheetError(errors)
+
+
+@timed("validate")
+def validate_flowsheet(flowsheet: Any) -> List[Dict[str, Any]]:
+    """
+    Every problem of ``flowsheet`` (at most ``MAX_ERRORS``), in payload
+    order within each check; empty when it is valid.  Nodes that touch no
+    pipe are ignored, as the solvers ignore them.
+    """
+    if not isinstance(flowsheet, dict) or not isinstance(flowsheet.get("nodes"), list) \
+            or not isinstance(flowsheet.get("edges"), list):
+        return [_error(None, None, "Payload must contain top-level 'nodes' and 'edges' lists")]
+    errors = _Errors()
+
+    node_index, node_params, node_types = _scan_nodes(flowsheet["nodes"], errors)
+    edge_ids, edge_data, src, dst = _scan_edges(flowsheet["edges"], node_index, errors)
+    node_ids = list(node_index)
+
+    connected = np.zeros(len(node_ids), dtype=bool)
+    connected[src] = connected[dst] = True
+    types = np.array(node_types + [None], dtype=object)[:-1]    # (the None keeps it 1-D)
+    n_in = np.bincount(dst, minlength=len(node_ids))
+    n_out = np.bincount(src, minlength=len(node_ids))
+    known = np.zeros(len(node_ids), dtype=bool)
+    for ntype, schema in NODE_SCHEMAS.items():
+        of_type = types == ntype
+        known |= of_type
+        rows = np.flatnonzero(of_type & connected)
+        if rows.size:
+            _check_ports(ntype, rows, n_in[rows], n_out[rows], node_ids, errors)
+            rows_l = rows.tolist()
+            _check_schema(schema, [node_ids[i] for i in rows_l], [node_params[i] for i in rows_l], errors)
+    for i in np.flatnonzero(connected & ~known).tolist():
+        ntype = node_types[i]
+        if ntype is None:
+            errors.add(node_ids[i], "nodeType", f"Node {node_ids[i]} has no 'nodeType'")
+        else:
+            errors.add(node_ids[i], "nodeType", f"Node {node_ids[i]} has unsupported type {ntype!r}; "
+                                                f"expected one of {sorted(NODE_SCHEMAS)}")
+
+    valid = [k for k, data in enumerate(edge_data) if data is not None]
+    _check_schema(PIPE_SCHEMA, [edge_ids[k] for k in valid], [edge_data[k] for k in valid], errors)
+    _check_cycles(len(node_ids), src, dst, node_ids, errors)
+    return errors.entries
+
+
+# ──────────────────────────────────────────────────────────
+# Passes
+# ──────────────────────────────────────────────────────────
+class _Errors:
+    def __init__(self) -> None:
+        self.entries: List[Dict[str, Any]] = []
+
+    def add(self, element: Any, field: Optional[str], message: str) -> None:
+        if len(self.entries) < MAX_ERRORS:
+            self.entries.append(_error(element, field, message))
+
+
+def _error(element: Any, field: Optional[str], message: str) -> Dict[str, Any]:
+    return {"id": element, "field": field, "message": message}
+
+
+def _is_id(value: Any) -> bool:
+    return (isinstance(value, str) and value != "") or (isinstance(value, int) and not isinstance(value, bool))
+
+
+def _all_ids(ids: List[Any]) -> bool:
+    return set(map(type, ids)) <= {str, int} and "" not in ids
+
+
+def _scan_nodes(nodes: List[Any], errors: _Errors
+                ) -> Tuple[Dict[Any, int], List[Dict[str, Any]], List[Optional[str]]]:
+    """Node id → index, params and type of every well-formed node."""
+    try:                                    # well-formed payloads: whole-list comprehensions
+        ids = [node["id"] for node in nodes]
+        datas = [node.get("data") or {} for node in nodes]
+        params = [data.get("params") or {} for data in datas]
+        types = [data.get("nodeType") for data in datas]
+        index = dict(zip(ids, range(len(ids))))
+        if len(index) == len(ids) and _all_ids(ids) and set(map(type, params)) <= {dict}:
+            return index, params, types
+    except (TypeError, AttributeError, KeyError):
+        pass
+
+    index, params, types = {}, [], []
+    for n, node in enumerate(nodes):
+        nid = node.get("id") if isinstance(node, dict) else None
+        if not _is_id(nid):
+            errors.add(None, "id", f"Node #{n} needs a string 'id'")
+            continue
+        if nid in index:
+            errors.add(nid, "id", f"Node id {nid} is used more than once")
+            continue
+        data = node.get("data") or {}
+        node_params = (data.get("params") or {}) if isinstance(data, dict) else None
+        if not isinstance(node_params, dict):
+            errors.add(nid, "params", f"Node {nid} 'data' and 'data.params' must be objects")
+            node_params = {}
+        index[nid] = len(params)
+        params.append(node_params)
+        types.append(data.get("nodeType") if isinstance(data, dict) else None)
+    return index, params, types
+
+
+def _scan_edges(edges: List[Any], node_index: Dict[Any, int], errors: _Errors
+                ) -> Tuple[List[Any], List[Optional[Dict[str, Any]]], np.ndarray, np.ndarray]:
+    """
+    Ids and data of all edges (data None for malformed ones), and the node
+    indices of the edges whose ends both exist.
+    """
+    try:                                    # well-formed payloads: whole-list comprehensions
+        ids = [edge["id"] for edge in edges]
+        datas = [edge.get("data") or {} for edge in edges]
+        src = [node_index[edge["source"]] for edge in edges]
+        dst = [node_index[edge["target"]] for edge in edges]
+        if len(set(ids)) == len(ids) and _all_ids(ids) and set(map(type, datas)) <= {dict}:
+            return ids, datas, np.array(src, dtype=np.intp), np.array(dst, dtype=np.intp)
+    except (TypeError, AttributeError, KeyError):
+        pass
+
+    ids, datas, src, dst = [], [], [], []
+    seen = set()
+    for n, edge in enumerate(edges):
+        eid = edge.get("id") if isinstance(edge, dict) else None
+        if not _is_id(eid):
+            errors.add(None, "id", f"Edge #{n} needs a string 'id'")
+            continue
+        if eid in seen:
+            errors.add(eid, "id", f"Edge id {eid} is used more than once")
+            continue
+        seen.add(eid)
+        data = edge.get("data") or {}
+        ids.append(eid)
+        datas.append(data if isinstance(data, dict) else None)
+        if not isinstance(data, dict):
+            errors.add(eid, "data", f"Pipe {eid} 'data' must be an object")
+
+        s, t = (node_index.get(end) if _is_id(end) else None
+                for end in (edge.get("source"), edge.get("target")))
+        for end, i in (("source", s), ("target", t)):
+            if i is None:
+                errors.add(eid, end, f"Pipe {eid} references unknown {end} node {edge.get(end)!r}")
+        if s is not None and t is not None:
+            src.append(s)
+            dst.append(t)
+    return ids, datas, np.array(src, dtype=np.intp), np.array(dst, dtype=np.intp)
+
+
+def _check_ports(ntype: str, rows: np.ndarray, n_in: np.ndarray, n_out: np.ndarray,
+                 node_ids: List[Any], errors: _Errors) -> None:
+    lo_in, hi_in, lo_out, hi_out = PORTS[ntype]
+    bad = (n_in < lo_in) | (n_out < lo_out)
+    if hi_in is not None:
+        bad |= n_in > hi_in
+    if hi_out is not None:
+        bad |= n_out > hi_out
+    label = NODE_SCHEMAS[ntype].label
+    for i in rows[bad].tolist():
+        errors.add(node_ids[i], None, f"{label} {node_ids[i]} {PORT_MESSAGES[ntype]}")
+
+
+def _check_schema(schema: Schema, ids: Sequence[Any], params: Sequence[Dict[str, Any]],
+                  errors: _Errors) -> None:
+    """``schema`` for all elements of one type: one column per field."""
+    if not ids:
+        return
+    given: Dict[str, np.ndarray] = {}
+    for key, field in schema.fields.items():
+        values = list(map(dict.get, params, repeat(key)))
+        if isinstance(field, Number):
+            x, bad = _numbers(values)
+            present = given[key] = ~np.isnan(x) | bad
+        else:
+            present = given[key] = np.array([v is not None and v != "" for v in values], dtype=bool)
+        if not present.any():
+            continue
+
+        if isinstance(field, Number):
+            for j in np.flatnonzero(bad).tolist():
+                unit = f" ({field.unit})" if field.unit else ""
+                errors.add(ids[j], key, f"{schema.label} {ids[j]} '{key}' must be a number{unit}, "
+                                        f"got {values[j]!r}")
+            for j in np.flatnonzero(field.out_of_range(x) & ~bad).tolist():
+                errors.add(ids[j], key, f"{schema.label} {ids[j]} '{key}' must be {field.describe()}, "
+                                        f"got {values[j]!r}")
+        elif isinstance(field, Choice):
+            for j in np.flatnonzero(present).tolist():
+                if values[j] not in field.options:
+                    errors.add(ids[j], key, f"{schema.label} {ids[j]} '{key}' must be one of "
+                                            f"{list(field.options)}, got {values[j]!r}")
+        elif isinstance(field, Text):
+            for j in np.flatnonzero(present).tolist():
+                if not isinstance(values[j], str):
+                    errors.add(ids[j], key, f"{schema.label} {ids[j]} '{key}' must be a string")
+        else:
+            for j in np.flatnonzero(present).tolist():
+                try:
+                    field.parse(ids[j], params[j])
+                except (ValueError, TypeError) as exc:
+                    errors.add(ids[j], key, f"{schema.label} {ids[j]} '{key}': {exc}")
+
+    for keys in schema.one_of:
+        missing = ~np.logical_or.reduce([given[key] for key in keys])
+        for j in np.flatnonzero(missing).tolist():
+            errors.add(ids[j], keys[0], f"{schema.label} {ids[j]} needs "
+                                        f"{' or '.join(repr(key) for key in keys)}")
+
+
+def _numbers(values: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Floats (NaN where not given) and the mask of values that are not finite numbers."""
+    try:
+        x = np.array(values, dtype=float)               # numbers and None (→ NaN)
+        if x.ndim == 1:
+            return x, np.isinf(x)
+    except (TypeError, ValueError):
+        pass
+    x = np.full(len(values), np.nan)
+    bad = np.zeros(len(values), dtype=bool)
+    for j, value in enumerate(values):
+        if value is None or value == "":
+            continue
+        try:
+            x[j] = float(value)
+        except (TypeError, ValueError):
+            bad[j] = True
+    return x, bad | np.isinf(x)
+
+
+def _check_cycles(n: int, src: np.ndarray, dst: np.ndarray,
+                  node_ids: List[Any], errors: _Errors) -> None:
+    """
+    Kahn's algorithm forwards, then backwards on what is left: the nodes
+    that survive both lie on a cycle (or between two).
+    """
+    remaining = _unsorted(n, src, dst)
+    if not remaining.any():
+        return
+    keep = remaining[src] & remaining[dst]
+    on_cycle = _unsorted(n, dst[keep], src[keep]) & remaining
+    for i in np.flatnonzero(on_cycle).tolist():
+        errors.add(node_ids[i], None, f"Node {node_ids[i]} is on a cycle; flowsheets must be acyclic")
+
+
+def _unsorted(n: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """Mask of nodes a topological sort along ``src`` → ``dst`` cannot reach."""
+    order = np.argsort(src, kind="stable")
+    ptr = np.zeros(n + 1, dtype=np.intp)
+    np.cumsum(np.bincount(src, minlength=n), out=ptr[1:])
+    ptr_l, dst_l = ptr.tolist(), dst[order].tolist()
+    in_deg = np.bincount(dst, minlength=n).tolist()
+
+    queue = [i for i in range(n) if in_deg[i] == 0]
+    head = 0
+    while head < len(queue):
+        u = queue[head]
+        head += 1
+        for v in dst_l[ptr_l[u]:ptr_l[u + 1]]:
+            in_deg[v] -= 1
+            if in_deg[v] == 0:
+                queue.append(v)
+    remaining = np.ones(n, dtype=bool)
+    remaining[np.array(queue, dtype=np.intp)] = False
+    return remaining
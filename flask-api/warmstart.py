@@ -0,0 +1,164 @@
+"""
+warmstart.py
+-------------------
+Warm starts for the single-pipe flow-rate solve.
+
+Users often re-solve the same pipe with a slightly different pressure,
+e.g. while nudging an outlet pressure on the canvas.  ``WarmStartStore``
+remembers the converged (flow, pressure drop) pairs of recent solves.
+Each pipe is keyed by its geometry, fluid properties and friction
+method.  A new solve for the same pipe gets:
+
+  • a first guess, interpolated in log–log space between the two stored
+    drops around the requested one, or extrapolated with a power-law
+    exponent clamped to the physical range ΔP ∝ ṁ¹ … ṁ² (laminar …
+    fully rough);
+  • the nearest stored pairs below and above the requested drop.  Their
+    residuals are known, so they close the bracket without evaluating
+    the pipe.
+
+Pipes are evicted least-recently-used beyond ``max_entries``.  Each pipe
+keeps its ``max_points`` most recent pairs.  ``max_entries=0`` turns the
+store off (``SOLVER_WARM_START_SIZE=0``), and every solve then starts
+cold, as it does for reproducibility tests.
+"""
+
+from __future__ import annotations
+import bisect
+import itertools
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from metrics import observe_warm_start
+
+Point = Tuple[float, float]             # (mass flow kg/h, pressure drop Pa)
+_Entry = Tuple[float, float, int]       # (pressure drop Pa, mass flow kg/h, insertion number)
+
+# Exponent n of ΔP ∝ ṁⁿ used when only one stored pair is available
+# (developed turbulent flow in a commercial pipe)
+DEFAULT_EXPONENT = 1.8
+
+
+class WarmStart:
+    """First guess and the stored pairs that bracket the requested drop."""
+
+    __slots__ = ("guess", "below", "above")
+
+    def __init__(self, guess: float, below: Optional[Point], above: Optional[Point]) -> None:
+        self.guess = guess
+        self.below = below
+        self.above = above
+
+
+class WarmStartStore:
+    """Thread-safe LRU of converged flow / pressure-drop pairs per pipe."""
+
+    def __init__(self, max_entries: int = 1024, max_points: int = 8) -> None:
+        self.max_entries = max_entries
+        self.max_points = max(max_points, 1)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, list[_Entry]]" = OrderedDict()   # sorted by drop
+        self._lock = threading.Lock()
+        self._stamps = itertools.count()
+
+    @classmethod
+    def from_env(cls) -> "WarmStartStore":
+        """Configured by SOLVER_WARM_START_SIZE (``0`` disables) and SOLVER_WARM_START_POINTS."""
+        return cls(
+            max_entries=int(os.getenv("SOLVER_WARM_START_SIZE", "1024")),
+            max_points=int(os.getenv("SOLVER_WARM_START_POINTS", "8")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def key(pipe: Any) -> Hashable:
+        """Geometry, fluid and friction method of a ``Pipe``."""
+        return (pipe.D, pipe.L, pipe.epsilon, pipe.rho, pipe.mu_cp, pipe._method)
+
+    # ──────────────────────────────
+    # ─── Public API ───────────────
+    # ──────────────────────────────
+    def lookup(self, key: Hashable, pressure_drop: float) -> Optional[WarmStart]:
+        """Warm start for ``pressure_drop`` on pipe ``key``, or None when nothing is stored."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            points = self._entries.get(key)
+            if points is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        observe_warm_start(points is not None)
+        if points is None:
+            return None
+
+        i = bisect.bisect_right(points, (pressure_drop, math.inf))
+        lower = (points[i - 1][1], points[i - 1][0]) if i > 0 else None
+        upper = (points[i][1], points[i][0]) if i < len(points) else None
+        if len(points) < 2:
+            pair = None
+        else:
+            j = min(max(i, 1), len(points) - 1)                 # nearest two around the drop
+            pair = ((points[j - 1][1], points[j - 1][0]), (points[j][1], points[j][0]))
+
+        guess = _interpolate(lower or upper, pair, pressure_drop)
+        if lower is not None and upper is not None:
+            guess = min(max(guess, lower[0]), upper[0])
+        return WarmStart(guess, lower, upper)
+
+    def remember(self, key: Hashable, flow: float, pressure_drop: float) -> None:
+        """Stores a converged pair, replacing any earlier one with the same drop."""
+        if not self.enabled or not (flow > 0 and pressure_drop > 0):
+            return
+        flow, pressure_drop = float(flow), float(pressure_drop)    # NumPy scalars are slow here
+        with self._lock:
+            points = self._entries.pop(key, [])
+            i = bisect.bisect_left(points, (pressure_drop, -math.inf))
+            if i < len(points) and points[i][0] == pressure_drop:
+                del points[i]
+            points.insert(i, (pressure_drop, flow, next(self._stamps)))
+            if len(points) > self.max_points:
+                points.remove(min(points, key=lambda p: p[2]))
+            self._entries[key] = points
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _interpolate(anchor: Point, pair: Optional[Tuple[Point, Point]], pressure_drop: float) -> float:
+    """
+    Flow at ``pressure_drop`` on the power law through ``anchor``.  Its
+    exponent is taken from ``pair`` (default ``DEFAULT_EXPONENT``) and
+    clamped to 1 ≤ n ≤ 2.
+    """
+    exponent = DEFAULT_EXPONENT
+    if pair is not None:
+        (m1, dp1), (m2, dp2) = pair
+        if m1 != m2 and dp1 != dp2:
+            exponent = math.log(dp2 / dp1) / math.log(m2 / m1)
+    exponent = min(max(exponent, 1.0), 2.0)
+    flow, drop = anchor
+    return flow * (pressure_drop / drop) ** (1.0 / exponent)